@@ -1,9 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth import admin as auth_admin
 
+from utility.helpers.blind_index import prefix_match
+
 from .forms import UserChangeForm, UserCreationForm
 from .models import (
+    APILogRollup,
     EmailConfirmation,
+    InsuranceVerificationJob,
     PasswordReset,
     PhoneNumberVerification,
     PractitionerAvailableDateTime,
@@ -68,6 +72,16 @@ class UserAdmin(auth_admin.UserAdmin):
         "user_type",
     ]
 
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        # names and addresses are encrypted, match them through their blind
+        # indexes instead of decrypting every row
+        if search_term.strip():
+            results |= queryset.filter(prefix_match(search_term))
+        return results, may_have_duplicates
+
 
 @admin.register(PasswordReset)
 class PasswordResetAdmin(admin.ModelAdmin):
@@ -128,6 +142,7 @@ class UserCardAdmin(admin.ModelAdmin):
         "last4_digit",
         "exp_month",
         "exp_year",
+        "setup_status",
     ]
     search_fields = ["user__email"]
 
@@ -139,5 +154,35 @@ class UserAccountDetailsAdmin(admin.ModelAdmin):
         "bank_name",
         "account_number",
         "routing_number",
+        "stripe_account_id",
     ]
     search_fields = ["user__email"]
+
+
+@admin.register(InsuranceVerificationJob)
+class InsuranceVerificationJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "user",
+        "status",
+        "insurance_company_name",
+        "created_at",
+        "updated_at",
+    ]
+    search_fields = ["user__email", "id"]
+    list_filter = ["status"]
+
+
+@admin.register(APILogRollup)
+class APILogRollupAdmin(admin.ModelAdmin):
+    list_display = [
+        "day",
+        "api",
+        "method",
+        "status_code",
+        "request_count",
+        "average_execution_time",
+        "max_execution_time",
+    ]
+    search_fields = ["api"]
+    list_filter = ["method", "status_code"]
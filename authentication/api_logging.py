@@ -0,0 +1,208 @@
+import atexit
+import datetime
+import json
+import os
+import random
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from drf_api_logger import API_LOGGER_SIGNAL
+from drf_api_logger.middleware.api_logger_middleware import APILoggerMiddleware
+from drf_api_logger.models import APILogsModel
+
+from authentication.models import APILogRollup
+
+
+def _dump(value) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str) if value else ""
+
+
+class APILogBuffer:
+    """
+    Holds API log entries in memory and writes them with ``bulk_create`` from
+    a background thread, every ``flush_interval`` seconds or once a batch is
+    ready.
+
+    Adding an entry never blocks the request. Past ``sample_above`` entries
+    only server errors and a ``sample_rate`` share of the rest are kept, and
+    at ``max_size`` new entries are dropped.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        sample_above: int,
+        sample_rate: float,
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_above = sample_above
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._entries = deque()
+        self._lock = threading.Lock()
+        self._batch_ready = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def put(self, **data):
+        with self._lock:
+            size = len(self._entries)
+            if size >= self.max_size or (
+                size >= self.sample_above
+                and data["status_code"] < 500
+                and random.random() >= self.sample_rate
+            ):
+                self.dropped += 1
+                return
+            self._entries.append(data)
+            if size + 1 >= self.batch_size:
+                self._batch_ready.set()
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        # threads do not survive a fork, each worker process starts its own
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="api-log-buffer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._batch_ready.wait(self.flush_interval)
+            self._batch_ready.clear()
+            self.flush()
+
+    def _take_batch(self) -> list:
+        with self._lock:
+            return [
+                self._entries.popleft()
+                for _ in range(min(self.batch_size, len(self._entries)))
+            ]
+
+    def flush(self):
+        batch = self._take_batch()
+        while batch:
+            try:
+                APILogsModel.objects.bulk_create(
+                    [
+                        APILogsModel(
+                            api=entry["api"][:1024],
+                            headers=_dump(entry["headers"]),
+                            body=_dump(entry["body"]),
+                            method=entry["method"],
+                            client_ip_address=entry["client_ip_address"] or "",
+                            response=_dump(entry["response"]),
+                            status_code=entry["status_code"],
+                            execution_time=entry["execution_time"],
+                            added_on=entry["added_on"],
+                        )
+                        for entry in batch
+                    ]
+                )
+            except Exception as e:
+                self.dropped += len(batch)
+                print(f"failed to save {len(batch)} api logs: {e}")
+                # a broken connection would fail every following batch
+                connection.close()
+            batch = self._take_batch()
+
+
+api_log_buffer = APILogBuffer(
+    max_size=settings.API_LOG_BUFFER_SIZE,
+    batch_size=settings.API_LOG_BATCH_SIZE,
+    flush_interval=settings.API_LOG_FLUSH_INTERVAL,
+    sample_above=settings.API_LOG_SAMPLE_ABOVE,
+    sample_rate=settings.API_LOG_SAMPLE_RATE,
+)
+API_LOGGER_SIGNAL.listen += api_log_buffer.put
+atexit.register(api_log_buffer.flush)
+
+
+class BufferedAPILoggerMiddleware(APILoggerMiddleware):
+    """
+    drf_api_logger's middleware with its database sink swapped for
+    ``api_log_buffer``. The entry is handed over through the logger signal.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.DRF_API_LOGGER_DATABASE = False
+        self.DRF_API_LOGGER_SIGNAL = True
+
+
+def rollup_api_logs(retention_days: int = None) -> dict:
+    """
+    Folds API logs older than the retention period into one APILogRollup row
+    per day, endpoint, method and status code, then deletes them. Each day is
+    rolled up and deleted in its own transaction.
+    """
+    retention_days = retention_days or settings.API_LOG_RETENTION_DAYS
+    cutoff = timezone.localdate() - datetime.timedelta(days=retention_days)
+    days = (
+        APILogsModel.objects.filter(added_on__date__lt=cutoff)
+        .annotate(day=TruncDate("added_on"))
+        .values_list("day", flat=True)
+        .distinct()
+    )
+
+    summary = {"days": 0, "deleted": 0}
+    for day in sorted(days):
+        with transaction.atomic():
+            logs = APILogsModel.objects.filter(added_on__date=day)
+            totals = logs.values("api", "method", "status_code").annotate(
+                request_count=Count("id"),
+                average_execution_time=Avg("execution_time"),
+                max_execution_time=Max("execution_time"),
+            )
+            existing = {
+                (rollup.api, rollup.method, rollup.status_code): rollup
+                for rollup in APILogRollup.objects.select_for_update().filter(day=day)
+            }
+            created, updated = [], []
+            for row in totals:
+                rollup = existing.get((row["api"], row["method"], row["status_code"]))
+                if rollup is None:
+                    created.append(APILogRollup(day=day, **row))
+                    continue
+                # logs that landed after the day was rolled up
+                request_count = rollup.request_count + row["request_count"]
+                rollup.average_execution_time = (
+                    rollup.average_execution_time * rollup.request_count
+                    + row["average_execution_time"] * row["request_count"]
+                ) / request_count
+                rollup.request_count = request_count
+                rollup.max_execution_time = max(
+                    rollup.max_execution_time, row["max_execution_time"]
+                )
+                rollup.updated_at = timezone.now()
+                updated.append(rollup)
+
+            APILogRollup.objects.bulk_create(created)
+            APILogRollup.objects.bulk_update(
+                updated,
+                [
+                    "request_count",
+                    "average_execution_time",
+                    "max_execution_time",
+                    "updated_at",
+                ],
+            )
+            deleted, _ = logs.delete()
+        summary["days"] += 1
+        summary["deleted"] += deleted
+    return summary
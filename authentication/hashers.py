@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class CalibratedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 with the cost parameters taken from settings.
+
+    It keeps the ``argon2`` algorithm name, so existing hashes still verify,
+    and ``must_update`` compares the stored parameters with these. A login
+    with a hash made under other parameters rehashes the password on the way.
+    Run ``manage.py calibrate_argon2`` on production hardware to pick them.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+def measure_argon2(time_cost: int, memory_cost: int, parallelism: int) -> float:
+    """Returns the milliseconds one hash takes with the given parameters."""
+    hasher = Argon2PasswordHasher()
+    hasher.time_cost = time_cost
+    hasher.memory_cost = memory_cost
+    hasher.parallelism = parallelism
+    started_at = time.perf_counter()
+    hasher.encode("calibration-password", hasher.salt())
+    return (time.perf_counter() - started_at) * 1000
+
+
+def calibrate_argon2(
+    target_ms: float, memory_cost: int, parallelism: int, max_time_cost: int = 20
+) -> dict:
+    """
+    Returns the highest time cost that hashes within ``target_ms`` on this
+    machine for the given memory cost and parallelism.
+    """
+    time_cost, elapsed = 1, measure_argon2(1, memory_cost, parallelism)
+    while time_cost < max_time_cost:
+        next_elapsed = measure_argon2(time_cost + 1, memory_cost, parallelism)
+        if next_elapsed > target_ms:
+            break
+        time_cost, elapsed = time_cost + 1, next_elapsed
+    return {
+        "time_cost": time_cost,
+        "memory_cost": memory_cost,
+        "parallelism": parallelism,
+        "elapsed_ms": round(elapsed, 1),
+    }
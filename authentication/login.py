@@ -0,0 +1,125 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils import timezone
+
+from authentication.models import User
+
+
+class PasswordHashingBusy(Exception):
+    def __init__(self):
+        super().__init__("Too many login attempts in progress, please try again")
+
+
+class PasswordHashingPool:
+    """
+    Runs password checks on a fixed number of threads.
+
+    argon2 releases the GIL while hashing, so the pool size is the number of
+    hashes this process runs at once. Callers beyond the pool wait in a
+    bounded queue, and when no place frees up within ``wait_timeout`` they are
+    turned away instead of piling up behind the CPU.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, wait_timeout: float):
+        self.wait_timeout = wait_timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hashing"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def check_password(self, user: User, password: str) -> bool:
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise PasswordHashingBusy()
+        try:
+            # check_password also rehashes to the current parameters and
+            # saves the new hash when the stored one is out of date
+            return self._executor.submit(self._check_password, user, password).result()
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _check_password(user: User, password: str) -> bool:
+        try:
+            return user.check_password(password)
+        finally:
+            # the threads outlive requests, a rehash would otherwise leave
+            # its database connection open on them
+            connections.close_all()
+
+
+class LastLoginBuffer:
+    """
+    Collects login times in memory and writes them with one bulk update from
+    a background thread, every ``flush_interval`` seconds or once the buffer
+    fills up.
+    """
+
+    def __init__(self, max_size: int, flush_interval: float):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._logins = {}
+        self._full = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def record(self, user_id):
+        with self._lock:
+            self._logins[user_id] = timezone.now()
+            if len(self._logins) >= self.max_size:
+                self._full.set()
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        # threads do not survive a fork, each worker process starts its own
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="last-login-buffer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._full.wait(self.flush_interval)
+            self._full.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            logins, self._logins = self._logins, {}
+        if not logins:
+            return
+        try:
+            User.objects.bulk_update(
+                [
+                    User(id=user_id, last_login=logged_in_at)
+                    for user_id, logged_in_at in logins.items()
+                ],
+                ["last_login"],
+            )
+        except Exception as e:
+            print(f"failed to save last login for {len(logins)} users: {e}")
+            # a broken connection would fail every following flush
+            connection.close()
+
+
+password_hashing_pool = PasswordHashingPool(
+    max_workers=settings.PASSWORD_HASHING_MAX_WORKERS,
+    max_pending=settings.PASSWORD_HASHING_MAX_PENDING,
+    wait_timeout=settings.PASSWORD_HASHING_WAIT_TIMEOUT,
+)
+last_login_buffer = LastLoginBuffer(
+    max_size=settings.LAST_LOGIN_BUFFER_SIZE,
+    flush_interval=settings.LAST_LOGIN_FLUSH_INTERVAL,
+)
+atexit.register(last_login_buffer.flush)
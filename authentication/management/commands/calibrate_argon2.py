@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from authentication.hashers import calibrate_argon2
+
+
+class Command(BaseCommand):
+    help = "Find the Argon2 time cost that hashes within a target time on this machine"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250,
+            help="Longest a single password hash may take",
+        )
+        parser.add_argument(
+            "--memory-cost",
+            type=int,
+            default=settings.ARGON2_MEMORY_COST,
+            help="Memory per hash in KiB",
+        )
+        parser.add_argument(
+            "--parallelism",
+            type=int,
+            default=settings.ARGON2_PARALLELISM,
+            help="Lanes per hash",
+        )
+
+    def handle(self, *args, **options):
+        result = calibrate_argon2(
+            target_ms=options["target_ms"],
+            memory_cost=options["memory_cost"],
+            parallelism=options["parallelism"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"ARGON2_TIME_COST={result['time_cost']} "
+                f"ARGON2_MEMORY_COST={result['memory_cost']} "
+                f"ARGON2_PARALLELISM={result['parallelism']} "
+                f"({result['elapsed_ms']} ms per hash)"
+            )
+        )
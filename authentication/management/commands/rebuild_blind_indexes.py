@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from authentication.models import User
+from utility.helpers.blind_index import BLIND_INDEXED_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Recompute the blind indexes of every user, after a backfill or key change"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Users decrypted and updated per query",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        users = User.objects.only("id", *BLIND_INDEXED_FIELDS).order_by("pk")
+        index_fields = []
+        batch = []
+        total = 0
+        for user in users.iterator(chunk_size=batch_size):
+            index_fields = user.update_blind_indexes(force=True)
+            batch.append(user)
+            if len(batch) == batch_size:
+                User.objects.bulk_update(batch, index_fields)
+                total += len(batch)
+                batch = []
+        if batch:
+            User.objects.bulk_update(batch, index_fields)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt blind indexes of {total} users"))
@@ -0,0 +1,134 @@
+import hashlib
+import uuid
+
+from cryptography.fernet import InvalidToken
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from authentication.models import User
+from utility.helpers.encryption import rotate
+
+ENCRYPTED_USER_FIELDS = ("first_name", "last_name", "address", "city")
+
+UUID_SPACE = 2**128
+
+
+def id_range(worker: int, workers: int) -> tuple:
+    """
+    The ``[start, end)`` slice of the UUID space that ``worker`` of
+    ``workers`` covers, ``end`` is None for the last one.
+    """
+    start = uuid.UUID(int=UUID_SPACE * worker // workers)
+    if worker == workers - 1:
+        return start, None
+    return start, uuid.UUID(int=UUID_SPACE * (worker + 1) // workers)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encrypt the encrypted user fields with ENCRYPT_KEY. Run it once the "
+        "previous key is in ENCRYPT_OLD_KEYS, it resumes where it stopped"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Users locked, re-encrypted and updated per transaction",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes the users are split between by id",
+        )
+        parser.add_argument(
+            "--worker",
+            type=int,
+            default=0,
+            help="Which of the --workers id ranges this process rotates, from 0",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and start from the beginning of the range",
+        )
+
+    def handle(self, *args, **options):
+        workers, worker = options["workers"], options["worker"]
+        if not 0 <= worker < workers:
+            raise CommandError("--worker must be between 0 and --workers - 1")
+        if not settings.ENCRYPT_KEY:
+            raise CommandError("ENCRYPT_KEY is not set")
+        batch_size = options["batch_size"]
+
+        start, end = id_range(worker, workers)
+        checkpoint_key = self.checkpoint_key(worker, workers)
+        checkpoint = None if options["restart"] else cache.get(checkpoint_key)
+
+        users = User.objects.filter(pk__gte=start)
+        if end:
+            users = users.filter(pk__lt=end)
+        if checkpoint:
+            users = users.filter(pk__gt=checkpoint)
+        # only ids are streamed, the rows are read again under lock per batch
+        user_ids = users.order_by("pk").values_list("pk", flat=True)
+
+        totals = {"rotated": 0, "current": 0, "failed": 0}
+        batch = []
+        for user_id in user_ids.iterator(chunk_size=batch_size):
+            batch.append(user_id)
+            if len(batch) == batch_size:
+                self.rotate_batch(batch, totals)
+                cache.set(checkpoint_key, f"{batch[-1]}", timeout=None)
+                batch = []
+        if batch:
+            self.rotate_batch(batch, totals)
+            cache.set(checkpoint_key, f"{batch[-1]}", timeout=None)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"worker {worker}/{workers}: {totals['rotated']} users re-encrypted, "
+                f"{totals['current']} already current, {totals['failed']} failed"
+            )
+        )
+
+    def checkpoint_key(self, worker: int, workers: int) -> str:
+        # a later rotation to another key starts over instead of resuming
+        key_id = hashlib.sha256(settings.ENCRYPT_KEY.encode()).hexdigest()[:12]
+        return f"encryption-rotation:{key_id}:{workers}:{worker}"
+
+    def rotate_batch(self, user_ids: list, totals: dict):
+        # short transaction per batch, so rows are locked for one batch only
+        # and profile edits made meanwhile are not overwritten
+        with transaction.atomic():
+            users = (
+                User.objects.select_for_update()
+                .filter(pk__in=user_ids)
+                .order_by("pk")
+                .only("id", *ENCRYPTED_USER_FIELDS)
+            )
+            changed = []
+            for user in users:
+                try:
+                    rotated = {
+                        field: rotate(getattr(user, field))
+                        for field in ENCRYPTED_USER_FIELDS
+                        if getattr(user, field)
+                    }
+                except (InvalidToken, ValueError) as e:
+                    print(f"encryption rotation error for user {user.id} {e}")
+                    totals["failed"] += 1
+                    continue
+                if all(getattr(user, f) == value for f, value in rotated.items()):
+                    totals["current"] += 1
+                    continue
+                for field, value in rotated.items():
+                    setattr(user, field, value)
+                changed.append(user)
+            User.objects.bulk_update(changed, ENCRYPTED_USER_FIELDS)
+            totals["rotated"] += len(changed)
+        self.stdout.write(f"rotated up to user {user_ids[-1]}")
@@ -0,0 +1,93 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:26
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0037_user_residential_zipcode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InsuranceVerificationJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "queued"),
+                            ("running", "running"),
+                            ("succeeded", "succeeded"),
+                            ("failed", "failed"),
+                        ],
+                        default="queued",
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "insurance_company_name",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                (
+                    "insurance_phone_number",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                (
+                    "insurance_policy_number",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                (
+                    "insurance_group_number",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                (
+                    "insured_date_of_birth",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                (
+                    "patient_relationship",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                ("error", models.CharField(blank=True, max_length=800, null=True)),
+                (
+                    "insurance_details",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="verification_jobs",
+                        to="authentication.insurancedetails",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="user_insurance_verification_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_at",),
+                "abstract": False,
+            },
+        ),
+    ]
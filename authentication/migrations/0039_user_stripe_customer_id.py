@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0038_insuranceverificationjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="stripe_customer_id",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
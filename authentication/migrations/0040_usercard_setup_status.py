@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0039_user_stripe_customer_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usercard",
+            name="setup_status",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
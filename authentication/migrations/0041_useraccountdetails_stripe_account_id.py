@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0040_usercard_setup_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="useraccountdetails",
+            name="stripe_account_id",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
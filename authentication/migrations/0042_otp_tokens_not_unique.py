@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0041_useraccountdetails_stripe_account_id"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="emailconfirmation",
+            name="token",
+            field=models.CharField(max_length=9),
+        ),
+        migrations.AlterField(
+            model_name="phonenumberverification",
+            name="token",
+            field=models.CharField(max_length=9),
+        ),
+    ]
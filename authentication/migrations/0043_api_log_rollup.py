@@ -0,0 +1,54 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:44
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0042_otp_tokens_not_unique"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="APILogRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("day", models.DateField()),
+                ("api", models.CharField(max_length=1024)),
+                ("method", models.CharField(max_length=10)),
+                ("status_code", models.PositiveSmallIntegerField()),
+                ("request_count", models.PositiveIntegerField(default=0)),
+                (
+                    "average_execution_time",
+                    models.DecimalField(decimal_places=5, default=0, max_digits=8),
+                ),
+                (
+                    "max_execution_time",
+                    models.DecimalField(decimal_places=5, default=0, max_digits=8),
+                ),
+            ],
+            options={
+                "ordering": ("-day",),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="apilogrollup",
+            constraint=models.UniqueConstraint(
+                fields=("day", "api", "method", "status_code"),
+                name="unique_api_log_rollup",
+            ),
+        ),
+    ]
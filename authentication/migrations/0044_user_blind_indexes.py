@@ -0,0 +1,60 @@
+# Generated by Django 4.2.9 on 2026-10-19 13:07
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0043_api_log_rollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="address_bidx",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=32, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="city_bidx",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=32, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="first_name_bidx",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=32, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="last_name_bidx",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=32, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="pii_prefix_bidx",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=32),
+                blank=True,
+                default=list,
+                editable=False,
+                size=None,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["pii_prefix_bidx"], name="authenticat_pii_pre_8298b7_gin"
+            ),
+        ),
+    ]
@@ -1,12 +1,18 @@
 import os
+import re
 import uuid
 
 from django.contrib.auth.models import AbstractUser
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.validators import RegexValidator
 from django.db import models
 from django.utils import timezone
 
+from utility.helpers.blind_index import BLIND_INDEXED_FIELDS, blind_index_values
+from utility.helpers.encryption import decrypt
+from utility.helpers.identifiers import save_with_unique_value
+
 from .base_model import BaseModel
 
 
@@ -60,24 +66,109 @@ class User(AbstractUser):
 
     residential_zipcode = models.CharField(max_length=250, null=True, blank=True)
 
-    class Meta:
-        ordering = ["-date_joined"]
-
-
-def set_username(sender, instance, **kwargs):
-    if not instance.username:
-        email = instance.email
-        split_email = email.split("@")
-        username = split_email[0]
-        counter = 1
-        while User.objects.filter(username=username).exists():
-            username = username + str(counter)
-            counter += 1
-        instance.username = username
-        return username
+    # IF PATIENT, set once the stripe customer is known to exist
+    stripe_customer_id = models.CharField(max_length=255, null=True, blank=True)
 
+    # BLIND INDEXES of the encrypted fields, see utility.helpers.blind_index
+    first_name_bidx = models.CharField(
+        max_length=32, null=True, blank=True, editable=False, db_index=True
+    )
+    last_name_bidx = models.CharField(
+        max_length=32, null=True, blank=True, editable=False, db_index=True
+    )
+    address_bidx = models.CharField(
+        max_length=32, null=True, blank=True, editable=False, db_index=True
+    )
+    city_bidx = models.CharField(
+        max_length=32, null=True, blank=True, editable=False, db_index=True
+    )
+    pii_prefix_bidx = ArrayField(
+        models.CharField(max_length=32), default=list, blank=True, editable=False
+    )
 
-models.signals.pre_save.connect(set_username, sender=User)
+    class Meta:
+        ordering = ["-date_joined"]
+        indexes = [GinIndex(fields=["pii_prefix_bidx"])]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # stored rows are indexed, saving them again only re-indexes changes
+        instance._indexed_ciphertexts = {
+            field: getattr(instance, field)
+            for field in BLIND_INDEXED_FIELDS
+            if field in field_names
+        }
+        return instance
+
+    def update_blind_indexes(self, force: bool = False) -> list:
+        """
+        Recomputes the blind indexes when an encrypted field changed since it
+        was loaded, or always with ``force``. Returns the index fields set.
+        """
+        indexed = getattr(self, "_indexed_ciphertexts", {})
+        if not force and all(
+            field in indexed and indexed[field] == getattr(self, field)
+            for field in BLIND_INDEXED_FIELDS
+        ):
+            return []
+        values = blind_index_values(
+            {
+                field: decrypt(getattr(self, field)) if getattr(self, field) else None
+                for field in BLIND_INDEXED_FIELDS
+            }
+        )
+        for field, value in values.items():
+            setattr(self, field, value)
+        self._indexed_ciphertexts = {
+            field: getattr(self, field) for field in BLIND_INDEXED_FIELDS
+        }
+        return list(values)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or set(update_fields) & set(BLIND_INDEXED_FIELDS):
+            index_fields = self.update_blind_indexes()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, *index_fields}
+
+        if self.username or not self.email:
+            return super().save(*args, **kwargs)
+
+        # a concurrent signup can take the same name between the read and the
+        # INSERT, the unique constraint catches it and the next name is tried
+        return save_with_unique_value(
+            self,
+            "username",
+            lambda attempt: allocate_username(self.email, taken_suffix=attempt),
+            save=lambda: super(User, self).save(*args, **kwargs),
+        )
+
+
+def allocate_username(email: str, taken_suffix: int = 0) -> str:
+    """
+    Returns the email prefix, or the prefix followed by the next free number.
+
+    One query reads the names already built from the prefix. It is a
+    ``LIKE 'prefix%'`` range scan on the ``varchar_pattern_ops`` index that
+    Postgres gets for the unique username column.
+    """
+    base = email.split("@")[0][: User._meta.get_field("username").max_length - 10]
+    existing = User.objects.filter(
+        username__startswith=base, username__regex=rf"^{re.escape(base)}[0-9]*$"
+    ).values_list("username", flat=True)
+
+    suffixes = [taken_suffix]
+    base_taken = False
+    for username in existing:
+        suffix = username[len(base) :]
+        if not suffix:
+            base_taken = True
+        else:
+            suffixes.append(int(suffix))
+    if not base_taken and not taken_suffix:
+        return base
+    return f"{base}{max(suffixes) + 1}"
 
 
 class PasswordReset(BaseModel):
@@ -99,7 +190,8 @@ class PasswordReset(BaseModel):
 
 class EmailConfirmation(BaseModel):
     email = models.EmailField(max_length=254, null=True)
-    token = models.CharField(max_length=9, unique=True)
+    # live codes are held by authentication.otp, this only records the last one
+    token = models.CharField(max_length=9)
     sent = models.BooleanField(default=False)
     is_verified = models.BooleanField(default=False)
 
@@ -123,7 +215,8 @@ class PhoneNumberVerification(BaseModel):
     phone_number = models.CharField(
         validators=[phone_regex], max_length=800, null=True, blank=True
     )
-    token = models.CharField(max_length=9, unique=True)
+    # live codes are held by authentication.otp, this only records the last one
+    token = models.CharField(max_length=9)
     is_verified = models.BooleanField(default=False)
     sent = models.BooleanField(default=False)
 
@@ -231,6 +324,36 @@ class InsuranceDetails(BaseModel):
     )
 
 
+class InsuranceVerificationJob(BaseModel):
+    JOB_STATUS_CHOICES = (
+        ("queued", "queued"),
+        ("running", "running"),
+        ("succeeded", "succeeded"),
+        ("failed", "failed"),
+    )
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="user_insurance_verification_jobs"
+    )
+    status = models.CharField(
+        choices=JOB_STATUS_CHOICES, max_length=50, default="queued"
+    )
+    insurance_company_name = models.CharField(max_length=255, null=True, blank=True)
+    insurance_phone_number = models.CharField(max_length=255, null=True, blank=True)
+    insurance_policy_number = models.CharField(max_length=255, null=True, blank=True)
+    insurance_group_number = models.CharField(max_length=255, null=True, blank=True)
+    insured_date_of_birth = models.CharField(max_length=255, null=True, blank=True)
+    patient_relationship = models.CharField(max_length=255, null=True, blank=True)
+    insurance_details = models.ForeignKey(
+        InsuranceDetails,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="verification_jobs",
+    )
+    error = models.CharField(max_length=800, null=True, blank=True)
+
+
 class UserCard(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="user_card")
     cardholder_name = models.CharField(max_length=255, blank=True, null=True)
@@ -239,6 +362,8 @@ class UserCard(models.Model):
     exp_year = models.CharField(max_length=4, blank=True, null=True)
     card_type = models.CharField(max_length=255, blank=True, null=True)
     setup_id = models.CharField(max_length=255, blank=True, null=True)
+    # SetupIntent status, kept current by the setup_intent webhooks
+    setup_status = models.CharField(max_length=255, blank=True, null=True)
     payment_method_id = models.CharField(max_length=255, blank=True, null=True)
 
 
@@ -249,3 +374,28 @@ class UserAccountDetails(models.Model):
     bank_name = models.CharField(max_length=255, blank=True, null=True)
     account_number = models.CharField(max_length=255, blank=True, null=True)
     routing_number = models.CharField(max_length=255, blank=True, null=True)
+    # stripe connect account payouts are transferred to
+    stripe_account_id = models.CharField(max_length=255, blank=True, null=True)
+
+
+class APILogRollup(BaseModel):
+    # one row per day, endpoint, method and status code, kept after the raw
+    # drf_api_logs rows are deleted
+    day = models.DateField()
+    api = models.CharField(max_length=1024)
+    method = models.CharField(max_length=10)
+    status_code = models.PositiveSmallIntegerField()
+    request_count = models.PositiveIntegerField(default=0)
+    average_execution_time = models.DecimalField(
+        max_digits=8, decimal_places=5, default=0
+    )
+    max_execution_time = models.DecimalField(max_digits=8, decimal_places=5, default=0)
+
+    class Meta:
+        ordering = ("-day",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "api", "method", "status_code"],
+                name="unique_api_log_rollup",
+            )
+        ]
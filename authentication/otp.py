@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from authentication.models import EmailConfirmation, PhoneNumberVerification
+from utility.helpers.identifiers import generate_numeric_code
+
+
+class OTPStore:
+    """
+    One-time codes kept in the cache with a native TTL.
+
+    A code maps to its subject (email, phone number or user id) and a subject
+    maps back to its live code, so re-issuing replaces the previous code and
+    verifying is a single lookup. Codes are reserved with ``cache.add``, which
+    keeps live codes unique without probing the database. Failed attempts are
+    counted per client and per subject with ``cache.incr``.
+    """
+
+    def __init__(self, purpose: str, ttl: int, length: int = 6):
+        self.purpose = purpose
+        self.ttl = ttl
+        self.length = length
+
+    def _code_key(self, code: str) -> str:
+        return f"otp:{self.purpose}:code:{code}"
+
+    def _subject_key(self, subject) -> str:
+        return f"otp:{self.purpose}:subject:{subject}"
+
+    def _attempts_key(self, client_id: str) -> str:
+        return f"otp:{self.purpose}:attempts:{client_id}"
+
+    def _subject_attempts_key(self, subject) -> str:
+        return f"otp:{self.purpose}:subject-attempts:{subject}"
+
+    def issue(self, subject) -> str:
+        subject = f"{subject}"
+        previous_code = cache.get(self._subject_key(subject))
+        if previous_code:
+            cache.delete(self._code_key(previous_code))
+
+        code = generate_numeric_code(self.length)
+        while not cache.add(self._code_key(code), subject, timeout=self.ttl):
+            code = generate_numeric_code(self.length)
+        cache.set(self._subject_key(subject), code, timeout=self.ttl)
+        return code
+
+    def is_throttled(self, client_id: str, subject) -> bool:
+        attempts = cache.get_many(
+            [self._attempts_key(client_id), self._subject_attempts_key(subject)]
+        )
+        return (
+            attempts.get(self._attempts_key(client_id), 0)
+            >= settings.OTP_MAX_FAILED_ATTEMPTS
+            or attempts.get(self._subject_attempts_key(subject), 0)
+            >= settings.OTP_MAX_SUBJECT_FAILED_ATTEMPTS
+        )
+
+    def _record_failure(self, key: str):
+        cache.add(key, 0, timeout=settings.OTP_FAILED_ATTEMPTS_WINDOW)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # expired between add and incr
+            cache.set(key, 1, timeout=settings.OTP_FAILED_ATTEMPTS_WINDOW)
+
+    def verify(self, code: str, client_id: str, subject) -> dict:
+        """
+        Checks that ``code`` is the live code of ``subject`` without using it
+        up. Failures count against both the client and the subject, so
+        changing client address does not buy more guesses at one code.
+        """
+        subject = f"{subject}"
+        if self.is_throttled(client_id, subject):
+            return {
+                "status": False,
+                "throttled": True,
+                "response": "Too many invalid codes entered, please try again later",
+            }
+        if cache.get(self._code_key(f"{code}")) != subject:
+            self._record_failure(self._attempts_key(client_id))
+            self._record_failure(self._subject_attempts_key(subject))
+            return {"status": False, "throttled": False, "response": None}
+        return {"status": True, "throttled": False, "response": subject}
+
+    def consume(self, code: str, subject) -> bool:
+        # delete reports whether the key existed, so only one caller wins
+        if not cache.delete(self._code_key(f"{code}")):
+            return False
+        cache.delete(self._subject_key(f"{subject}"))
+        return True
+
+
+email_otp = OTPStore("email", settings.OTP_VERIFICATION_TTL)
+phone_otp = OTPStore("phone", settings.OTP_VERIFICATION_TTL)
+password_reset_otp = OTPStore("password_reset", settings.OTP_PASSWORD_RESET_TTL)
+
+
+def get_client_id(request) -> str:
+    """
+    Address of the client. X-Forwarded-For is only trusted for the entries
+    appended by our own TRUSTED_PROXY_COUNT proxies, anything left of them
+    is sent by the client and can be anything.
+    """
+    proxies = settings.TRUSTED_PROXY_COUNT
+    forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+    if proxies and forwarded_for:
+        addresses = [address.strip() for address in forwarded_for.split(",")]
+        if len(addresses) >= proxies:
+            return addresses[-proxies]
+    return request.META.get("REMOTE_ADDR", "unknown")
+
+
+def record_email_confirmation(email: str, token: str, is_verified: bool):
+    updated = EmailConfirmation.objects.filter(email=email).update(
+        token=token, sent=True, is_verified=is_verified, updated_at=timezone.now()
+    )
+    if not updated:
+        EmailConfirmation.objects.create(
+            email=email, token=token, sent=True, is_verified=is_verified
+        )
+
+
+def record_phone_verification(phone_number: str, token: str, is_verified: bool):
+    updated = PhoneNumberVerification.objects.filter(phone_number=phone_number).update(
+        token=token, sent=True, is_verified=is_verified, updated_at=timezone.now()
+    )
+    if not updated:
+        PhoneNumberVerification.objects.create(
+            phone_number=phone_number, token=token, sent=True, is_verified=is_verified
+        )
@@ -1,6 +1,11 @@
 from rest_framework import serializers
 
-from authentication.models import InsuranceDetails, User, UserCard
+from authentication.models import (
+    InsuranceDetails,
+    InsuranceVerificationJob,
+    User,
+    UserCard,
+)
 from utility.helpers.functools import decrypt
 
 
@@ -123,6 +128,7 @@ class ChangePasswordSerializer(serializers.ModelSerializer):
 
 
 class ForgotPasswordSerializer(serializers.ModelSerializer):
+    email = serializers.EmailField(required=True, write_only=True)
     token = serializers.CharField(
         required=True,
         max_length=150,
@@ -148,6 +154,7 @@ class ForgotPasswordSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
+            "email",
             "token",
             "new_password",
             "confirm_password",
@@ -220,6 +227,23 @@ class InsuranceDetailsSerializer(serializers.ModelSerializer):
         }
 
 
+class InsuranceVerificationJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source="id", read_only=True)
+    insurance_details = InsuranceDetailsSerializer(read_only=True)
+
+    class Meta:
+        model = InsuranceVerificationJob
+        fields = [
+            "job_id",
+            "status",
+            "error",
+            "insurance_details",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
 class UserCardSerializer(serializers.ModelSerializer):
     user_id = serializers.UUIDField(required=True, write_only=True)
     cardholder_name = serializers.CharField(
@@ -247,6 +271,7 @@ class UserCardSerializer(serializers.ModelSerializer):
             "exp_month",
             "exp_year",
             "setup_id",
+            "setup_status",
             "payment_method_id",
         ]
 
@@ -554,6 +554,7 @@ class UserAccountDetailsSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = [
             "user",
+            "stripe_account_id",
         ]
 
     def to_representation(self, instance):
@@ -572,13 +573,11 @@ class UserAccountDetailsSerializer(serializers.ModelSerializer):
 
     @transaction.atomic()
     def update(self, validated_data):
-        if UserAccountDetails.objects.filter(
-            user=self.context["request"].user
-        ).exists():
-            user_account_details = UserAccountDetails.objects.filter(
-                user=self.context["request"].user
-            ).update(**validated_data)
-        else:
-            validated_data["user"] = self.context["request"].user
+        user_id = self.context["request"].user.id
+        user_account_details = UserAccountDetails.objects.filter(
+            user_id=user_id
+        ).update(**validated_data)
+        if not user_account_details:
+            validated_data["user_id"] = user_id
             user_account_details = UserAccountDetails.objects.create(**validated_data)
         return user_account_details
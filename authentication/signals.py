@@ -0,0 +1,79 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from authentication.models import (
+    PractitionerPracticeCriteria,
+    ProviderQualification,
+    User,
+)
+from authentication.tokens import revoke_user_tokens
+from booking.models import UserBookingDetails
+from utility.helpers.etags import DIRECTORY_SCOPE, bookings_scope, bump_versions
+
+# user fields that no listing shows
+PRIVATE_USER_FIELDS = {"last_login", "password", "stripe_customer_id"}
+
+
+def bump_profile_versions(user_id, is_provider: bool):
+    """
+    Bumps the listings that show the user's profile: their own and their
+    counterparties' booking lists, and the provider directory for providers.
+    """
+    if is_provider:
+        patients = (
+            UserBookingDetails.objects.filter(practitioner_id=user_id)
+            .values_list("patient_id", flat=True)
+            .distinct()
+        )
+        scopes = [DIRECTORY_SCOPE, bookings_scope("provider", user_id)]
+        scopes += [bookings_scope("patient", patient_id) for patient_id in patients]
+    else:
+        providers = (
+            UserBookingDetails.objects.filter(
+                patient_id=user_id, practitioner__isnull=False
+            )
+            .values_list("practitioner_id", flat=True)
+            .distinct()
+        )
+        scopes = [bookings_scope("patient", user_id)]
+        scopes += [bookings_scope("provider", provider_id) for provider_id in providers]
+    bump_versions(*scopes)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    # a new user is in no listing yet, apart from a provider in the directory
+    if update_fields and set(update_fields) <= PRIVATE_USER_FIELDS:
+        return
+    is_provider = instance.user_type == "health_provider"
+    if created and not is_provider:
+        return
+    transaction.on_commit(lambda: bump_profile_versions(instance.id, is_provider))
+
+
+@receiver(post_save, sender=PractitionerPracticeCriteria)
+@receiver(post_save, sender=ProviderQualification)
+def provider_profile_saved(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: bump_profile_versions(instance.user_id, is_provider=True)
+    )
+
+
+@receiver(pre_save, sender=User)
+def user_credentials_changing(sender, instance, **kwargs):
+    # set_password keeps the new raw password in _password until saved
+    instance._revoke_tokens = not instance._state.adding and (
+        instance._password is not None or not instance.is_active
+    )
+
+
+@receiver(post_save, sender=User)
+def user_credentials_changed(sender, instance, **kwargs):
+    if getattr(instance, "_revoke_tokens", False):
+        transaction.on_commit(lambda: revoke_user_tokens(instance.id))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: revoke_user_tokens(instance.id))
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from authentication.api_logging import rollup_api_logs
+from authentication.models import InsuranceDetails, InsuranceVerificationJob
+from authentication.utils import verify_and_save_insurance_details
+
+
+@shared_task(ignore_result=True)
+def run_insurance_verification_job(job_id: str):
+    # claim the job so a redelivered message does not call pVerify twice
+    claimed = InsuranceVerificationJob.objects.filter(
+        id=job_id, status="queued"
+    ).update(status="running", updated_at=timezone.now())
+    if not claimed:
+        return
+    job = InsuranceVerificationJob.objects.select_related("user").get(id=job_id)
+
+    try:
+        if InsuranceDetails.objects.filter(user=job.user).exists():
+            job.status = "failed"
+            job.error = "User already has Insurance verified"
+            job.save(update_fields=["status", "error", "updated_at"])
+            return
+
+        verify_insurance = verify_and_save_insurance_details(
+            job.user,
+            {
+                "insurance_company_name": job.insurance_company_name,
+                "insurance_phone_number": job.insurance_phone_number,
+                "insurance_policy_number": job.insurance_policy_number,
+                "insurance_group_number": job.insurance_group_number,
+                "insured_date_of_birth": job.insured_date_of_birth,
+                "patient_relationship": job.patient_relationship,
+            },
+        )
+        if not verify_insurance["status"]:
+            job.status = "failed"
+            job.error = f"{verify_insurance['response']}"[:800]
+        else:
+            job.status = "succeeded"
+            job.insurance_details = verify_insurance["response"]
+    except Exception as e:
+        print("insurance verification job error", e)
+        job.status = "failed"
+        job.error = f"{e}"[:800]
+
+    job.save(update_fields=["status", "error", "insurance_details", "updated_at"])
+
+
+@shared_task(ignore_result=True)
+def requeue_stale_insurance_verification_jobs():
+    """
+    Queues the jobs left running by a worker that died mid-verification
+    again. A job still not done an hour after it was submitted is failed
+    instead, so the patient is told to try again rather than polling on.
+    """
+    now = timezone.now()
+    stale = InsuranceVerificationJob.objects.filter(
+        status="running",
+        updated_at__lt=now
+        - timedelta(seconds=settings.INSURANCE_VERIFICATION_STALE_SECONDS),
+    )
+    stale.filter(created_at__lt=now - timedelta(hours=1)).update(
+        status="failed",
+        error="Insurance verification timed out, please try again",
+        updated_at=now,
+    )
+
+    for job_id in stale.values_list("id", flat=True):
+        # conditional, a job a worker picked up meanwhile is left to it
+        requeued = stale.filter(id=job_id).update(status="queued", updated_at=now)
+        if requeued:
+            run_insurance_verification_job.delay(str(job_id))
+
+
+@shared_task(ignore_result=True)
+def rollup_api_logs_task():
+    summary = rollup_api_logs()
+    print("api log rollup", summary)
@@ -0,0 +1,99 @@
+import time
+import uuid
+
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authentication.models import User, UserCard
+
+# claims views authorize on, copied from the refresh token into the access token
+USER_CLAIMS = ("user_type", "email", "card_verified")
+
+
+class UserRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user, card_verified: bool = None):
+        token = super().for_user(user)
+        if card_verified is None and user.user_type == "patient":
+            card_verified = UserCard.objects.filter(user_id=user.id).exists()
+        token["user_type"] = user.user_type
+        token["email"] = user.email
+        token["card_verified"] = card_verified
+        return token
+
+
+def _revoked_key(user_id) -> str:
+    return f"jwt:revoked:{user_id}"
+
+
+def revoke_user_tokens(user_id):
+    """
+    Rejects every token of the user issued until now, e.g. after a password
+    change or deactivation. Kept until the last of them has expired.
+    """
+    cache.set(
+        _revoked_key(user_id),
+        time.time(),
+        timeout=int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + 60,
+    )
+
+
+class RevocableJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Stateless JWT authentication plus one cache read, so a token revoked by
+    ``revoke_user_tokens`` stops working before it expires. Tokens without
+    the USER_CLAIMS are rejected with a 401.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        revoked_at = cache.get(_revoked_key(token[api_settings.USER_ID_CLAIM]))
+        # iat is whole seconds, a token from the second of revocation is
+        # rejected too and the user logs in again
+        if revoked_at is not None and token.get("iat", 0) < revoked_at:
+            raise InvalidToken("Token has been revoked")
+        # tokens issued before the claims were added, RequestUser has no
+        # query to fall back on so the user logs in again instead
+        if any(claim not in token for claim in USER_CLAIMS):
+            raise InvalidToken("Token is missing user claims")
+        return token
+
+
+class RequestUser(TokenUser):
+    """
+    ``request.user`` built from the access token claims, so role checks need
+    no query. Other user fields are read from ``instance``, which fetches
+    the User row on first use and keeps it for the rest of the request.
+    """
+
+    @cached_property
+    def id(self) -> uuid.UUID:
+        return uuid.UUID(f"{self.token[api_settings.USER_ID_CLAIM]}")
+
+    @cached_property
+    def instance(self) -> User:
+        return User.objects.get(id=self.id)
+
+    def has_verified_card(self) -> bool:
+        # the claim is a snapshot from login, a card added since then is
+        # only visible in the database
+        if self.token.get("card_verified"):
+            return True
+        return UserCard.objects.filter(user_id=self.id).exists()
+
+    async def ahas_verified_card(self) -> bool:
+        if self.token.get("card_verified"):
+            return True
+        return await UserCard.objects.filter(user_id=self.id).aexists()
+
+    def __getattr__(self, attr: str):
+        # only claims, a hidden query here would also fail in async views.
+        # RevocableJWTAuthentication rejects tokens missing any of them
+        if attr in USER_CLAIMS and attr in self.token:
+            return self.token[attr]
+        raise AttributeError(attr)
@@ -1,43 +1,21 @@
-import random
-import string
 import threading
+from decimal import Decimal
 
 from django.conf import settings
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 
 from authentication.models import (
-    EmailConfirmation,
-    PhoneNumberVerification,
+    InsuranceDetails,
     PractitionerAvailableDateTime,
     PractitionerPracticeCriteria,
+    User,
 )
+from utility.services.pverify import Pverify
 
 # import time
 
 
-def generate_code(num):
-    return "".join(random.choice(string.digits) for i in range(num))
-
-
-def generate_unique_code():
-    code = generate_code(6)
-    exists = EmailConfirmation.objects.filter(token=code).exists()
-    while exists:
-        code = generate_code(6)
-        exists = EmailConfirmation.objects.filter(token=code).exists()
-    return code
-
-
-def generate_phone_unique_code():
-    code = generate_code(6)
-    exists = PhoneNumberVerification.objects.filter(token=code).exists()
-    while exists:
-        code = generate_code(6)
-        exists = PhoneNumberVerification.objects.filter(token=code).exists()
-    return code
-
-
 def send_email_verification(to_email, token):
     try:
         # send otp to user email
@@ -82,3 +60,36 @@ def start_schedule_background_tasks(days_and_time, provider_criteria):
         target=create_provider_available_days(days_and_time, provider_criteria)
     )
     thread.start()
+
+
+def verify_and_save_insurance_details(user: User, insurance_data: dict) -> dict:
+    insured_date_of_birth = insurance_data["insured_date_of_birth"]
+    dob_list = insured_date_of_birth.split("/")
+    if len(dob_list) != 3:
+        return {"status": False, "response": "Invalid date of birth"}
+
+    # pVerify expects the date of birth as MM/DD/YYYY
+    dob = f"{dob_list[1]}/{dob_list[0]}/{dob_list[2]}"
+
+    check_eligibility = Pverify().check_eligibility(
+        insurance_data["insurance_company_name"],
+        insurance_data["insurance_policy_number"],
+        dob,
+        insurance_data["patient_relationship"],
+    )
+    if not check_eligibility["status"]:
+        return {"status": False, "response": check_eligibility["response"]}
+    get_insurance_total = check_eligibility["response"]
+
+    insurance_details_obj = InsuranceDetails.objects.create(
+        user=user,
+        insurance_company_name=insurance_data["insurance_company_name"],
+        insurance_phone_number=insurance_data["insurance_phone_number"],
+        insurance_policy_number=insurance_data["insurance_policy_number"],
+        insurance_group_number=insurance_data["insurance_group_number"],
+        insured_date_of_birth=insured_date_of_birth,
+        patient_relationship=insurance_data["patient_relationship"],
+        self_pay=Decimal(get_insurance_total["amount"]),
+        insurance_coverage=Decimal(get_insurance_total["insurance_coverage"]),
+    )
+    return {"status": True, "response": insurance_details_obj}
@@ -0,0 +1,93 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from authentication.models import User, UserCard
+from authentication.serializers.patient_authentication_serializers import (
+    UserCardSerializer,
+)
+from utility.helpers.async_views import async_api_view
+from utility.helpers.functools import (
+    convert_serializer_errors_from_dict_to_list,
+    convert_to_error_message,
+    convert_to_success_message_with_data,
+)
+from utility.services.card_onboarding import CardOnboarding, card_idempotency_key
+
+
+@async_api_view(["POST"], authenticated=False)
+async def verify_user_card(request):
+    """Async ``PatientAuthenticationViewSet.verify_user_card``."""
+    try:
+        serialized_input = UserCardSerializer(data=request.data)
+        if not serialized_input.is_valid():
+            return JsonResponse(
+                convert_to_error_message(
+                    convert_serializer_errors_from_dict_to_list(serialized_input.errors)
+                ),
+                status=400,
+            )
+
+        user = await User.objects.filter(
+            id=serialized_input.validated_data["user_id"]
+        ).afirst()
+        if user is None:
+            return JsonResponse(convert_to_error_message("User not found"), status=400)
+
+        if await UserCard.objects.filter(user=user).aexists():
+            return JsonResponse(
+                convert_to_error_message("User card already exists"), status=400
+            )
+
+        card_number = serialized_input.validated_data["card_number"]
+        card_expiry_date = serialized_input.validated_data["card_expiry_date"]
+        if len(card_expiry_date.split("/")) != 2:
+            return JsonResponse(
+                convert_to_error_message("Invalid card expiry date"), status=400
+            )
+        exp_month, exp_year = card_expiry_date.split("/")
+
+        card_details = {
+            "card_number": card_number,
+            "exp_month": exp_month,
+            "exp_year": exp_year,
+            "cvc": serialized_input.validated_data["cvc"],
+            "line1": serialized_input.validated_data["billing_address"],
+            "city": serialized_input.validated_data["city"],
+            "state": serialized_input.validated_data["state"],
+            "zip_code": serialized_input.validated_data["zip_code"],
+        }
+        idempotency_key = card_idempotency_key(
+            user.id, "verify", request.headers.get("Idempotency-Key")
+        )
+        # the stripe SDK has no async client, its calls run on the thread pool
+        # so the event loop keeps serving other requests meanwhile
+        register_card = await sync_to_async(
+            CardOnboarding(user, idempotency_key).register_card,
+            thread_sensitive=False,
+        )(**card_details)
+        if not register_card["status"]:
+            return JsonResponse(convert_to_error_message(register_card), status=400)
+
+        payment_method = register_card["data"]["payment_method"]
+        setup_intent = register_card["data"]["setup_intent"]
+        user_card = await UserCard.objects.acreate(
+            user=user,
+            cardholder_name=serialized_input.validated_data["cardholder_name"],
+            last4_digit=card_number[:4],
+            exp_month=exp_month,
+            exp_year=exp_year,
+            card_type=payment_method["card"]["brand"],
+            setup_id=setup_intent["id"],
+            setup_status=setup_intent["status"],
+            payment_method_id=payment_method["id"],
+        )
+
+        return JsonResponse(
+            convert_to_success_message_with_data(
+                "User card verified successfully", UserCardSerializer(user_card).data
+            ),
+            status=200,
+        )
+    except Exception as e:
+        print("error", e)
+        return JsonResponse({"message": [f"{e}"]}, status=400)
@@ -1,11 +1,10 @@
 import datetime
-import uuid
-from decimal import Decimal
 
 from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.core.mail import EmailMessage
+from django.db import transaction
 from django.template.loader import render_to_string
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
@@ -13,29 +12,44 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from authentication.login import (
+    PasswordHashingBusy,
+    last_login_buffer,
+    password_hashing_pool,
+)
 from authentication.models import (
     EmailConfirmation,
     InsuranceDetails,
-    PasswordReset,
+    InsuranceVerificationJob,
     PhoneNumberVerification,
     User,
     UserCard,
 )
+from authentication.otp import (
+    email_otp,
+    get_client_id,
+    password_reset_otp,
+    phone_otp,
+    record_email_confirmation,
+    record_phone_verification,
+)
 from authentication.serializers.patient_authentication_serializers import (
     ChangePasswordSerializer,
     CreatePatientProfileSerializer,
     ForgotPasswordSerializer,
     InsuranceDetailsSerializer,
+    InsuranceVerificationJobSerializer,
     PatientLoginSerializer,
     UserCardSerializer,
 )
+from authentication.tasks import run_insurance_verification_job
+from authentication.tokens import UserRefreshToken
 from authentication.utils import (
-    generate_phone_unique_code,
-    generate_unique_code,
     send_email_verification,
+    verify_and_save_insurance_details,
 )
+from utility.helpers.concurrency import run_concurrently
 from utility.helpers.functools import (
     base64_to_data,
     check_fields_required,
@@ -47,12 +61,11 @@ from utility.helpers.functools import (
     decrypt,
     decrypt_user_data,
     encrypt,
-    generate_unique_id,
     get_specific_user_with_email,
 )
 from utility.helpers.send_sms import send_plain_SMS
+from utility.services.card_onboarding import CardOnboarding, card_idempotency_key
 from utility.services.pverify import Pverify
-from utility.services.stripe import StripeHelper
 
 
 @extend_schema(tags=["Patient authentication endpoints"])
@@ -74,7 +87,7 @@ class PatientAuthenticationViewSet(GenericViewSet):
                     status=status.HTTP_404_NOT_FOUND,
                 )
             user = user.first()
-            token = RefreshToken.for_user(user)
+            token = UserRefreshToken.for_user(user)
             return Response(
                 {
                     "token": str(token.access_token),
@@ -260,11 +273,22 @@ class PatientAuthenticationViewSet(GenericViewSet):
             #         status=status.HTTP_400_BAD_REQUEST,
             #     )
 
-            if not get_user.check_password(password):
+            try:
+                password_is_valid = password_hashing_pool.check_password(
+                    get_user, password
+                )
+            except PasswordHashingBusy as e:
+                return Response(
+                    convert_to_error_message(f"{e}"),
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": "1"},
+                )
+            if not password_is_valid:
                 return Response(
                     convert_to_error_message("Invalid password"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
+            last_login_buffer.record(get_user.id)
 
             # add has card verified
             # if get_user.user_type == "patient":
@@ -278,7 +302,9 @@ class PatientAuthenticationViewSet(GenericViewSet):
 
             user = decrypt_user_data(get_user, request)
 
-            token = RefreshToken.for_user(get_user)
+            token = UserRefreshToken.for_user(
+                get_user, card_verified=user["card_verified"]
+            )
 
             response = {
                 "user": user,
@@ -309,8 +335,7 @@ class PatientAuthenticationViewSet(GenericViewSet):
     def patient_change_password(self, request):
         try:
             #  Get the user object
-            user_id = request.user.id
-            user = User.objects.get(id=user_id)
+            user = request.user.instance
 
             serialized_input = self.get_serializer(data=request.data)
             if not serialized_input.is_valid():
@@ -397,10 +422,7 @@ class PatientAuthenticationViewSet(GenericViewSet):
                 )
             user = get_user["response"]
 
-            token = "{}".format(uuid.uuid4().int >> 90)
-            token = token[:6]
-            PasswordReset.objects.filter(user=user).delete()
-            get = PasswordReset.objects.create(user=user, token=token)
+            token = password_reset_otp.issue(user.id)
 
             # try:
             subject = "Password Reset code"
@@ -421,8 +443,6 @@ class PatientAuthenticationViewSet(GenericViewSet):
             )
             message.content_subtype = "html"
             message.send(fail_silently=True)
-            get.sent = True
-            get.save()
 
             response = {
                 "message": "Password Reset request successful",
@@ -458,23 +478,25 @@ class PatientAuthenticationViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
+            email = serialized_input.validated_data["email"].lower()
             token = serialized_input.validated_data["token"]
             new_password = serialized_input.validated_data["new_password"]
             confirm_password = serialized_input.validated_data["confirm_password"]
 
-            get_record_of_password_reset = PasswordReset.objects.get(token=token)
-
-            # Check if record of password reset has expired
-            if get_record_of_password_reset.check_expire:
-                get_record_of_password_reset.delete()
+            # codes are issued per user id, an unknown email still counts
+            # failed attempts against itself
+            user = User.objects.filter(email=email).first()
+            # expired codes are evicted from the cache, so they are just invalid
+            password_reset = password_reset_otp.verify(
+                token, get_client_id(request), user.id if user else email
+            )
+            if password_reset["throttled"]:
                 return Response(
-                    convert_to_error_message(
-                        "Password reset link has expired, please request a new one"
-                    ),
-                    status=status.HTTP_400_BAD_REQUEST,
+                    convert_to_error_message(password_reset["response"]),
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
                 )
-
-            user = get_record_of_password_reset.user
+            if not password_reset["status"]:
+                return Response(convert_to_error_message("Invalid Token entered"))
 
             if new_password != confirm_password:
                 return Response(
@@ -492,19 +514,17 @@ class PatientAuthenticationViewSet(GenericViewSet):
                     convert_to_error_message(err), status=status.HTTP_400_BAD_REQUEST
                 )
 
+            if not password_reset_otp.consume(token, user.id):
+                return Response(convert_to_error_message("Invalid Token entered"))
+
             user.set_password(new_password)
             user.save()
 
-            get_record_of_password_reset.delete()
-
             return Response(
                 convert_success_message("Password updated successfully"),
                 status=status.HTTP_200_OK,
             )
 
-        except PasswordReset.DoesNotExist:
-            return Response(convert_to_error_message("Invalid Token entered"))
-
         except KeyError as e:
             return Response(
                 convert_to_error_message(f"{e}"), status=status.HTTP_400_BAD_REQUEST
@@ -522,7 +542,7 @@ class PatientAuthenticationViewSet(GenericViewSet):
     )
     def edit_profile(self, request):
         try:
-            logged_in_user = User.objects.get(id=request.user.id)
+            logged_in_user = request.user.instance
 
             if request.data.get("first_name"):
                 logged_in_user.first_name = encrypt(
@@ -604,8 +624,6 @@ class PatientAuthenticationViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            token = generate_unique_code()
-
             # Check if email already verified
             check_email_verification = EmailConfirmation.objects.filter(
                 email=email, is_verified=True
@@ -616,14 +634,10 @@ class PatientAuthenticationViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            EmailConfirmation.objects.filter(email=email).delete()
-            email_confirmation_obj = EmailConfirmation.objects.create(
-                email=email,
-                token=token,
-            )
+            token = email_otp.issue(email)
             send_email_verification(email, token)
-            email_confirmation_obj.sent = True
-            email_confirmation_obj.save()
+            if settings.OTP_AUDIT_ISSUED_CODES:
+                record_email_confirmation(email, token, is_verified=False)
             return Response(
                 convert_success_message("Email verification sent successfully"),
                 status=status.HTTP_200_OK,
@@ -641,29 +655,25 @@ class PatientAuthenticationViewSet(GenericViewSet):
     def confirm_email(self, request):
         try:
             token = request.data["token"]
-            if not token:
+            email = request.data["email"]
+            if not token or not email:
                 return Response(
-                    convert_to_error_message("Token is required"),
+                    convert_to_error_message("Token and email are required"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             # check email confirmation with token
-            confirm_email = EmailConfirmation.objects.filter(token=token)
-            if not confirm_email.exists():
+            confirm_email = email_otp.verify(token, get_client_id(request), email)
+            if confirm_email["throttled"]:
                 return Response(
-                    convert_to_error_message("Invalid Email verification code entered"),
-                    status=status.HTTP_400_BAD_REQUEST,
+                    convert_to_error_message(confirm_email["response"]),
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
                 )
-
-            confirm_email = confirm_email.first()
-
-            # Check if token has expired
-            if confirm_email.check_expire:
+            if not confirm_email["status"] or not email_otp.consume(token, email):
                 return Response(
-                    convert_to_error_message("token expired"),
+                    convert_to_error_message("Invalid Email verification code entered"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            confirm_email.is_verified = True
-            confirm_email.save()
+            record_email_confirmation(email, token, is_verified=True)
 
             return Response(
                 convert_success_message("Email verified successfully"),
@@ -687,8 +697,6 @@ class PatientAuthenticationViewSet(GenericViewSet):
                     convert_to_error_message("Phone number is required"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            token = generate_phone_unique_code()
-
             check_phone_verification = PhoneNumberVerification.objects.filter(
                 phone_number=phone_number,
                 is_verified=True,
@@ -699,17 +707,12 @@ class PatientAuthenticationViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            PhoneNumberVerification.objects.filter(phone_number=phone_number).delete()
-            phone_verification_obj = PhoneNumberVerification.objects.create(
-                id=generate_unique_id(PhoneNumberVerification),
-                phone_number=phone_number,
-                token=token,
-            )
+            token = phone_otp.issue(phone_number)
             message_text = f"Your Dinma confirmation code is {token}"
             new_message = send_plain_SMS(phone_number, message_text)
             print(new_message)
-            phone_verification_obj.sent = True
-            phone_verification_obj.save()
+            if settings.OTP_AUDIT_ISSUED_CODES:
+                record_phone_verification(phone_number, token, is_verified=False)
             return Response(
                 convert_success_message("Phone number verification sent successfully"),
                 status=status.HTTP_200_OK,
@@ -727,31 +730,29 @@ class PatientAuthenticationViewSet(GenericViewSet):
     def confirm_phone_number_verification(self, request):
         try:
             token = request.data["token"]
-            if not token:
+            phone_number = request.data["phone_number"]
+            if not token or not phone_number:
                 return Response(
-                    convert_to_error_message("Token is required"),
+                    convert_to_error_message("Token and phone number are required"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            # check email confirmation with token
-            confirm_phone_verification = PhoneNumberVerification.objects.filter(
-                token=token
+            # check phone verification with token
+            confirm_phone_verification = phone_otp.verify(
+                token, get_client_id(request), phone_number
             )
-            if not confirm_phone_verification.exists():
+            if confirm_phone_verification["throttled"]:
                 return Response(
-                    convert_to_error_message("Invalid Phone verification code entered"),
-                    status=status.HTTP_400_BAD_REQUEST,
+                    convert_to_error_message(confirm_phone_verification["response"]),
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
                 )
-
-            confirm_phone_verification = confirm_phone_verification.first()
-
-            # Check if token has expired
-            if confirm_phone_verification.check_expire:
+            if not confirm_phone_verification["status"] or not phone_otp.consume(
+                token, phone_number
+            ):
                 return Response(
-                    convert_to_error_message("token expired"),
+                    convert_to_error_message("Invalid Phone verification code entered"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            confirm_phone_verification.is_verified = True
-            confirm_phone_verification.save()
+            record_phone_verification(phone_number, token, is_verified=True)
 
             return Response(
                 convert_success_message("Phone number verified successfully"),
@@ -785,89 +786,111 @@ class PatientAuthenticationViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             user_id = serialized_input.validated_data["user_id"]
-            user = User.objects.filter(id=user_id)
-            if not user.exists():
+            # the pVerify token is fetched into the shared cache while the
+            # request is validated, instead of after it
+            user, check_insurance_details_exists, _ = run_concurrently(
+                User.objects.filter(id=user_id).first,
+                InsuranceDetails.objects.filter(user_id=user_id).exists,
+                Pverify().generate_token,
+            )
+            if user is None:
                 return Response(
                     convert_to_error_message("User not found"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            user = user.first()
 
-            check_insurance_details_exists = InsuranceDetails.objects.filter(
-                user=user
-            ).exists()
             if check_insurance_details_exists:
                 return Response(
                     convert_to_error_message("User already has Insurance verified"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            insurance_company_name = serialized_input.validated_data[
-                "insurance_company_name"
-            ]
-            insurance_phone_number = serialized_input.validated_data[
-                "insurance_phone_number"
-            ]
-            insurance_policy_number = serialized_input.validated_data[
-                "insurance_policy_number"
-            ]
-            insurance_group_number = serialized_input.validated_data[
-                "insurance_group_number"
-            ]
-            insured_date_of_birth = serialized_input.validated_data[
-                "insured_date_of_birth"
-            ]
-            patient_relationship = serialized_input.validated_data[
-                "patient_relationship"
-            ]
+            insurance_data = {
+                "insurance_company_name": serialized_input.validated_data[
+                    "insurance_company_name"
+                ],
+                "insurance_phone_number": serialized_input.validated_data[
+                    "insurance_phone_number"
+                ],
+                "insurance_policy_number": serialized_input.validated_data[
+                    "insurance_policy_number"
+                ],
+                "insurance_group_number": serialized_input.validated_data[
+                    "insurance_group_number"
+                ],
+                "insured_date_of_birth": serialized_input.validated_data[
+                    "insured_date_of_birth"
+                ],
+                "patient_relationship": serialized_input.validated_data[
+                    "patient_relationship"
+                ],
+            }
 
-            dob_list = insured_date_of_birth.split("/")
-            if len(dob_list) != 3:
+            if len(insurance_data["insured_date_of_birth"].split("/")) != 3:
                 return Response(
                     convert_to_error_message("Invalid date of birth"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            dob = f"{dob_list[1]}/{dob_list[0]}/{dob_list[2]}"
-
-            insurance_obj = Pverify().verify_insurance(
-                insurance_company_name,
-                insurance_policy_number,
-                dob,
-                patient_relationship,
-            )
-
-            if not insurance_obj["status"]:
+            # async mode: hand the pVerify round-trips to a celery worker
+            if request.query_params.get("async", "").lower() in ["true", "1"]:
+                verification_job = InsuranceVerificationJob.objects.filter(
+                    user=user, status__in=["queued", "running"]
+                ).first()
+                if not verification_job:
+                    verification_job = InsuranceVerificationJob.objects.create(
+                        user=user, **insurance_data
+                    )
+                    job_id = str(verification_job.id)
+                    transaction.on_commit(
+                        lambda: run_insurance_verification_job.delay(job_id)
+                    )
                 return Response(
-                    convert_to_error_message(insurance_obj["response"]),
-                    status=status.HTTP_400_BAD_REQUEST,
+                    convert_to_success_message_serialized_data(
+                        InsuranceVerificationJobSerializer(verification_job).data
+                    ),
+                    status=status.HTTP_202_ACCEPTED,
                 )
 
-            get_insurance_total = Pverify().complete_insurance_verification(
-                insurance_obj["response"], patient_relationship
-            )
-            if get_insurance_total["status"] == "failure":
+            verify_insurance = verify_and_save_insurance_details(user, insurance_data)
+            if not verify_insurance["status"]:
                 return Response(
-                    convert_to_error_message(get_insurance_total["response"]),
+                    convert_to_error_message(verify_insurance["response"]),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
+            insurance_details_obj = verify_insurance["response"]
 
-            insurance_coverage = Decimal(get_insurance_total["insurance_coverage"])
-            self_pay = Decimal(get_insurance_total["amount"])
-
-            insurance_details_obj = InsuranceDetails.objects.create(
-                user=user,
-                insurance_company_name=insurance_company_name,
-                insurance_phone_number=insurance_phone_number,
-                insurance_policy_number=insurance_policy_number,
-                insurance_group_number=insurance_group_number,
-                insured_date_of_birth=insured_date_of_birth,
-                patient_relationship=patient_relationship,
-                self_pay=self_pay,
-                insurance_coverage=insurance_coverage,
+            response = self.get_serializer(insurance_details_obj)
+            return Response(
+                convert_to_success_message_serialized_data(response.data),
+                status=status.HTTP_200_OK,
             )
+        except Exception as e:
+            print("error", e)
+            return Response({"message": [f"{e}"]}, status=status.HTTP_400_BAD_REQUEST)
 
-            response = self.get_serializer(insurance_details_obj)
+    @action(
+        methods=["GET"],
+        detail=True,
+        serializer_class=InsuranceVerificationJobSerializer,
+        permission_classes=[IsAuthenticated],
+    )
+    def insurance_verification_status(self, request, *args, **kwargs):
+        try:
+            job_id = kwargs.get("pk")
+            # eligibility details are only shown to the patient they belong to,
+            # other users' jobs are reported as not found
+            verification_job = InsuranceVerificationJob.objects.select_related(
+                "insurance_details"
+            ).filter(id=job_id, user_id=request.user.id)
+            if not verification_job.exists():
+                return Response(
+                    convert_to_error_message("Insurance verification job not found"),
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            verification_job = verification_job.first()
+
+            response = self.get_serializer(verification_job)
             return Response(
                 convert_to_success_message_serialized_data(response.data),
                 status=status.HTTP_200_OK,
@@ -1003,79 +1026,30 @@ class PatientAuthenticationViewSet(GenericViewSet):
             exp_month = card_expiry_date.split("/")[0]
             exp_year = card_expiry_date.split("/")[1]
 
-            upload_stripe_payment_method = StripeHelper().create_payment_method(
-                card_number=card_number,
-                cvc=cvc,
-                city=city,
-                state=state,
-                line1=billing_address,
-                zip_code=zip_code,
-                exp_month=exp_month,
-                exp_year=exp_year,
+            card_details = {
+                "card_number": card_number,
+                "exp_month": exp_month,
+                "exp_year": exp_year,
+                "cvc": cvc,
+                "line1": billing_address,
+                "city": city,
+                "state": state,
+                "zip_code": zip_code,
+            }
+            idempotency_key = card_idempotency_key(
+                user.id, "verify", request.headers.get("Idempotency-Key")
             )
-            if not upload_stripe_payment_method["status"]:
-                return Response(
-                    convert_to_error_message(upload_stripe_payment_method),
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            upload_stripe_payment_method_id = upload_stripe_payment_method["data"]["id"]
-
-            check_customer_exists = StripeHelper().retrieve_customer(user.id)
-
-            if check_customer_exists["status"]:
-                print("Customer exists")
-            else:
-                first_name = decrypt(user.first_name)
-                last_name = decrypt(user.last_name)
-
-                create_customer = StripeHelper().create_customer(
-                    customer_id=user.id,
-                    name=f"{first_name} {last_name}",
-                    email=user.email,
-                    payment_method=upload_stripe_payment_method_id,
-                )
-                print(create_customer)
-                if not create_customer["status"]:
-                    return Response(
-                        convert_to_error_message(create_customer),
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-                print(create_customer)
-                # customer_id = create_customer["data"]["id"]
-
-            setup_intent = StripeHelper().setup_intent(
-                customer_id=user.id,
-                pm_id=upload_stripe_payment_method_id,
+            register_card = CardOnboarding(user, idempotency_key).register_card(
+                **card_details
             )
-
-            if not setup_intent["status"]:
+            if not register_card["status"]:
                 return Response(
-                    convert_to_error_message(setup_intent),
+                    convert_to_error_message(register_card),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            setup_intent_id = setup_intent["data"]["id"]
 
-            confirm_setup_intent = StripeHelper().confirm_setup_intent(
-                setup_intent_id, pm_id=upload_stripe_payment_method_id
-            )
-
-            if not confirm_setup_intent["status"]:
-                return Response(
-                    convert_to_error_message(confirm_setup_intent),
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            attach_payment_method = StripeHelper().attach_payment_method(
-                pm_id=upload_stripe_payment_method_id,
-                customer_id=user.id,
-            )
-
-            if not attach_payment_method["status"]:
-                return Response(
-                    convert_to_error_message(attach_payment_method),
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            payment_method = register_card["data"]["payment_method"]
+            setup_intent = register_card["data"]["setup_intent"]
 
             create_new_card_record = UserCard.objects.create(
                 user=user,
@@ -1083,9 +1057,10 @@ class PatientAuthenticationViewSet(GenericViewSet):
                 last4_digit=card_number[:4],
                 exp_month=exp_month,
                 exp_year=exp_year,
-                card_type=upload_stripe_payment_method["data"]["card"]["brand"],
-                setup_id=setup_intent_id,
-                payment_method_id=upload_stripe_payment_method_id,
+                card_type=payment_method["card"]["brand"],
+                setup_id=setup_intent["id"],
+                setup_status=setup_intent["status"],
+                payment_method_id=payment_method["id"],
             )
 
             output_data = self.get_serializer(create_new_card_record)
@@ -1102,8 +1077,7 @@ class PatientAuthenticationViewSet(GenericViewSet):
     @action(methods=["PUT"], detail=False, serializer_class=UserCardSerializer)
     def update_user_card(self, request):
         try:
-            user = request.user
-            user = User.objects.get(id=request.user.id)
+            user = request.user.instance
             # add user_id to to the request
             request.data["user_id"] = user.id
 
@@ -1143,79 +1117,30 @@ class PatientAuthenticationViewSet(GenericViewSet):
             exp_month = card_expiry_date.split("/")[0]
             exp_year = card_expiry_date.split("/")[1]
 
-            upload_stripe_payment_method = StripeHelper().create_payment_method(
-                card_number=card_number,
-                cvc=cvc,
-                city=city,
-                state=state,
-                line1=billing_address,
-                zip_code=zip_code,
-                exp_month=exp_month,
-                exp_year=exp_year,
-            )
-            if not upload_stripe_payment_method["status"]:
-                return Response(
-                    convert_to_error_message(upload_stripe_payment_method),
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            upload_stripe_payment_method_id = upload_stripe_payment_method["data"]["id"]
-
-            check_customer_exists = StripeHelper().retrieve_customer(user.id)
-
-            if check_customer_exists["status"]:
-                print("Customer exists")
-            else:
-                first_name = decrypt(user.first_name)
-                last_name = decrypt(user.last_name)
-
-                create_customer = StripeHelper().create_customer(
-                    customer_id=user.id,
-                    name=f"{first_name} {last_name}",
-                    email=user.email,
-                    payment_method=upload_stripe_payment_method_id,
-                )
-                print(create_customer)
-                if not create_customer["status"]:
-                    return Response(
-                        convert_to_error_message(create_customer),
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-                print(create_customer)
-                # customer_id = create_customer["data"]["id"]
-
-            setup_intent = StripeHelper().setup_intent(
-                customer_id=user.id,
-                pm_id=upload_stripe_payment_method_id,
+            card_details = {
+                "card_number": card_number,
+                "exp_month": exp_month,
+                "exp_year": exp_year,
+                "cvc": cvc,
+                "line1": billing_address,
+                "city": city,
+                "state": state,
+                "zip_code": zip_code,
+            }
+            idempotency_key = card_idempotency_key(
+                user.id, "update", request.headers.get("Idempotency-Key")
             )
-
-            if not setup_intent["status"]:
-                return Response(
-                    convert_to_error_message(setup_intent),
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            setup_intent_id = setup_intent["data"]["id"]
-
-            confirm_setup_intent = StripeHelper().confirm_setup_intent(
-                setup_intent_id, pm_id=upload_stripe_payment_method_id
+            register_card = CardOnboarding(user, idempotency_key).register_card(
+                **card_details
             )
-
-            if not confirm_setup_intent["status"]:
+            if not register_card["status"]:
                 return Response(
-                    convert_to_error_message(confirm_setup_intent),
+                    convert_to_error_message(register_card),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            attach_payment_method = StripeHelper().attach_payment_method(
-                pm_id=upload_stripe_payment_method_id,
-                customer_id=user.id,
-            )
-
-            if not attach_payment_method["status"]:
-                return Response(
-                    convert_to_error_message(attach_payment_method),
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            payment_method = register_card["data"]["payment_method"]
+            setup_intent = register_card["data"]["setup_intent"]
             print("got here")
             update_user_card = UserCard.objects.filter(user=user)
             update_user_card = update_user_card.first()
@@ -1224,11 +1149,10 @@ class PatientAuthenticationViewSet(GenericViewSet):
             update_user_card.last4_digit = card_number[:4]
             update_user_card.exp_month = exp_month
             update_user_card.exp_year = exp_year
-            update_user_card.card_type = upload_stripe_payment_method["data"]["card"][
-                "brand"
-            ]
-            update_user_card.setup_id = setup_intent_id
-            update_user_card.payment_method_id = upload_stripe_payment_method_id
+            update_user_card.card_type = payment_method["card"]["brand"]
+            update_user_card.setup_id = setup_intent["id"]
+            update_user_card.setup_status = setup_intent["status"]
+            update_user_card.payment_method_id = payment_method["id"]
 
             update_user_card.save()
 
@@ -1257,8 +1181,7 @@ class PatientAuthenticationViewSet(GenericViewSet):
     @action(methods=["GET"], detail=False, serializer_class=UserCardSerializer)
     def get_user_card(self, request):
         try:
-            user = User.objects.get(id=request.user.id)
-            user_card = UserCard.objects.filter(user=user)
+            user_card = UserCard.objects.filter(user_id=request.user.id)
             if not user_card.exists():
                 return Response(
                     convert_to_error_message("User card not found"),
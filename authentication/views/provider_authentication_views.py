@@ -1,7 +1,9 @@
 import datetime
 
+from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status
 from rest_framework.decorators import action
@@ -26,6 +28,14 @@ from authentication.serializers.provider_authentication_serializers import (
 )
 from authentication.utils import start_schedule_background_tasks
 from booking.models import GeneralBookingDetails, UserBookingDetails
+from utility.db.replicas import read_from_replica
+from utility.helpers.etags import (
+    DIRECTORY_SCOPE,
+    availability_scope,
+    bump_versions,
+    cached_response,
+    conditional_get,
+)
 from utility.helpers.functools import (
     base64_to_data,
     convert_serializer_errors_from_dict_to_list,
@@ -47,7 +57,7 @@ class PractionerViewSet(GenericViewSet):
     serializer_class = OnboardPractionerSerializer
 
     def get_queryset(self):
-        return User.objects.get(id=self.request.user.id)
+        return self.request.user.instance
 
     @action(
         methods=["POST"],
@@ -126,22 +136,15 @@ class PractionerViewSet(GenericViewSet):
             if request.data.get("photo"):
                 new_user.photo = base64_to_data(request.data.get("photo"))
 
-            if serialized_input.validated_data.get("referral_code"):
-                referral_code = serialized_input.validated_data["referral_code"]
-                from_user = User.objects.filter(username=referral_code)
-
-                if not from_user.exists():
+            referral_code = serialized_input.validated_data.get("referral_code")
+            from_user = None
+            if referral_code:
+                from_user = User.objects.filter(username=referral_code).first()
+                if from_user is None:
                     return Response(
                         {convert_to_error_message("Invalid referral code")},
                         status=status.HTTP_400_BAD_REQUEST,
                     )
-                else:
-                    Referral.objects.create(
-                        from_user=from_user.first(),
-                        to_user=new_user,
-                        type="practitioner",
-                        reference_code=referral_code,
-                    )
 
             age_range = serialized_input.validated_data["age_range"].capitalize()
             if age_range not in ["Pediatrics", "Adult", "Both"]:
@@ -152,20 +155,6 @@ class PractionerViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            new_user.set_password(password)
-            new_user.save()
-
-            new_provider_qualification = ProviderQualification.objects.create(
-                user=new_user,
-                practioner_type=serialized_input.validated_data["practioner_type"],
-                credential_title=serialized_input.validated_data["credential_title"],
-                speciality=serialized_input.validated_data["speciality"],
-                NPI=serialized_input.validated_data["NPI"],
-                CAQH=serialized_input.validated_data["CAQH"],
-                licensed_states=serialized_input.validated_data["licensed_states"],
-            )
-            new_provider_qualification.save()
-
             if age_range == "Pediatrics":
                 maximum_age = 18
                 minimum_age = 0
@@ -175,25 +164,48 @@ class PractionerViewSet(GenericViewSet):
             else:
                 maximum_age = 100
                 minimum_age = 0
-            new_provider_criteria = PractitionerPracticeCriteria.objects.create(
-                user=new_user,
-                practice_name=serialized_input.validated_data["practice_name"],
-                max_distance=serialized_input.validated_data["max_distance"],
-                preferred_zip_codes=serialized_input.validated_data[
-                    "preferred_zip_codes"
-                ],
-                available_days=serialized_input.validated_data["available_days"],
-                age_range=serialized_input.validated_data["age_range"],
-                minimum_age=minimum_age,
-                maximum_age=maximum_age,
-            )
 
-            new_provider_criteria.save()
+            with transaction.atomic():
+                new_user.set_password(password)
+                new_user.save()
 
-            start_schedule_background_tasks(
-                days_and_time=serialized_input.validated_data["available_days"],
-                provider_criteria=new_provider_criteria,
-            )
+                if from_user:
+                    Referral.objects.create(
+                        from_user=from_user,
+                        to_user=new_user,
+                        type="practitioner",
+                        reference_code=referral_code,
+                    )
+
+                ProviderQualification.objects.create(
+                    user=new_user,
+                    practioner_type=serialized_input.validated_data["practioner_type"],
+                    credential_title=serialized_input.validated_data[
+                        "credential_title"
+                    ],
+                    speciality=serialized_input.validated_data["speciality"],
+                    NPI=serialized_input.validated_data["NPI"],
+                    CAQH=serialized_input.validated_data["CAQH"],
+                    licensed_states=serialized_input.validated_data["licensed_states"],
+                )
+
+                new_provider_criteria = PractitionerPracticeCriteria.objects.create(
+                    user=new_user,
+                    practice_name=serialized_input.validated_data["practice_name"],
+                    max_distance=serialized_input.validated_data["max_distance"],
+                    preferred_zip_codes=serialized_input.validated_data[
+                        "preferred_zip_codes"
+                    ],
+                    available_days=serialized_input.validated_data["available_days"],
+                    age_range=serialized_input.validated_data["age_range"],
+                    minimum_age=minimum_age,
+                    maximum_age=maximum_age,
+                )
+
+                start_schedule_background_tasks(
+                    days_and_time=serialized_input.validated_data["available_days"],
+                    provider_criteria=new_provider_criteria,
+                )
 
             output_response = decrypt_user_data(new_user, request)
 
@@ -217,6 +229,15 @@ class PractionerViewSet(GenericViewSet):
         permission_classes=[AllowAny],
         serializer_class=SimpleDecryptedProviderDetails,
     )
+    # listings include the future available days, so they also age hourly
+    @conditional_get(lambda request: [DIRECTORY_SCOPE], vary_every=3600)
+    @cached_response(
+        lambda request: [DIRECTORY_SCOPE],
+        timeout=settings.PROVIDER_DIRECTORY_CACHE_TIMEOUT,
+        query_params=("page", "limit"),
+        vary_every=3600,
+    )
+    @read_from_replica
     def get_all_health_providers(self, request):
         try:
             all_providers = User.objects.filter(
@@ -261,21 +282,21 @@ class PractionerViewSet(GenericViewSet):
                 )
             practice_criteria = PractitionerPracticeCriteria.objects.get(user=user)
 
-            practice_criteria.available_days = []
-            practice_criteria.save()
-
-            PractitionerAvailableDateTime.objects.filter(
-                provider_criteria=practice_criteria
-            ).delete()
+            # the old schedule is replaced as a whole or not at all
+            with transaction.atomic():
+                PractitionerAvailableDateTime.objects.filter(
+                    provider_criteria=practice_criteria
+                ).delete()
 
-            start_schedule_background_tasks(
-                days_and_time=serialized_input.validated_data["available_days"],
-                provider_criteria=practice_criteria,
-            )
-            practice_criteria.available_days = serialized_input.validated_data[
-                "available_days"
-            ]
-            practice_criteria.save()
+                start_schedule_background_tasks(
+                    days_and_time=serialized_input.validated_data["available_days"],
+                    provider_criteria=practice_criteria,
+                )
+                practice_criteria.available_days = serialized_input.validated_data[
+                    "available_days"
+                ]
+                practice_criteria.save()
+            bump_versions(availability_scope(user.id))
 
             output_response = SimpleDecryptedProviderDetails(user).data
 
@@ -295,15 +316,18 @@ class PractionerViewSet(GenericViewSet):
         url_name="Get available dates",
         permission_classes=[AllowAny],
     )
+    @conditional_get(lambda request: [availability_scope(request.user.id)])
+    @read_from_replica
     def get_available_days(self, request):
         try:
-            user = self.get_queryset()
-            if user.user_type != "health_provider":
+            if request.user.user_type != "health_provider":
                 return Response(
                     convert_to_error_message("Not authorized"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            practice_criteria = PractitionerPracticeCriteria.objects.get(user=user)
+            practice_criteria = PractitionerPracticeCriteria.objects.get(
+                user_id=request.user.id
+            )
             get_user_available_date_time = (
                 PractitionerAvailableDateTime.objects.filter(
                     provider_criteria=practice_criteria,
@@ -335,6 +359,7 @@ class PractionerViewSet(GenericViewSet):
     @action(
         methods=["GET"], detail=False, serializer_class=SimpleDecryptedProviderDetails
     )
+    @read_from_replica
     def get_health_provider_details(self, request):
         try:
             if request.query_params.get("email"):
@@ -361,11 +386,11 @@ class PractionerViewSet(GenericViewSet):
             )
 
     @action(methods=["GET"], detail=False)
+    @read_from_replica
     def get_total_earnings(self, request):
         try:
-            user = self.get_queryset()
             total_successful_bookings = UserBookingDetails.objects.filter(
-                practitioner=user, status="succeeded"
+                practitioner_id=request.user.id, status="succeeded"
             )
             price_per_consultation = (
                 GeneralBookingDetails.objects.first().price_per_consultation
@@ -389,13 +414,14 @@ class PractionerViewSet(GenericViewSet):
             )
 
     @action(methods=["GET"], detail=False)
+    @read_from_replica
     def get_monthly_earnings(self, request):
         try:
             months = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
             monthly_earnings = []
             for month in months:
                 total_successful_bookings = UserBookingDetails.objects.filter(
-                    practitioner=self.get_queryset(),
+                    practitioner_id=request.user.id,
                     status="succeeded",
                     created_at__month=month,
                 )
@@ -556,9 +582,10 @@ class PractionerViewSet(GenericViewSet):
                         "preferred_zip_codes"
                     )
 
-            logged_in_user.save()
-            provider_qualification.save()
-            provider_criteria.save()
+            with transaction.atomic():
+                logged_in_user.save()
+                provider_qualification.save()
+                provider_criteria.save()
 
             response_data = SimpleDecryptedProviderDetails(logged_in_user)
             return Response(
@@ -622,8 +649,7 @@ class PractionerViewSet(GenericViewSet):
     )
     def update_account_details(self, request):
         try:
-            logged_in_user = self.get_queryset()
-            if logged_in_user.user_type != "health_provider":
+            if request.user.user_type != "health_provider":
                 return Response(
                     convert_to_error_message(
                         "You are not allowed to save account details"
@@ -631,7 +657,7 @@ class PractionerViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            request.data["user_id"] = str(logged_in_user.id)
+            request.data["user_id"] = str(request.user.id)
 
             serialized_input = self.get_serializer(data=request.data)
             if not serialized_input.is_valid():
@@ -658,8 +684,7 @@ class PractionerViewSet(GenericViewSet):
     )
     def get_account_details(self, request):
         try:
-            logged_in_user = self.get_queryset()
-            if logged_in_user.user_type != "health_provider":
+            if request.user.user_type != "health_provider":
                 return Response(
                     convert_to_error_message(
                         "You are not allowed to save account details"
@@ -667,7 +692,9 @@ class PractionerViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            get_account_details = UserAccountDetails.objects.filter(user=logged_in_user)
+            get_account_details = UserAccountDetails.objects.filter(
+                user_id=request.user.id
+            )
             if not get_account_details.exists():
                 return Response(
                     convert_to_success_message_with_data(
@@ -1,7 +1,11 @@
 from django.contrib import admin
 
 from .models import (
+    BookingPayment,
+    BookingStatusTransition,
     GeneralBookingDetails,
+    ProviderPayout,
+    StripeWebhookEvent,
     UserBookingDetails,
     UserBookingRequestTimeFrame,
 )
@@ -22,6 +26,22 @@ class UserBookingDetailsAdmin(admin.ModelAdmin):
         "updated_at",
     ]
     search_fields = ["patient__email", "practitioner__email", "id"]
+    list_filter = ["status"]
+
+
+@admin.register(BookingStatusTransition)
+class BookingStatusTransitionAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "booking",
+        "event",
+        "from_status",
+        "to_status",
+        "actor",
+        "created_at",
+    ]
+    search_fields = ["booking__id", "actor__email"]
+    list_filter = ["event", "to_status"]
 
 
 @admin.register(GeneralBookingDetails)
@@ -42,3 +62,51 @@ class UserBookingRequestTimeFrameAdmin(admin.ModelAdmin):
         "updated_at",
     ]
     search_fields = ["booking__patient__email", "booking__practitioner__email"]
+
+
+@admin.register(BookingPayment)
+class BookingPaymentAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "booking",
+        "amount",
+        "currency",
+        "status",
+        "payment_intent_id",
+        "payout",
+        "created_at",
+        "updated_at",
+    ]
+    search_fields = ["booking__id", "booking__patient__email", "payment_intent_id"]
+
+
+@admin.register(StripeWebhookEvent)
+class StripeWebhookEventAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "event_id",
+        "event_type",
+        "object_id",
+        "partition",
+        "processed_at",
+        "attempts",
+        "created_at",
+    ]
+    search_fields = ["event_id", "event_type", "object_id"]
+
+
+@admin.register(ProviderPayout)
+class ProviderPayoutAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "provider",
+        "amount",
+        "currency",
+        "booking_count",
+        "period_end",
+        "status",
+        "transfer_id",
+        "paid_at",
+        "created_at",
+    ]
+    search_fields = ["provider__email", "transfer_id"]
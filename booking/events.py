@@ -0,0 +1,167 @@
+import asyncio
+import json
+import select
+import threading
+import time
+
+import psycopg2
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+BOOKING_EVENTS_CHANNEL = "booking_events"
+
+# sent when events may have been missed, clients refetch their bookings
+RESYNC_EVENT = {"event": "resync"}
+
+
+def events_backend() -> str:
+    # LISTEN/NOTIFY needs postgres, other databases only get the local backend
+    if settings.BOOKING_EVENTS_BACKEND:
+        return settings.BOOKING_EVENTS_BACKEND
+    return "postgres" if connections["default"].vendor == "postgresql" else "local"
+
+
+class BookingEventHub:
+    """
+    Fans booking events out to the event streams open in this process.
+
+    Each stream reads from its own bounded queue. A stream that falls behind
+    has its queue replaced by a single resync event instead of blocking the
+    publisher.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(f"{user_id}", set()).add(
+                (asyncio.get_running_loop(), queue)
+            )
+        if events_backend() == "postgres":
+            booking_event_listener.ensure_started()
+        return queue
+
+    def unsubscribe(self, user_id, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(f"{user_id}", set())
+            subscribers.difference_update(
+                {entry for entry in subscribers if entry[1] is queue}
+            )
+            if not subscribers:
+                self._subscribers.pop(f"{user_id}", None)
+
+    def dispatch(self, event: dict, user_ids=None):
+        """Delivers to the given users, or to everyone when ``user_ids`` is None."""
+        with self._lock:
+            if user_ids is None:
+                targets = [e for entries in self._subscribers.values() for e in entries]
+            else:
+                targets = [
+                    entry
+                    for user_id in user_ids
+                    for entry in self._subscribers.get(f"{user_id}", ())
+                ]
+        for loop, queue in targets:
+            # queues are not thread safe, hand the event to the stream's loop
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: dict):
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            event = RESYNC_EVENT
+        queue.put_nowait(event)
+
+
+class BookingEventListener:
+    """
+    LISTENs on the booking events channel from a background thread on its own
+    connection and dispatches what arrives to the hub. Started by the first
+    stream of the process.
+    """
+
+    def __init__(self, hub: BookingEventHub):
+        self.hub = hub
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="booking-event-listener", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        conn_params = connections["default"].get_connection_params()
+        while True:
+            try:
+                self._listen(conn_params)
+            except Exception as e:
+                print(f"booking event listener error {e}")
+            # anything sent while the connection was down is lost
+            self.hub.dispatch(RESYNC_EVENT)
+            time.sleep(5)
+
+    def _listen(self, conn_params: dict):
+        listen_connection = psycopg2.connect(**conn_params)
+        try:
+            listen_connection.autocommit = True
+            with listen_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {BOOKING_EVENTS_CHANNEL}")
+            while True:
+                if not select.select([listen_connection], [], [], 30)[0]:
+                    continue
+                listen_connection.poll()
+                while listen_connection.notifies:
+                    notify = listen_connection.notifies.pop(0)
+                    message = json.loads(notify.payload)
+                    self.hub.dispatch(message["event"], message["user_ids"])
+        finally:
+            listen_connection.close()
+
+
+booking_event_hub = BookingEventHub(queue_size=settings.BOOKING_EVENTS_QUEUE_SIZE)
+booking_event_listener = BookingEventListener(booking_event_hub)
+
+
+def publish_booking_event(booking, event: str, from_status: str):
+    """
+    Sends a booking change to the streams of its patient and practitioner
+    once the current transaction commits.
+    """
+    message = {
+        "event": {
+            "event": event,
+            "booking_id": f"{booking.id}",
+            "from_status": from_status,
+            "status": booking.status,
+        },
+        "user_ids": [
+            f"{user_id}"
+            for user_id in (booking.patient_id, booking.practitioner_id)
+            if user_id
+        ],
+    }
+    transaction.on_commit(lambda: _send(message))
+
+
+def _send(message: dict):
+    try:
+        if events_backend() == "postgres":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_notify(%s, %s)",
+                    [BOOKING_EVENTS_CHANNEL, json.dumps(message)],
+                )
+        else:
+            booking_event_hub.dispatch(message["event"], message["user_ids"])
+    except Exception as e:
+        # streams resync on reconnect, a lost event must not fail the request
+        print(f"booking event publish error {e}")
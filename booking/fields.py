@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils.functional import cached_property
+
+# stored codes, never renumber an existing status
+BOOKING_STATUS_CODES = {
+    "requested": 1,
+    "pending": 2,
+    "accepted": 3,
+    "rejected": 4,
+    "failed": 5,
+    "succeeded": 6,
+    "cancelled": 7,
+}
+BOOKING_STATUS_NAMES = {code: name for name, code in BOOKING_STATUS_CODES.items()}
+
+
+class BookingStatusField(models.PositiveSmallIntegerField):
+    """
+    Booking status stored as a small integer code. Python code, filters and
+    the API keep using the status names, e.g. ``filter(status="pending")``.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if value is None or value in BOOKING_STATUS_CODES:
+            return value
+        try:
+            return BOOKING_STATUS_NAMES[int(value)]
+        except (KeyError, TypeError, ValueError):
+            return value
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, int):
+            return value
+        if value not in BOOKING_STATUS_CODES:
+            raise ValueError(f"Invalid booking status {value}")
+        return BOOKING_STATUS_CODES[value]
+
+    @cached_property
+    def validators(self):
+        # the integer range validators do not apply to status names
+        return [*self.default_validators, *self._validators]
@@ -1,49 +1,71 @@
-import uuid
+import asyncio
 
 from django.db.models import Q
 
 from authentication.models import PractitionerPracticeCriteria
+from utility.helpers.concurrency import Call, run_concurrently
 from utility.services.zipcodeapi import ZipCodeApi
 
-from .models import UserBookingDetails
 
+def available_practitioner_criteria(age, day_care_is_needed):
+    return (
+        PractitionerPracticeCriteria.objects.select_related("user")
+        .filter(Q(minimum_age__lte=age) & Q(maximum_age__gte=age))
+        .filter(available_date_time__available_date_time__date=day_care_is_needed)
+        .distinct()
+    )
 
-def recommend_providers(age, zipcode, day_care_is_needed):
-    try:
-        recommended_providers = []
-        practitioner_criteria = PractitionerPracticeCriteria.objects.select_related(
-            "user"
-        ).filter(Q(minimum_age__lte=age) & Q(maximum_age__gte=age))
 
-        practitioner_criteria = practitioner_criteria.filter(
-            available_date_time__available_date_time__date=day_care_is_needed
-        ).distinct()
+def providers_near(practitioner_criteria, zipcodes):
+    zipcodes = set(zipcodes)
+    return [
+        criteria.user
+        for criteria in practitioner_criteria
+        if zipcodes.intersection(criteria.preferred_zip_codes or [])
+    ]
+
 
-        zipcodes = ZipCodeApi().get_close_zip_codes(zipcode)
+def recommend_providers(age, zipcode, day_care_is_needed):
+    try:
+        # the zip code lookup does not depend on the candidates, both run at
+        # once and the zip code filter is applied to the fetched candidates
+        practitioner_criteria, zipcodes = run_concurrently(
+            Call(list, available_practitioner_criteria(age, day_care_is_needed)),
+            Call(ZipCodeApi().get_close_zip_codes, zipcode),
+        )
         if not zipcodes["status"]:
             return {"status": False, "message": zipcodes["response"]}
-        zipcodes = zipcodes["response"]
 
-        practitioner_criteria = practitioner_criteria.filter(
-            preferred_zip_codes__overlap=zipcodes
+        recommended_providers = providers_near(
+            practitioner_criteria, zipcodes["response"]
         )
+        return {"status": True, "message": recommended_providers}
+    except Exception as err:
+        print(f"recommend_providers error {err}")
+        return {"status": False, "message": f"{err}"}
 
-        for criteria in practitioner_criteria:
-            recommended_providers.append(criteria.user)
 
-        if len(recommended_providers) == 0:
-            return {"status": True, "message": []}
+async def arecommend_providers(age, zipcode, day_care_is_needed):
+    try:
+
+        async def fetch_candidates():
+            return [
+                criteria
+                async for criteria in available_practitioner_criteria(
+                    age, day_care_is_needed
+                )
+            ]
 
+        practitioner_criteria, zipcodes = await asyncio.gather(
+            fetch_candidates(), ZipCodeApi().aget_close_zip_codes(zipcode)
+        )
+        if not zipcodes["status"]:
+            return {"status": False, "message": zipcodes["response"]}
+
+        recommended_providers = providers_near(
+            practitioner_criteria, zipcodes["response"]
+        )
         return {"status": True, "message": recommended_providers}
     except Exception as err:
         print(f"recommend_providers error {err}")
         return {"status": False, "message": f"{err}"}
-
-
-def generate_unique_id():
-    code = uuid.uuid4()
-    exists = UserBookingDetails.objects.filter(id=code).exists()
-    while exists:
-        code = uuid.uuid4()
-        exists = UserBookingDetails.objects.filter(id=code).exists()
-    return code
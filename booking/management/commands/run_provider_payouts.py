@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from booking.payouts import create_provider_payouts, run_provider_payouts
+
+
+class Command(BaseCommand):
+    help = "Create and send provider payouts for succeeded bookings not yet paid out"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the payouts that would be created",
+        )
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            with transaction.atomic():
+                for payout in create_provider_payouts():
+                    self.stdout.write(
+                        f"{payout.provider_id}: {payout.amount} {payout.currency} "
+                        f"for {payout.booking_count} bookings"
+                    )
+                transaction.set_rollback(True)
+            return
+
+        summary = run_provider_payouts()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"created {summary['created']} payouts, paid {summary['paid']}, "
+                f"failed {summary['failed']}, pending {summary['pending']}"
+            )
+        )
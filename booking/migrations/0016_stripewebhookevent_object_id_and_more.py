@@ -0,0 +1,36 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0015_bookingpayment_stripewebhookevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stripewebhookevent",
+            name="object_id",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="stripewebhookevent",
+            name="partition",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="stripewebhookevent",
+            name="stripe_created",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="stripewebhookevent",
+            index=models.Index(
+                condition=models.Q(("processed_at__isnull", True)),
+                fields=["partition", "stripe_created"],
+                name="stripe_event_unprocessed_idx",
+            ),
+        ),
+    ]
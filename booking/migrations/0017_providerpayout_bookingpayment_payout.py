@@ -0,0 +1,81 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:34
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("booking", "0016_stripewebhookevent_object_id_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProviderPayout",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("currency", models.CharField(default="usd", max_length=10)),
+                ("booking_count", models.IntegerField(default=0)),
+                ("period_end", models.DateTimeField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("processing", "processing"),
+                            ("paid", "paid"),
+                            ("failed", "failed"),
+                        ],
+                        default="pending",
+                        max_length=50,
+                    ),
+                ),
+                ("destination", models.CharField(max_length=255)),
+                ("idempotency_key", models.CharField(max_length=255, unique=True)),
+                (
+                    "transfer_id",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                ("error", models.CharField(blank=True, max_length=800, null=True)),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="provider_payouts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_at",),
+                "abstract": False,
+            },
+        ),
+        migrations.AddField(
+            model_name="bookingpayment",
+            name="payout",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="booking_payments",
+                to="booking.providerpayout",
+            ),
+        ),
+    ]
@@ -0,0 +1,145 @@
+# Generated by Django 4.2.9 on 2026-10-19 12:57
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import booking.fields
+from booking.fields import BOOKING_STATUS_CODES
+
+
+def copy_status_to_code(apps, schema_editor):
+    UserBookingDetails = apps.get_model("booking", "UserBookingDetails")
+    for status in BOOKING_STATUS_CODES:
+        UserBookingDetails.objects.filter(status=status).update(status_code=status)
+
+
+def copy_code_to_status(apps, schema_editor):
+    UserBookingDetails = apps.get_model("booking", "UserBookingDetails")
+    for status in BOOKING_STATUS_CODES:
+        UserBookingDetails.objects.filter(status_code=status).update(status=status)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("booking", "0017_providerpayout_bookingpayment_payout"),
+    ]
+
+    operations = [
+        # the status names are copied into a new integer column, which then
+        # replaces the old one
+        migrations.AddField(
+            model_name="userbookingdetails",
+            name="status_code",
+            field=booking.fields.BookingStatusField(
+                blank=True,
+                choices=[
+                    ("requested", "requested"),
+                    ("pending", "pending"),
+                    ("accepted", "accepted"),
+                    ("rejected", "rejected"),
+                    ("failed", "failed"),
+                    ("succeeded", "succeeded"),
+                ],
+                null=True,
+            ),
+        ),
+        migrations.RunPython(copy_status_to_code, copy_code_to_status),
+        migrations.RemoveField(
+            model_name="userbookingdetails",
+            name="status",
+        ),
+        migrations.RenameField(
+            model_name="userbookingdetails",
+            old_name="status_code",
+            new_name="status",
+        ),
+        migrations.AlterField(
+            model_name="userbookingdetails",
+            name="status",
+            field=booking.fields.BookingStatusField(
+                blank=True,
+                choices=[
+                    ("requested", "requested"),
+                    ("pending", "pending"),
+                    ("accepted", "accepted"),
+                    ("rejected", "rejected"),
+                    ("failed", "failed"),
+                    ("succeeded", "succeeded"),
+                ],
+                db_index=True,
+                null=True,
+            ),
+        ),
+        migrations.CreateModel(
+            name="BookingStatusTransition",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("event", models.CharField(max_length=50)),
+                (
+                    "from_status",
+                    booking.fields.BookingStatusField(
+                        blank=True,
+                        choices=[
+                            ("requested", "requested"),
+                            ("pending", "pending"),
+                            ("accepted", "accepted"),
+                            ("rejected", "rejected"),
+                            ("failed", "failed"),
+                            ("succeeded", "succeeded"),
+                        ],
+                        null=True,
+                    ),
+                ),
+                (
+                    "to_status",
+                    booking.fields.BookingStatusField(
+                        choices=[
+                            ("requested", "requested"),
+                            ("pending", "pending"),
+                            ("accepted", "accepted"),
+                            ("rejected", "rejected"),
+                            ("failed", "failed"),
+                            ("succeeded", "succeeded"),
+                        ]
+                    ),
+                ),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="booking_status_transitions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "booking",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_transitions",
+                        to="booking.userbookingdetails",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_at",),
+                "abstract": False,
+            },
+        ),
+    ]
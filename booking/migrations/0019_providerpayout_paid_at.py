@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0018_booking_status_codes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="providerpayout",
+            name="paid_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
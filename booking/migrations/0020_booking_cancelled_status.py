@@ -0,0 +1,87 @@
+# Generated by Django 4.2.9 on 2026-10-19 13:21
+
+from django.db import migrations
+
+import booking.fields
+
+
+def mark_cancelled_bookings(apps, schema_editor):
+    # cancel used to move bookings to failed, the log tells them apart from
+    # failed payments
+    UserBookingDetails = apps.get_model("booking", "UserBookingDetails")
+    BookingStatusTransition = apps.get_model("booking", "BookingStatusTransition")
+    cancelled = BookingStatusTransition.objects.filter(event="cancel")
+    UserBookingDetails.objects.filter(
+        status="failed", id__in=cancelled.values("booking_id")
+    ).update(status="cancelled")
+    cancelled.filter(to_status="failed").update(to_status="cancelled")
+
+
+def unmark_cancelled_bookings(apps, schema_editor):
+    UserBookingDetails = apps.get_model("booking", "UserBookingDetails")
+    BookingStatusTransition = apps.get_model("booking", "BookingStatusTransition")
+    UserBookingDetails.objects.filter(status="cancelled").update(status="failed")
+    BookingStatusTransition.objects.filter(to_status="cancelled").update(
+        to_status="failed"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0019_providerpayout_paid_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="bookingstatustransition",
+            name="from_status",
+            field=booking.fields.BookingStatusField(
+                blank=True,
+                choices=[
+                    ("requested", "requested"),
+                    ("pending", "pending"),
+                    ("accepted", "accepted"),
+                    ("rejected", "rejected"),
+                    ("failed", "failed"),
+                    ("succeeded", "succeeded"),
+                    ("cancelled", "cancelled"),
+                ],
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="bookingstatustransition",
+            name="to_status",
+            field=booking.fields.BookingStatusField(
+                choices=[
+                    ("requested", "requested"),
+                    ("pending", "pending"),
+                    ("accepted", "accepted"),
+                    ("rejected", "rejected"),
+                    ("failed", "failed"),
+                    ("succeeded", "succeeded"),
+                    ("cancelled", "cancelled"),
+                ]
+            ),
+        ),
+        migrations.AlterField(
+            model_name="userbookingdetails",
+            name="status",
+            field=booking.fields.BookingStatusField(
+                blank=True,
+                choices=[
+                    ("requested", "requested"),
+                    ("pending", "pending"),
+                    ("accepted", "accepted"),
+                    ("rejected", "rejected"),
+                    ("failed", "failed"),
+                    ("succeeded", "succeeded"),
+                    ("cancelled", "cancelled"),
+                ],
+                db_index=True,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(mark_cancelled_bookings, unmark_cancelled_bookings),
+    ]
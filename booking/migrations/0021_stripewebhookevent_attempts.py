@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("booking", "0020_booking_cancelled_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stripewebhookevent",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="stripewebhookevent",
+            name="last_error",
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
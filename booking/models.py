@@ -4,6 +4,8 @@ from django.db import models
 from authentication.base_model import BaseModel
 from authentication.models import User
 
+from .fields import BookingStatusField
+
 
 class UserBookingDetails(BaseModel):
     BOOKING_STATUS_CHOICES = (
@@ -13,6 +15,7 @@ class UserBookingDetails(BaseModel):
         ("rejected", "rejected"),
         ("failed", "failed"),
         ("succeeded", "succeeded"),
+        ("cancelled", "cancelled"),
     )
     patient = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="patient_booking_details"
@@ -28,8 +31,9 @@ class UserBookingDetails(BaseModel):
     date_care_is_needed = models.DateField(null=True, blank=True)
     age_of_patient = models.IntegerField(null=True, blank=True)
     zipcode = models.CharField(max_length=800, null=True, blank=True)
-    status = models.CharField(
-        choices=BOOKING_STATUS_CHOICES, max_length=200, null=True, blank=True
+    # changed only through booking.state_machine.transition_booking
+    status = BookingStatusField(
+        choices=BOOKING_STATUS_CHOICES, null=True, blank=True, db_index=True
     )
     date_time_of_care = models.DateTimeField(null=True, blank=True)
     reason = models.CharField(max_length=800, null=True, blank=True)
@@ -37,6 +41,27 @@ class UserBookingDetails(BaseModel):
     eta = models.CharField(max_length=225, null=True, blank=True)
 
 
+class BookingStatusTransition(BaseModel):
+    booking = models.ForeignKey(
+        UserBookingDetails,
+        on_delete=models.CASCADE,
+        related_name="status_transitions",
+    )
+    event = models.CharField(max_length=50)
+    from_status = BookingStatusField(
+        choices=UserBookingDetails.BOOKING_STATUS_CHOICES, null=True, blank=True
+    )
+    to_status = BookingStatusField(choices=UserBookingDetails.BOOKING_STATUS_CHOICES)
+    # the user whose request made the change, empty for webhooks and workers
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="booking_status_transitions",
+        null=True,
+        blank=True,
+    )
+
+
 class UserBookingRequestTimeFrame(BaseModel):
     booking = models.ForeignKey(
         UserBookingDetails,
@@ -50,3 +75,87 @@ class UserBookingRequestTimeFrame(BaseModel):
 
 class GeneralBookingDetails(models.Model):
     price_per_consultation = models.DecimalField(max_digits=12, decimal_places=2)
+
+
+class BookingPayment(BaseModel):
+    PAYMENT_STATUS_CHOICES = (
+        ("queued", "queued"),
+        ("processing", "processing"),
+        ("succeeded", "succeeded"),
+        ("failed", "failed"),
+    )
+    booking = models.OneToOneField(
+        UserBookingDetails, on_delete=models.CASCADE, related_name="payment"
+    )
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(max_length=10, default="usd")
+    status = models.CharField(
+        choices=PAYMENT_STATUS_CHOICES, max_length=50, default="queued"
+    )
+    # sent with the PaymentIntent create so a retried capture never charges twice
+    idempotency_key = models.CharField(max_length=255, unique=True)
+    payment_intent_id = models.CharField(
+        max_length=255, unique=True, null=True, blank=True
+    )
+    error = models.CharField(max_length=800, null=True, blank=True)
+    # set once the amount is included in a provider payout
+    payout = models.ForeignKey(
+        "ProviderPayout",
+        on_delete=models.SET_NULL,
+        related_name="booking_payments",
+        null=True,
+        blank=True,
+    )
+
+
+class ProviderPayout(BaseModel):
+    PAYOUT_STATUS_CHOICES = (
+        ("pending", "pending"),
+        ("processing", "processing"),
+        ("paid", "paid"),
+        ("failed", "failed"),
+    )
+    provider = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="provider_payouts"
+    )
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(max_length=10, default="usd")
+    booking_count = models.IntegerField(default=0)
+    # payments that succeeded before this time are included
+    period_end = models.DateTimeField()
+    status = models.CharField(
+        choices=PAYOUT_STATUS_CHOICES, max_length=50, default="pending"
+    )
+    destination = models.CharField(max_length=255)
+    idempotency_key = models.CharField(max_length=255, unique=True)
+    transfer_id = models.CharField(max_length=255, null=True, blank=True)
+    # when stripe created the transfer
+    paid_at = models.DateTimeField(null=True, blank=True)
+    error = models.CharField(max_length=800, null=True, blank=True)
+
+
+class StripeWebhookEvent(BaseModel):
+    # stripe retries deliveries, the unique event id makes a redelivery a no-op
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=255)
+    # id of the PaymentIntent/SetupIntent etc. the event is about
+    object_id = models.CharField(max_length=255, null=True, blank=True)
+    # stripe's event timestamp, events of one object are applied in this order
+    stripe_created = models.IntegerField(default=0)
+    # every object hashes to one partition, each partition is drained serially
+    partition = models.PositiveSmallIntegerField(default=0)
+    payload = models.JSONField()
+    processed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # failed applications, after STRIPE_WEBHOOK_MAX_ATTEMPTS the event is set
+    # processed with its last_error left for a look
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(null=True, blank=True)
+
+    class Meta(BaseModel.Meta):
+        indexes = [
+            models.Index(
+                fields=["partition", "stripe_created"],
+                condition=models.Q(processed_at__isnull=True),
+                name="stripe_event_unprocessed_idx",
+            )
+        ]
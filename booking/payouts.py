@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from utility.helpers.identifiers import generate_id
+from utility.services.stripe import StripeHelper
+
+from .models import BookingPayment, ProviderPayout
+
+# left pending for the next run, anything else needs a look from finance
+RETRYABLE_STRIPE_EXCEPTIONS = ("RateLimitError", "APIConnectionError")
+
+
+class RateLimiter:
+    """Spaces calls out to at most ``rate`` per second across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_for = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+
+def unpaid_payments(period_end):
+    return BookingPayment.objects.filter(
+        status="succeeded",
+        payout__isnull=True,
+        updated_at__lt=period_end,
+        booking__practitioner__user_account_details__stripe_account_id__isnull=False,
+    )
+
+
+@transaction.atomic
+def create_provider_payouts(period_end=None) -> list:
+    """
+    Records one pending payout per provider for every succeeded booking
+    payment not yet paid out, and links those payments to it.
+    """
+    period_end = period_end or timezone.now()
+    # lock the payments first, so one committed meanwhile is neither counted
+    # nor linked and the payout amount always matches the linked rows
+    payments = (
+        unpaid_payments(period_end)
+        .select_for_update(of=("self",))
+        .order_by("id")
+        .values_list(
+            "id",
+            "amount",
+            "currency",
+            "booking__practitioner",
+            "booking__practitioner__user_account_details__stripe_account_id",
+        )
+    )
+    groups = defaultdict(list)
+    for payment_id, amount, currency, provider_id, destination in payments:
+        groups[(provider_id, currency, destination)].append((payment_id, amount))
+
+    payouts, payment_ids = [], {}
+    for (provider_id, currency, destination), rows in groups.items():
+        payout_id = generate_id()
+        payouts.append(
+            ProviderPayout(
+                id=payout_id,
+                provider_id=provider_id,
+                amount=sum(amount for _, amount in rows),
+                currency=currency,
+                booking_count=len(rows),
+                period_end=period_end,
+                destination=destination,
+                idempotency_key=f"provider-payout-{payout_id}",
+            )
+        )
+        payment_ids[payout_id] = [payment_id for payment_id, _ in rows]
+    ProviderPayout.objects.bulk_create(payouts)
+
+    for payout in payouts:
+        BookingPayment.objects.filter(id__in=payment_ids[payout.id]).update(
+            payout=payout, updated_at=timezone.now()
+        )
+    return payouts
+
+
+def _transfer(payout: ProviderPayout, rate_limiter: RateLimiter) -> dict:
+    rate_limiter.wait()
+    return StripeHelper().create_transfer(
+        amount=payout.amount,
+        destination=payout.destination,
+        currency=payout.currency,
+        idempotency_key=payout.idempotency_key,
+        metadata={"provider_payout_id": str(payout.id)},
+        # lets a lost transfer be found again, see recover_stale_payouts
+        transfer_group=payout.idempotency_key,
+    )
+
+
+def _mark_paid(payout: ProviderPayout, transfer):
+    payout.status = "paid"
+    payout.transfer_id = transfer["id"]
+    payout.paid_at = datetime.fromtimestamp(transfer["created"], tz=dt_timezone.utc)
+    payout.error = None
+
+
+def recover_stale_payouts() -> dict:
+    """
+    Settles payouts left processing for PAYOUT_STALE_SECONDS by a run that
+    crashed between the claim and the transfer. A payout whose transfer
+    exists on stripe is marked paid, the others go back to pending and are
+    sent again with the same idempotency key.
+    """
+    summary = {"paid": 0, "pending": 0}
+    cutoff = timezone.now() - timedelta(seconds=settings.PAYOUT_STALE_SECONDS)
+    # claimed by touching updated_at, so an overlapping sweep skips them and
+    # no row is locked during the stripe calls
+    with transaction.atomic():
+        payouts = list(
+            ProviderPayout.objects.select_for_update(skip_locked=True).filter(
+                status="processing", updated_at__lt=cutoff
+            )
+        )
+        ProviderPayout.objects.filter(id__in=[payout.id for payout in payouts]).update(
+            updated_at=timezone.now()
+        )
+
+    recovered = []
+    for payout in payouts:
+        transfers = StripeHelper().list_transfers(payout.idempotency_key)
+        if not transfers["status"]:
+            # stripe is unreachable, try again on a later sweep
+            continue
+        if transfers["data"]:
+            _mark_paid(payout, transfers["data"][0])
+        else:
+            payout.status = "pending"
+        payout.updated_at = timezone.now()
+        summary[payout.status] += 1
+        recovered.append(payout)
+    ProviderPayout.objects.bulk_update(
+        recovered, ["status", "transfer_id", "paid_at", "error", "updated_at"]
+    )
+    return summary
+
+
+def send_pending_payouts() -> dict:
+    """
+    Creates a stripe transfer for every pending payout, several at a time but
+    no faster than PAYOUT_TRANSFERS_PER_SECOND.
+    """
+    # claim the payouts so an overlapping run does not send them again
+    with transaction.atomic():
+        payouts = list(
+            ProviderPayout.objects.select_for_update(skip_locked=True).filter(
+                status="pending"
+            )
+        )
+        ProviderPayout.objects.filter(id__in=[payout.id for payout in payouts]).update(
+            status="processing", updated_at=timezone.now()
+        )
+    if not payouts:
+        return {"paid": 0, "failed": 0, "pending": 0}
+
+    rate_limiter = RateLimiter(settings.PAYOUT_TRANSFERS_PER_SECOND)
+    with ThreadPoolExecutor(max_workers=settings.PAYOUT_MAX_WORKERS) as executor:
+        results = list(
+            executor.map(lambda payout: _transfer(payout, rate_limiter), payouts)
+        )
+
+    summary = {"paid": 0, "failed": 0, "pending": 0}
+    now = timezone.now()
+    for payout, result in zip(payouts, results):
+        if result["status"]:
+            _mark_paid(payout, result["data"])
+        elif result["exception"] in RETRYABLE_STRIPE_EXCEPTIONS:
+            # the idempotency key makes the next attempt safe
+            payout.status = "pending"
+            payout.error = f"{result['message']}"[:800]
+        else:
+            payout.status = "failed"
+            payout.error = f"{result['message']}"[:800]
+        payout.updated_at = now
+        summary[payout.status] += 1
+
+    ProviderPayout.objects.bulk_update(
+        payouts, ["status", "transfer_id", "paid_at", "error", "updated_at"]
+    )
+    return summary
+
+
+def run_provider_payouts(period_end=None) -> dict:
+    payouts = create_provider_payouts(period_end)
+    summary = send_pending_payouts()
+    summary["created"] = len(payouts)
+    return summary
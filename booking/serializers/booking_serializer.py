@@ -4,7 +4,7 @@ from authentication.models import PractitionerPracticeCriteria
 from authentication.serializers.provider_authentication_serializers import (
     SimpleDecryptedProviderDetails,
 )
-from booking.models import UserBookingDetails
+from booking.models import BookingPayment, UserBookingDetails
 from utility.helpers.functools import decrypt
 
 
@@ -229,3 +229,18 @@ class RescheduleBookingRequestSerializer(serializers.Serializer):
 
 class MakeBookingRequestSerializer(serializers.Serializer):
     booking_id = serializers.UUIDField(required=True)
+
+
+class BookingPaymentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BookingPayment
+        fields = [
+            "id",
+            "booking",
+            "amount",
+            "currency",
+            "status",
+            "error",
+            "created_at",
+            "updated_at",
+        ]
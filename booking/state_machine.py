@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.utils import timezone
+
+from utility.helpers.etags import bookings_scope, bump_versions
+
+from .events import publish_booking_event
+from .models import BookingStatusTransition, UserBookingDetails
+
+# event: (statuses it can start from, status it moves to)
+BOOKING_TRANSITIONS = {
+    "finalize": (("requested",), "pending"),
+    "reschedule": (("pending", "accepted"), "pending"),
+    "accept": (("pending",), "accepted"),
+    "reject": (("pending",), "rejected"),
+    # cancelled bookings are final, unlike failed ones they are never charged
+    "cancel": (("requested", "pending", "accepted"), "cancelled"),
+    # a booking whose payment failed can be charged again
+    "payment_succeeded": (("accepted", "failed"), "succeeded"),
+    "payment_failed": (("accepted",), "failed"),
+}
+
+
+def can_transition(booking: UserBookingDetails, event: str) -> bool:
+    sources, _ = BOOKING_TRANSITIONS[event]
+    return booking.status in sources
+
+
+def transition_booking(
+    booking: UserBookingDetails, event: str, actor=None, **changes
+) -> bool:
+    """
+    Moves the booking to the status of ``event`` together with ``changes``, in
+    one ``UPDATE ... WHERE status = <status read>``, and logs the transition.
+
+    Returns False, changing nothing, when the event is not allowed from the
+    booking's status or the status was changed by another request since the
+    booking was read. The booking instance is updated on success and the
+    change is pushed to the event streams of its patient and practitioner.
+    """
+    if not can_transition(booking, event):
+        return False
+    _, target = BOOKING_TRANSITIONS[event]
+    changes["updated_at"] = timezone.now()
+
+    with transaction.atomic():
+        updated = UserBookingDetails.objects.filter(
+            id=booking.id, status=booking.status
+        ).update(status=target, **changes)
+        if not updated:
+            return False
+        BookingStatusTransition.objects.create(
+            booking_id=booking.id,
+            event=event,
+            from_status=booking.status,
+            to_status=target,
+            actor_id=getattr(actor, "id", None),
+        )
+
+    from_status, booking.status = booking.status, target
+    for field, value in changes.items():
+        setattr(booking, field, value)
+    publish_booking_event(booking, event, from_status)
+    transaction.on_commit(
+        lambda: bump_versions(
+            bookings_scope("patient", booking.patient_id),
+            bookings_scope("provider", booking.practitioner_id),
+        )
+    )
+    return True
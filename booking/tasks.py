@@ -0,0 +1,204 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from utility.services.stripe import StripeHelper
+
+from .models import BookingPayment, StripeWebhookEvent
+from .payouts import recover_stale_payouts, run_provider_payouts, send_pending_payouts
+from .state_machine import transition_booking
+from .webhooks import apply_stripe_events
+
+# worth retrying with the same idempotency key, anything else is final
+RETRYABLE_STRIPE_EXCEPTIONS = ("RateLimitError", "APIConnectionError")
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=5)
+def capture_booking_payment(self, payment_id: str):
+    # claim the payment so a redelivered message does not start a second capture
+    claimed = BookingPayment.objects.filter(id=payment_id, status="queued").update(
+        status="processing", updated_at=timezone.now()
+    )
+    if not claimed:
+        return
+    payment = BookingPayment.objects.select_related("booking__patient").get(
+        id=payment_id
+    )
+    patient = payment.booking.patient
+    user_card = patient.user_card.first()
+    if user_card is None:
+        payment.status = "failed"
+        payment.error = "Patient does not have a card"
+        payment.save(update_fields=["status", "error", "updated_at"])
+        return
+
+    charge_card = StripeHelper().charge_payment_method(
+        customer_id=patient.stripe_customer_id or patient.id,
+        customer_email=patient.email,
+        pm_id=user_card.payment_method_id,
+        amount=payment.amount,
+        currency=payment.currency,
+        idempotency_key=payment.idempotency_key,
+        metadata={
+            "booking_payment_id": str(payment.id),
+            "booking_id": str(payment.booking_id),
+            # tells the webhook which attempt of the payment the intent is for
+            "idempotency_key": payment.idempotency_key,
+        },
+    )
+    if charge_card["status"]:
+        # the payment is finalized by the payment_intent webhook
+        payment.payment_intent_id = charge_card["data"]["id"]
+        payment.save(update_fields=["payment_intent_id", "updated_at"])
+        return
+
+    if (
+        charge_card["exception"] in RETRYABLE_STRIPE_EXCEPTIONS
+        and self.request.retries < self.max_retries
+    ):
+        payment.status = "queued"
+        payment.save(update_fields=["status", "updated_at"])
+        raise self.retry(countdown=2**self.request.retries * 30)
+
+    print("booking payment capture error", charge_card)
+    payment.status = "failed"
+    payment.error = f"{charge_card['message']}"[:800]
+    payment.save(update_fields=["status", "error", "updated_at"])
+    transition_booking(payment.booking, "payment_failed")
+
+
+@shared_task(ignore_result=True)
+def requeue_stale_booking_payments():
+    """
+    Queues the capture again for payments left queued or processing by a
+    crashed worker. The attempt's idempotency key is reused, so stripe
+    returns the intent of a capture that did go through instead of charging
+    again. Past stripe's 24 hour key window that is no longer safe, those
+    payments are only reported.
+    """
+    now = timezone.now()
+    stale = BookingPayment.objects.filter(
+        status__in=("queued", "processing"),
+        payment_intent_id__isnull=True,
+        updated_at__lt=now - timedelta(seconds=settings.BOOKING_PAYMENT_STALE_SECONDS),
+    )
+    expired_key = now - timedelta(hours=23)
+    for payment_id in stale.filter(updated_at__lt=expired_key).values_list(
+        "id", flat=True
+    ):
+        print(f"booking payment {payment_id} is stuck, reconcile it with stripe")
+
+    for payment_id in stale.filter(updated_at__gte=expired_key).values_list(
+        "id", flat=True
+    ):
+        # conditional, a payment a worker picked up meanwhile is left to it
+        requeued = stale.filter(id=payment_id).update(
+            status="queued", updated_at=timezone.now()
+        )
+        if requeued:
+            capture_booking_payment.delay(str(payment_id))
+
+
+def webhook_dispatch_key(partition: int) -> str:
+    return f"stripe:webhook:dispatch:{partition}"
+
+
+def schedule_stripe_webhook_processing(partition: int):
+    # debounce: while a drain is scheduled, new events just wait for it
+    debounce = settings.STRIPE_WEBHOOK_DEBOUNCE_SECONDS
+    if cache.add(webhook_dispatch_key(partition), 1, timeout=debounce + 60):
+        process_stripe_webhook_events.apply_async((partition,), countdown=debounce)
+
+
+def _apply_webhook_events(events: list) -> list:
+    """
+    Applies the events, one at a time in their own savepoint if the batch
+    fails, and returns the ones that raised with their attempt recorded.
+    """
+    try:
+        with transaction.atomic():
+            apply_stripe_events(events)
+        return []
+    except Exception:
+        pass
+
+    failed = []
+    for event in events:
+        try:
+            with transaction.atomic():
+                apply_stripe_events([event])
+        except Exception as e:
+            print(f"stripe webhook event {event.event_id} error {e}")
+            event.attempts += 1
+            event.last_error = f"{e}"[:800]
+            failed.append(event)
+    return failed
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=10)
+def process_stripe_webhook_events(self, partition: int = 0):
+    # cleared before draining, so events stored from now on schedule a new run
+    cache.delete(webhook_dispatch_key(partition))
+    lock_key = f"stripe:webhook:processing:{partition}"
+    if not cache.add(lock_key, 1, timeout=300):
+        # another worker is draining this partition, retry once it is done
+        schedule_stripe_webhook_processing(partition)
+        return
+
+    batch_size = settings.STRIPE_WEBHOOK_BATCH_SIZE
+    # failed in this run, skipped so they do not hold up the later events
+    skipped = set()
+    try:
+        while True:
+            with transaction.atomic():
+                events = list(
+                    StripeWebhookEvent.objects.select_for_update(skip_locked=True)
+                    .filter(partition=partition, processed_at__isnull=True)
+                    .exclude(id__in=skipped)
+                    .order_by("stripe_created", "created_at")[:batch_size]
+                )
+                if not events:
+                    break
+                failed = _apply_webhook_events(events)
+
+                processed_at = timezone.now()
+                for event in events:
+                    if event not in failed:
+                        event.processed_at = processed_at
+                    elif event.attempts >= settings.STRIPE_WEBHOOK_MAX_ATTEMPTS:
+                        print(f"stripe webhook event {event.event_id} skipped")
+                        event.processed_at = processed_at
+                    else:
+                        skipped.add(event.id)
+                StripeWebhookEvent.objects.bulk_update(
+                    events, ["processed_at", "attempts", "last_error"]
+                )
+
+            if len(events) < batch_size:
+                break
+    except Exception as e:
+        print(f"stripe webhook processing error for partition {partition} {e}")
+        raise self.retry(countdown=min(2**self.request.retries * 30, 600))
+    finally:
+        cache.delete(lock_key)
+
+    if skipped:
+        # nothing else drains the partition until its next webhook arrives
+        raise self.retry(countdown=min(2**self.request.retries * 30, 600))
+
+
+@shared_task(ignore_result=True)
+def run_provider_payouts_task():
+    summary = run_provider_payouts()
+    print("provider payouts", summary)
+
+
+@shared_task(ignore_result=True)
+def recover_stale_payouts_task():
+    recovered = recover_stale_payouts()
+    if recovered["pending"]:
+        print("provider payouts", send_pending_payouts())
@@ -0,0 +1,156 @@
+import asyncio
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+
+from authentication.serializers.provider_authentication_serializers import (
+    SimpleDecryptedProviderDetails,
+)
+from booking.events import booking_event_hub
+from booking.functools import arecommend_providers
+from booking.models import UserBookingDetails
+from booking.serializers.booking_serializer import BookingSerializer
+from utility.helpers.async_views import async_api_view
+from utility.helpers.etags import bookings_scope, bump_versions
+from utility.helpers.functools import (
+    convert_serializer_errors_from_dict_to_list,
+    convert_to_error_message,
+    paginate,
+    success_booking_response,
+)
+
+
+@async_api_view(["POST"])
+async def booking_request(request):
+    """Async ``BookingViewSet.booking_request``, the zip code lookup does not hold a thread."""
+    try:
+        today = datetime.datetime.now()
+        user = request.user
+        if user.user_type == "health_provider":
+            return JsonResponse(
+                convert_to_error_message(
+                    "You are not authorized to book a health provider"
+                ),
+                status=400,
+            )
+
+        if not await user.ahas_verified_card():
+            return JsonResponse(
+                convert_to_error_message(
+                    "You are not authorized to book until a card payment method is verified"
+                ),
+                status=400,
+            )
+
+        serialized_input = BookingSerializer(data=request.data)
+        if not serialized_input.is_valid():
+            return JsonResponse(
+                convert_to_error_message(
+                    convert_serializer_errors_from_dict_to_list(serialized_input.errors)
+                ),
+                status=400,
+            )
+        day_care_is_needed = serialized_input.validated_data["date_care_is_needed"]
+        if day_care_is_needed < today.date():
+            return JsonResponse(
+                convert_to_error_message("you can not pick a date less than today"),
+                status=400,
+            )
+        age = serialized_input.validated_data["age_of_patient"]
+        zipcode = serialized_input.validated_data["zipcode"]
+
+        get_providers = await arecommend_providers(age, zipcode, day_care_is_needed)
+        if not get_providers["status"]:
+            return JsonResponse(
+                convert_to_error_message(get_providers["message"]), status=400
+            )
+        if get_providers["message"] == []:
+            return JsonResponse(
+                {
+                    "status": "Success",
+                    "message": "request successful",
+                    "data": {"count": 0, "pages": 0, "result": [], "page": 0},
+                },
+                status=200,
+            )
+
+        booking_details = UserBookingDetails(
+            patient_id=user.id,
+            date_care_is_needed=day_care_is_needed,
+            symptom=serialized_input.validated_data["symptom"],
+            age_of_patient=age,
+            zipcode=zipcode,
+            status="requested",
+        )
+        await booking_details.asave()
+        await sync_to_async(bump_versions)(bookings_scope("patient", user.id))
+
+        # the provider serializer reads related rows, run it off the loop
+        serialized_data = await sync_to_async(paginate)(
+            get_providers["message"],
+            int(request.GET.get("page", 1)),
+            SimpleDecryptedProviderDetails,
+            {"request": request},
+            int(request.GET.get("limit", 10)),
+        )
+        return JsonResponse(
+            success_booking_response(
+                booking_id=booking_details.id, serialized_data=serialized_data
+            ),
+            status=200,
+        )
+    except Exception as err:
+        return JsonResponse(convert_to_error_message(f"{err}"), status=400)
+
+
+@async_api_view(["GET"])
+async def booking_events(request):
+    """
+    Server-sent events stream of the user's booking changes, e.g. a new
+    pending request for a provider, in place of polling get_provider_bookings.
+
+    Only served through config.asgi. Under WSGI Django reads the whole
+    stream before sending it, holding a worker for the stream's lifetime
+    and delivering nothing as it happens.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            convert_to_error_message(
+                "The booking event stream is only available through ASGI"
+            ),
+            status=400,
+        )
+    user_id = request.user.id
+
+    async def stream():
+        queue = booking_event_hub.subscribe(user_id)
+        loop = asyncio.get_running_loop()
+        # Django 4.2 does not notice a client that went away mid-stream, so
+        # streams are capped and the EventSource reconnects
+        closes_at = loop.time() + settings.BOOKING_EVENTS_STREAM_SECONDS
+        try:
+            yield "retry: 3000\n\n"
+            while loop.time() < closes_at:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(),
+                        timeout=min(
+                            settings.BOOKING_EVENTS_KEEPALIVE, closes_at - loop.time()
+                        ),
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            booking_event_hub.unsubscribe(user_id, queue)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # keep nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
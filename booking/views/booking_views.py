@@ -22,13 +22,15 @@ from authentication.models import (
 from authentication.serializers.provider_authentication_serializers import (
     SimpleDecryptedProviderDetails,
 )
-from booking.functools import generate_unique_id, recommend_providers
+from booking.functools import recommend_providers
 from booking.models import (
+    BookingPayment,
     GeneralBookingDetails,
     UserBookingDetails,
     UserBookingRequestTimeFrame,
 )
 from booking.serializers.booking_serializer import (  # GetProviderBookingSerializer,
+    BookingPaymentSerializer,
     BookingSerializer,
     ConfirmBookingSerializer,
     CreateBookingSerializer,
@@ -37,6 +39,16 @@ from booking.serializers.booking_serializer import (  # GetProviderBookingSerial
     RejectBookingSerializer,
     RescheduleBookingRequestSerializer,
 )
+from booking.state_machine import can_transition, transition_booking
+from booking.tasks import capture_booking_payment
+from utility.db.replicas import read_from_replica
+from utility.helpers.etags import (
+    DIRECTORY_SCOPE,
+    availability_scope,
+    bookings_scope,
+    bump_versions,
+    conditional_get,
+)
 from utility.helpers.functools import (  # decrypt_simple_data,; decrypt_user_data,; encrypt,
     convert_serializer_errors_from_dict_to_list,
     convert_success_message,
@@ -46,7 +58,7 @@ from utility.helpers.functools import (  # decrypt_simple_data,; decrypt_user_da
     paginate,
     success_booking_response,
 )
-from utility.services.stripe import StripeHelper
+from utility.helpers.identifiers import generate_id
 
 
 @extend_schema(tags=["Booking endpoints"])
@@ -57,9 +69,11 @@ class BookingViewSet(GenericViewSet):
 
     def get_queryset(self):
         if self.request.user.user_type == "patient":
-            return UserBookingDetails.objects.filter(patient=self.request.user)
+            return UserBookingDetails.objects.filter(patient_id=self.request.user.id)
         else:
-            return UserBookingDetails.objects.filter(practitioner=self.request.user)
+            return UserBookingDetails.objects.filter(
+                practitioner_id=self.request.user.id
+            )
 
     @action(
         methods=["POST"],
@@ -71,8 +85,7 @@ class BookingViewSet(GenericViewSet):
         try:
             today = datetime.datetime.now()
             user = request.user
-            logged_in_user = User.objects.get(id=user.id)
-            if logged_in_user.user_type == "health_provider":
+            if user.user_type == "health_provider":
                 return Response(
                     convert_to_error_message(
                         "You are not authorized to book a health provider"
@@ -80,7 +93,7 @@ class BookingViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            if not UserCard.objects.filter(user=logged_in_user).exists():
+            if not user.has_verified_card():
                 return Response(
                     convert_to_error_message(
                         "You are not authorized to book until a card payment method is verified"
@@ -109,8 +122,7 @@ class BookingViewSet(GenericViewSet):
 
             # create Booking details
             booking_details = UserBookingDetails(
-                id=generate_unique_id(),
-                patient=logged_in_user,
+                patient_id=user.id,
                 date_care_is_needed=day_care_is_needed,
                 symptom=serialized_input.validated_data["symptom"],
                 age_of_patient=age,
@@ -134,6 +146,7 @@ class BookingViewSet(GenericViewSet):
                     status=status.HTTP_200_OK,
                 )
             booking_details.save()
+            bump_versions(bookings_scope("patient", user.id))
 
             providers = get_providers["message"]
 
@@ -166,8 +179,7 @@ class BookingViewSet(GenericViewSet):
             today = datetime.datetime.now()
 
             user = request.user
-            logged_in_user = User.objects.get(id=user.id)
-            if logged_in_user.user_type == "health_provider":
+            if user.user_type == "health_provider":
                 return Response(
                     convert_to_error_message(
                         "You are not authorized to book a health provider"
@@ -175,7 +187,7 @@ class BookingViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            if not UserCard.objects.filter(user=logged_in_user).exists():
+            if not user.has_verified_card():
                 return Response(
                     convert_to_error_message(
                         "You are not authorized to book until a card payment method is verified"
@@ -254,35 +266,28 @@ class BookingViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             booking_details = booking_details.first()
-            if booking_details.status != "requested":
+            if booking_details.patient_id != user.id:
                 return Response(
                     convert_to_error_message(
-                        f"The booking with id {booking_id} is not requested"
+                        f"The booking with id {booking_id} is not yours"
                     ),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-
-            if booking_details.status == "pending":
+            # Update booking details with practitioner and date time of care
+            if not transition_booking(
+                booking_details,
+                "finalize",
+                actor=user,
+                practitioner=provider,
+                date_time_of_care=date_time_of_care,
+            ):
                 return Response(
                     convert_to_error_message(
-                        f"The booking with id {booking_id} is already requested"
+                        f"The booking with id {booking_id} is not requested"
                     ),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            if booking_details.patient != logged_in_user:
-                return Response(
-                    convert_to_error_message(
-                        f"The booking with id {booking_id} is not yours"
-                    ),
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            # Update booking details with practitioner and date time of care
-            booking_details.practitioner = provider
-            booking_details.date_time_of_care = date_time_of_care
-            booking_details.status = "pending"
-            booking_details.save()
-
             patient_fullname = (
                 f"{decrypt(booking_details.patient.first_name)} "
                 f"{decrypt(booking_details.patient.last_name)}"
@@ -404,7 +409,7 @@ class BookingViewSet(GenericViewSet):
     )
     def accept_booking_request(self, request):
         try:
-            user = User.objects.get(id=request.user.id)
+            user = request.user.instance
 
             serialized_input = self.get_serializer(data=request.data)
             if not serialized_input.is_valid():
@@ -423,15 +428,7 @@ class BookingViewSet(GenericViewSet):
                 )
 
             booking_details = booking_details.first()
-            if booking_details.status != "pending":
-                return Response(
-                    convert_to_error_message(
-                        f"The booking with id {booking_id} is not pending"
-                    ),
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if booking_details.practitioner != user:
+            if booking_details.practitioner_id != user.id:
                 return Response(
                     convert_to_error_message(
                         f"The booking with id {booking_id} does not exists"
@@ -454,38 +451,45 @@ class BookingViewSet(GenericViewSet):
             fullname = f"{decrypt(patient.first_name)} {decrypt(patient.last_name)}"
             date_time_of_care = booking_details.date_time_of_care
 
-            booking_details.status = "accepted"
+            with transaction.atomic():
+                if not transition_booking(booking_details, "accept", actor=user):
+                    return Response(
+                        convert_to_error_message(
+                            f"The booking with id {booking_id} is not pending"
+                        ),
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
 
-            provider_criteria.save()
+                provider_criteria.save()
+
+                booking_timeframe = (
+                    PractitionerAvailableDateTime.objects.filter(
+                        provider_criteria=provider_criteria,
+                        available_date_time__year=booking_details.date_time_of_care.year,
+                        available_date_time__month=booking_details.date_time_of_care.month,
+                        available_date_time__day=booking_details.date_time_of_care.day,
+                        available_date_time__hour=booking_details.date_time_of_care.hour,
+                    )
+                    .values_list("available_date_time", flat=True)
+                    .distinct()
+                )
+
+                # Add days been removed to the booking booking_timeframe
+                create_booking_timeframe = UserBookingRequestTimeFrame.objects.create(
+                    booking=booking_details,
+                    booking_timeframe=list(booking_timeframe),
+                )
+                create_booking_timeframe.save()
 
-            booking_timeframe = (
                 PractitionerAvailableDateTime.objects.filter(
                     provider_criteria=provider_criteria,
                     available_date_time__year=booking_details.date_time_of_care.year,
                     available_date_time__month=booking_details.date_time_of_care.month,
                     available_date_time__day=booking_details.date_time_of_care.day,
                     available_date_time__hour=booking_details.date_time_of_care.hour,
-                )
-                .values_list("available_date_time", flat=True)
-                .distinct()
-            )
-
-            # Add days been removed to the booking booking_timeframe
-            create_booking_timeframe = UserBookingRequestTimeFrame.objects.create(
-                booking=booking_details,
-                booking_timeframe=list(booking_timeframe),
-            )
-            create_booking_timeframe.save()
-
-            booking_details.save()
+                ).delete()
 
-            PractitionerAvailableDateTime.objects.filter(
-                provider_criteria=provider_criteria,
-                available_date_time__year=booking_details.date_time_of_care.year,
-                available_date_time__month=booking_details.date_time_of_care.month,
-                available_date_time__day=booking_details.date_time_of_care.day,
-                available_date_time__hour=booking_details.date_time_of_care.hour,
-            ).delete()
+            bump_versions(availability_scope(user.id), DIRECTORY_SCOPE)
 
             provider_name = f"{decrypt(user.first_name)} {decrypt(user.last_name)}"
 
@@ -527,7 +531,7 @@ class BookingViewSet(GenericViewSet):
     )
     def reject_booking_request(self, request):
         try:
-            user = User.objects.get(id=request.user.id)
+            user = request.user.instance
             booking_id = request.data["booking_id"]
             reason = request.data["reason"]
 
@@ -539,15 +543,7 @@ class BookingViewSet(GenericViewSet):
                 )
 
             booking_details = booking_details.first()
-            if booking_details.status != "pending":
-                return Response(
-                    convert_to_error_message(
-                        f"The booking with id {booking_id} is not pending"
-                    ),
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if booking_details.practitioner != user:
+            if booking_details.practitioner_id != user.id:
                 return Response(
                     convert_to_error_message(
                         f"The booking with id {booking_id} does not exists"
@@ -559,9 +555,15 @@ class BookingViewSet(GenericViewSet):
             fullname = f"{patient.first_name} {patient.last_name}"
             date_time_of_care = booking_details.date_time_of_care
 
-            booking_details.status = "rejected"
-            booking_details.reason = reason
-            booking_details.save()
+            if not transition_booking(
+                booking_details, "reject", actor=user, reason=reason
+            ):
+                return Response(
+                    convert_to_error_message(
+                        f"The booking with id {booking_id} is not pending"
+                    ),
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
             # try:
             subject = "Booking Request Rejected"
@@ -600,12 +602,13 @@ class BookingViewSet(GenericViewSet):
         ]
     )
     @action(methods=["GET"], detail=False, serializer_class=ListUserBookingsSerializer)
+    @conditional_get(lambda request: [bookings_scope("patient", request.user.id)])
+    @read_from_replica
     def get_patient_bookings(self, request):
         try:
             user = request.user
             booking_status = request.GET.get("status")
-            logged_in_user = User.objects.get(id=user.id)
-            if logged_in_user.user_type != "patient":
+            if user.user_type != "patient":
                 return Response(
                     convert_to_error_message(
                         "user is not authorized for this function"
@@ -622,6 +625,7 @@ class BookingViewSet(GenericViewSet):
                     "rejected",
                     "failed",
                     "succeeded",
+                    "cancelled",
                 ]
                 if booking_status not in status_choices:
                     return Response(
@@ -631,12 +635,10 @@ class BookingViewSet(GenericViewSet):
                         status=status.HTTP_400_BAD_REQUEST,
                     )
                 user_bookings = UserBookingDetails.objects.filter(
-                    patient=logged_in_user, status=booking_status
+                    patient_id=user.id, status=booking_status
                 )
             else:
-                user_bookings = UserBookingDetails.objects.filter(
-                    patient=logged_in_user
-                )
+                user_bookings = UserBookingDetails.objects.filter(patient_id=user.id)
             return Response(
                 convert_to_success_message_serialized_data(
                     paginate(
@@ -662,13 +664,14 @@ class BookingViewSet(GenericViewSet):
         ]
     )
     @action(methods=["GET"], detail=False, serializer_class=ListUserBookingsSerializer)
+    @conditional_get(lambda request: [bookings_scope("provider", request.user.id)])
+    @read_from_replica
     def get_provider_bookings(self, request):
         try:
             user = request.user
             booking_status = request.GET.get("status")
-            logged_in_user = User.objects.get(id=user.id)
 
-            if logged_in_user.user_type != "health_provider":
+            if user.user_type != "health_provider":
                 return Response(
                     convert_to_error_message(
                         "You are not authorized for this function"
@@ -684,6 +687,7 @@ class BookingViewSet(GenericViewSet):
                     "rejected",
                     "failed",
                     "succeeded",
+                    "cancelled",
                 ]
                 if booking_status not in status_choices:
                     return Response(
@@ -693,11 +697,11 @@ class BookingViewSet(GenericViewSet):
                         status=status.HTTP_400_BAD_REQUEST,
                     )
                 user_bookings = UserBookingDetails.objects.filter(
-                    practitioner=logged_in_user, status=booking_status
+                    practitioner_id=user.id, status=booking_status
                 )
             else:
                 user_bookings = UserBookingDetails.objects.filter(
-                    practitioner=logged_in_user
+                    practitioner_id=user.id
                 )
             return Response(
                 convert_to_success_message_serialized_data(
@@ -725,8 +729,7 @@ class BookingViewSet(GenericViewSet):
     def cancel_patient_booking(self, request):
         try:
             user = request.user
-            logged_in_user = User.objects.get(id=user.id)
-            if logged_in_user.user_type != "patient":
+            if user.user_type != "patient":
                 return Response(
                     convert_to_error_message(
                         "user is not authorized for this function"
@@ -755,8 +758,6 @@ class BookingViewSet(GenericViewSet):
 
             booking_details = booking_details.first()
             provider = booking_details.practitioner
-            booking_details.status = "failed"
-            booking_details.reason = serialized_input.validated_data["reason"]
 
             provider_criteria = PractitionerPracticeCriteria.objects.filter(
                 user=provider
@@ -771,21 +772,35 @@ class BookingViewSet(GenericViewSet):
 
             provider_criteria = provider_criteria.first()
 
-            # Add Timeframe back to provider datetime
-            get_bookings_timeframe = UserBookingRequestTimeFrame.objects.filter(
-                booking=booking_details,
-            )
-            if get_bookings_timeframe.exists():
-                get_bookings_timeframe = (
-                    get_bookings_timeframe.first().booking_timeframe
+            with transaction.atomic():
+                if not transition_booking(
+                    booking_details,
+                    "cancel",
+                    actor=user,
+                    reason=serialized_input.validated_data["reason"],
+                ):
+                    return Response(
+                        convert_to_error_message(
+                            f"The booking with id {booking_id} can not be cancelled"
+                        ),
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+                # Add Timeframe back to provider datetime
+                get_bookings_timeframe = UserBookingRequestTimeFrame.objects.filter(
+                    booking=booking_details,
                 )
-                for timeframe in get_bookings_timeframe:
-                    PractitionerAvailableDateTime.objects.create(
-                        provider_criteria=provider_criteria,
-                        available_date_time=timeframe,
+                if get_bookings_timeframe.exists():
+                    get_bookings_timeframe = (
+                        get_bookings_timeframe.first().booking_timeframe
                     )
+                    for timeframe in get_bookings_timeframe:
+                        PractitionerAvailableDateTime.objects.create(
+                            provider_criteria=provider_criteria,
+                            available_date_time=timeframe,
+                        )
+            bump_versions(availability_scope(provider.id), DIRECTORY_SCOPE)
 
-            booking_details.save()
             return Response(
                 convert_success_message("Booking has been cancelled"),
                 status=status.HTTP_200_OK,
@@ -803,8 +818,7 @@ class BookingViewSet(GenericViewSet):
     )
     def get_reschedule_available_time(self, request):
         try:
-            logged_in_user = User.objects.get(id=request.user.id)
-            if logged_in_user.user_type != "patient":
+            if request.user.user_type != "patient":
                 return Response(
                     convert_to_error_message(
                         "user is not authorized for this function"
@@ -881,7 +895,6 @@ class BookingViewSet(GenericViewSet):
                 convert_to_error_message(f"{err}"), status=status.HTTP_400_BAD_REQUEST
             )
 
-    @transaction.atomic()
     @action(
         methods=["POST"],
         detail=False,
@@ -890,8 +903,8 @@ class BookingViewSet(GenericViewSet):
     )
     def reschedule_patient_booking(self, request):
         try:
-            logged_in_user = User.objects.get(id=request.user.id)
-            if logged_in_user.user_type != "patient":
+            logged_in_user = request.user.instance
+            if request.user.user_type != "patient":
                 return Response(
                     convert_to_error_message(
                         "user is not authorized for this function"
@@ -944,56 +957,66 @@ class BookingViewSet(GenericViewSet):
 
             fullname = f"{decrypt(provider.first_name)} {decrypt(provider.last_name)}"
 
-            # Add Timeframe back to provider datetime
-            get_bookings_timeframe = UserBookingRequestTimeFrame.objects.filter(
-                booking=booking_details,
-            )
-            if get_bookings_timeframe.exists():
-                get_bookings_timeframe = (
-                    get_bookings_timeframe.first().booking_timeframe
+            with transaction.atomic():
+                date_time_care_is_needed = serialized_input.validated_data[
+                    "date_time_care_is_needed"
+                ]
+                if not transition_booking(
+                    booking_details,
+                    "reschedule",
+                    actor=logged_in_user,
+                    date_time_of_care=date_time_care_is_needed,
+                    date_care_is_needed=date_time_care_is_needed.date(),
+                ):
+                    return Response(
+                        convert_to_error_message(
+                            f"The booking with id {booking_id} can not be rescheduled"
+                        ),
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+                # Add Timeframe back to provider datetime
+                get_bookings_timeframe = UserBookingRequestTimeFrame.objects.filter(
+                    booking=booking_details,
                 )
-                for timeframe in get_bookings_timeframe:
-                    PractitionerAvailableDateTime.objects.create(
+                if get_bookings_timeframe.exists():
+                    get_bookings_timeframe = (
+                        get_bookings_timeframe.first().booking_timeframe
+                    )
+                    for timeframe in get_bookings_timeframe:
+                        PractitionerAvailableDateTime.objects.create(
+                            provider_criteria=provider_criteria,
+                            available_date_time=timeframe,
+                        )
+
+                booking_timeframe = (
+                    PractitionerAvailableDateTime.objects.filter(
                         provider_criteria=provider_criteria,
-                        available_date_time=timeframe,
+                        available_date_time__year=date_time_care_is_needed.year,
+                        available_date_time__month=date_time_care_is_needed.month,
+                        available_date_time__day=date_time_care_is_needed.day,
+                        available_date_time__hour=date_time_care_is_needed.hour,
                     )
+                    .values_list("available_date_time", flat=True)
+                    .distinct()
+                )
 
-            date_time_care_is_needed = serialized_input.validated_data[
-                "date_time_care_is_needed"
-            ]
-            booking_details.date_time_of_care = date_time_care_is_needed
-            booking_details.date_care_is_needed = date_time_care_is_needed.date()
+                # Add days been removed to the booking booking_timeframe
+                get_bookings_timeframe = UserBookingRequestTimeFrame.objects.filter(
+                    booking=booking_details,
+                ).first()
+                get_bookings_timeframe.booking_timeframe = list(booking_timeframe)
+                get_bookings_timeframe.save()
 
-            booking_timeframe = (
                 PractitionerAvailableDateTime.objects.filter(
                     provider_criteria=provider_criteria,
                     available_date_time__year=date_time_care_is_needed.year,
                     available_date_time__month=date_time_care_is_needed.month,
                     available_date_time__day=date_time_care_is_needed.day,
                     available_date_time__hour=date_time_care_is_needed.hour,
-                )
-                .values_list("available_date_time", flat=True)
-                .distinct()
-            )
+                ).delete()
 
-            # Add days been removed to the booking booking_timeframe
-            get_bookings_timeframe = UserBookingRequestTimeFrame.objects.filter(
-                booking=booking_details,
-            ).first()
-            get_bookings_timeframe.booking_timeframe = list(booking_timeframe)
-            get_bookings_timeframe.save()
-
-            booking_details.save()
-
-            PractitionerAvailableDateTime.objects.filter(
-                provider_criteria=provider_criteria,
-                available_date_time__year=date_time_care_is_needed.year,
-                available_date_time__month=date_time_care_is_needed.month,
-                available_date_time__day=date_time_care_is_needed.day,
-                available_date_time__hour=date_time_care_is_needed.hour,
-            ).delete()
-
-            booking_details.status = "pending"
+            bump_versions(availability_scope(provider.id), DIRECTORY_SCOPE)
 
             # try:
             subject = "Reschedule booking request"
@@ -1019,7 +1042,6 @@ class BookingViewSet(GenericViewSet):
             )
             message.content_subtype = "html"
             message.send(fail_silently=True)
-            booking_details.save()
 
             output_response = ListUserBookingsSerializer(booking_details)
             return Response(
@@ -1096,8 +1118,7 @@ class BookingViewSet(GenericViewSet):
     )
     def make_booking_payment(self, request):
         try:
-            logged_in_user = User.objects.get(id=request.user.id)
-            if logged_in_user.user_type != "health_provider":
+            if request.user.user_type != "health_provider":
                 return Response(
                     convert_to_error_message(
                         "user is not authorized for this function"
@@ -1112,7 +1133,7 @@ class BookingViewSet(GenericViewSet):
                 )
             booking_id = serialized_input.validated_data["booking_id"]
             booking_details = UserBookingDetails.objects.filter(
-                practitioner=logged_in_user, booking_id=booking_id
+                practitioner_id=request.user.id, id=booking_id
             )
             if not booking_details.exists():
                 return Response(
@@ -1120,40 +1141,64 @@ class BookingViewSet(GenericViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             booking_details = booking_details.first()
+            if not can_transition(booking_details, "payment_succeeded"):
+                return Response(
+                    convert_to_error_message(
+                        f"The booking with id {booking_id} is not accepted"
+                    ),
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
             # Check if patient has a card
             patient = booking_details.patient
-            user_card = UserCard.objects.filter(user=patient)
-            if not user_card.exists():
+            if not UserCard.objects.filter(user=patient).exists():
                 return Response(
                     convert_to_error_message(
-                        f"Patient {patient.first_name} {patient.last_name} does not have a card"
+                        f"Patient {decrypt(patient.first_name)} {decrypt(patient.last_name)} does not have a card"
                     ),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            user_card = user_card.first()
-
-            # Charge Patient Card
-            charge_card = StripeHelper.charge_payment_method(
-                customer_id=patient.id,
-                customer_email=patient.email,
-                pm_id=user_card.payment_method_id,
-                amount=booking_details.price_per_consultation,
-                currency="usd",
-            )
-            if not charge_card["status"]:
+
+            general_booking_details = GeneralBookingDetails.objects.first()
+            if general_booking_details is None:
                 return Response(
-                    convert_to_error_message(charge_card["message"]),
+                    convert_to_error_message("Consultation price is not set"),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            booking_details.status = "succeeded"
-            booking_details.save()
+            # the capture runs on a worker and the payment_intent webhook
+            # finalizes the booking, so a slow stripe call never blocks here
+            with transaction.atomic():
+                payment = (
+                    BookingPayment.objects.select_for_update()
+                    .filter(booking=booking_details)
+                    .first()
+                )
+                if payment is not None and payment.status != "failed":
+                    return Response(
+                        convert_to_success_message_serialized_data(
+                            BookingPaymentSerializer(payment).data
+                        ),
+                        status=status.HTTP_202_ACCEPTED,
+                    )
+                if payment is None:
+                    payment = BookingPayment(booking=booking_details)
+                payment.amount = general_booking_details.price_per_consultation
+                payment.status = "queued"
+                payment.error = None
+                payment.payment_intent_id = None
+                # a new key per attempt, worker retries of this attempt reuse it
+                payment.idempotency_key = f"booking-payment-{generate_id()}"
+                payment.save()
+                transaction.on_commit(
+                    lambda: capture_booking_payment.delay(str(payment.id))
+                )
+
             return Response(
                 convert_to_success_message_serialized_data(
-                    ListUserBookingsSerializer(booking_details)
+                    BookingPaymentSerializer(payment).data
                 ),
-                status=status.HTTP_200_OK,
+                status=status.HTTP_202_ACCEPTED,
             )
         except Exception as err:
             return Response(
@@ -0,0 +1,65 @@
+import json
+
+import stripe
+from django.conf import settings
+from django.db import transaction
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from booking.models import StripeWebhookEvent
+from booking.tasks import schedule_stripe_webhook_processing
+from booking.webhooks import get_event_partition
+from utility.helpers.functools import convert_success_message, convert_to_error_message
+
+
+@extend_schema(tags=["Webhook endpoints"])
+class StripeWebhookViewSet(GenericViewSet):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="stripe",
+        url_name="Stripe webhook",
+    )
+    def stripe_webhook(self, request):
+        # kept to a signature check and one INSERT, processing happens on a worker
+        payload = request.body
+        try:
+            stripe.WebhookSignature.verify_header(
+                payload.decode("utf-8"),
+                request.headers.get("Stripe-Signature"),
+                settings.STRIPE_WEBHOOK_SECRET,
+                tolerance=stripe.Webhook.DEFAULT_TOLERANCE,
+            )
+            event = json.loads(payload)
+        except (ValueError, stripe.error.SignatureVerificationError) as e:
+            return Response(
+                convert_to_error_message(f"{e}"), status=status.HTTP_400_BAD_REQUEST
+            )
+
+        object_id = event["data"]["object"].get("id")
+        partition = get_event_partition(object_id)
+        # a redelivered event hits the unique event_id and is dropped
+        StripeWebhookEvent.objects.bulk_create(
+            [
+                StripeWebhookEvent(
+                    event_id=event["id"],
+                    event_type=event["type"],
+                    object_id=object_id,
+                    stripe_created=event.get("created") or 0,
+                    partition=partition,
+                    payload=event,
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        transaction.on_commit(lambda: schedule_stripe_webhook_processing(partition))
+        return Response(
+            convert_success_message("Event received"), status=status.HTTP_200_OK
+        )
@@ -0,0 +1,125 @@
+import zlib
+
+from django.conf import settings
+from django.utils import timezone
+
+from authentication.models import UserCard
+
+from .models import BookingPayment
+from .state_machine import transition_booking
+
+PAYMENT_INTENT_EVENTS = {
+    "payment_intent.succeeded": "succeeded",
+    "payment_intent.payment_failed": "failed",
+}
+
+SETUP_INTENT_EVENTS = {
+    "setup_intent.succeeded": "succeeded",
+    "setup_intent.requires_action": "requires_action",
+    "setup_intent.setup_failed": "failed",
+    "setup_intent.canceled": "canceled",
+}
+
+
+def get_event_partition(object_id: str) -> int:
+    # stable across processes, unlike hash()
+    return zlib.crc32(f"{object_id}".encode()) % settings.STRIPE_WEBHOOK_PARTITIONS
+
+
+def apply_stripe_events(events: list):
+    """Applies a batch of stored events, ordered oldest first per object."""
+    apply_payment_intent_events(events)
+    apply_setup_intent_events(events)
+
+
+def is_current_attempt(payment: BookingPayment, intent: dict) -> bool:
+    """
+    Whether ``intent`` was created by the payment's current capture attempt.
+    Every attempt has its own idempotency key, sent in the intent metadata.
+    """
+    attempt_key = (intent.get("metadata") or {}).get("idempotency_key")
+    if attempt_key:
+        return attempt_key == payment.idempotency_key
+    # intents created before the key was sent in the metadata
+    return intent["id"] == payment.payment_intent_id
+
+
+def apply_payment_intent_events(events: list):
+    """
+    Finalizes booking payments from a batch of stored payment_intent events.
+
+    Events must be ordered oldest first. A succeeded payment is never moved
+    back to failed by a late failure event, and events of earlier attempts
+    of a retried payment are ignored.
+    """
+    events = [event for event in events if event.event_type in PAYMENT_INTENT_EVENTS]
+    payment_ids = set()
+    for event in events:
+        intent = event.payload["data"]["object"]
+        payment_id = (intent.get("metadata") or {}).get("booking_payment_id")
+        if payment_id:
+            payment_ids.add(payment_id)
+    if not payment_ids:
+        return
+
+    payments = {
+        str(payment.id): payment
+        for payment in BookingPayment.objects.select_related("booking").filter(
+            id__in=payment_ids
+        )
+    }
+    changed = {}
+    now = timezone.now()
+    for event in events:
+        intent = event.payload["data"]["object"]
+        payment_id = (intent.get("metadata") or {}).get("booking_payment_id")
+        payment = payments.get(payment_id)
+        if payment is None or payment.status == "succeeded":
+            continue
+        if not is_current_attempt(payment, intent):
+            # a late event of an earlier attempt must not touch the live one
+            continue
+
+        payment.status = PAYMENT_INTENT_EVENTS[event.event_type]
+        payment.payment_intent_id = intent["id"]
+        if payment.status == "failed":
+            last_error = intent.get("last_payment_error") or {}
+            payment.error = f"{last_error.get('message', 'Payment failed')}"[:800]
+        else:
+            payment.error = None
+        # bulk_update does not apply auto_now
+        payment.updated_at = now
+        changed[payment.id] = payment
+
+    if not changed:
+        return
+    BookingPayment.objects.bulk_update(
+        changed.values(), ["status", "payment_intent_id", "error", "updated_at"]
+    )
+    for payment in changed.values():
+        if not transition_booking(payment.booking, f"payment_{payment.status}"):
+            print(
+                f"booking {payment.booking_id} is {payment.booking.status}, "
+                f"payment {payment.status} not applied to it"
+            )
+
+
+def apply_setup_intent_events(events: list):
+    events = [event for event in events if event.event_type in SETUP_INTENT_EVENTS]
+    if not events:
+        return
+
+    cards = {}
+    for card in UserCard.objects.filter(
+        setup_id__in={event.object_id for event in events}
+    ):
+        cards.setdefault(card.setup_id, []).append(card)
+
+    changed = {}
+    for event in events:
+        for card in cards.get(event.object_id, []):
+            card.setup_status = SETUP_INTENT_EVENTS[event.event_type]
+            changed[card.id] = card
+
+    if changed:
+        UserCard.objects.bulk_update(changed.values(), ["setup_status"])
@@ -1,10 +1,15 @@
-from rest_framework.routers import DefaultRouter, SimpleRouter
 from django.conf import settings
+from django.urls import path
+from rest_framework.routers import DefaultRouter, SimpleRouter
+
+from authentication.views.async_patient_views import verify_user_card
 from authentication.views.patient_authentication_views import (
     PatientAuthenticationViewSet,
 )
 from authentication.views.provider_authentication_views import PractionerViewSet
+from booking.views.async_booking_views import booking_events, booking_request
 from booking.views.booking_views import BookingViewSet
+from booking.views.stripe_webhook_views import StripeWebhookViewSet
 
 if settings.DEBUG:
     router = DefaultRouter()
@@ -29,5 +34,32 @@ router.register(
     basename="booking viewsets",
 )
 
+router.register(
+    "webhooks",
+    StripeWebhookViewSet,
+    basename="webhook viewsets",
+)
+
 app_name = "api"
-urlpatterns = router.urls
+# async versions of the endpoints that mostly wait on third-party APIs, and the
+# booking event stream, they only run concurrently when served through
+# config.asgi. The event stream answers 400 under WSGI
+async_urlpatterns = [
+    path(
+        "async/authentication/verify_user_card/",
+        verify_user_card,
+        name="async verify user card",
+    ),
+    path(
+        "async/bookings/booking_request/",
+        booking_request,
+        name="async booking request",
+    ),
+    path(
+        "async/bookings/events/",
+        booking_events,
+        name="booking events",
+    ),
+]
+
+urlpatterns = router.urls + async_urlpatterns
@@ -9,9 +9,12 @@ https://docs.djangoproject.com/en/3.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.0/ref/settings/
 """
+
 import datetime
 import os
+import sys
 
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -68,7 +71,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "drf_api_logger.middleware.api_logger_middleware.APILoggerMiddleware",
+    "authentication.api_logging.BufferedAPILoggerMiddleware",
+    "utility.db.replicas.ReplicaStickinessMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -93,7 +97,8 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # request.user comes from the token claims, see authentication.tokens
+        "authentication.tokens.RevocableJWTAuthentication",
         "rest_framework.authentication.TokenAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
@@ -114,6 +119,97 @@ REST_FRAMEWORK = {
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Redis is shared by every gunicorn and celery worker, the local memory cache
+# is only used when REDIS_URL is not set (local development).
+
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
+# proxies in front of the app that append to X-Forwarded-For, 0 when the
+# app is reached directly and REMOTE_ADDR is the client
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", 0))
+
+# OTP SETUP
+# codes live in the cache, lifetimes are in seconds
+OTP_VERIFICATION_TTL = int(os.getenv("OTP_VERIFICATION_TTL", 72 * 60 * 60))
+OTP_PASSWORD_RESET_TTL = int(os.getenv("OTP_PASSWORD_RESET_TTL", 4 * 60 * 60))
+# failed confirmations allowed per client and per email, phone number or
+# user within the window
+OTP_MAX_FAILED_ATTEMPTS = int(os.getenv("OTP_MAX_FAILED_ATTEMPTS", 10))
+OTP_MAX_SUBJECT_FAILED_ATTEMPTS = int(os.getenv("OTP_MAX_SUBJECT_FAILED_ATTEMPTS", 5))
+OTP_FAILED_ATTEMPTS_WINDOW = int(os.getenv("OTP_FAILED_ATTEMPTS_WINDOW", 15 * 60))
+# also write issued (not yet verified) codes to the database for auditing
+OTP_AUDIT_ISSUED_CODES = os.getenv("OTP_AUDIT_ISSUED_CODES", "False") == "True"
+
+
+# CELERY SETUP
+# pVerify jobs and stripe payment work run on their own queues so their
+# concurrency can be capped, e.g.
+# celery -A config worker -Q pverify --concurrency=4
+# celery -A config worker -Q payments --concurrency=4
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
+# without a broker (local development) tasks run inline
+CELERY_TASK_ALWAYS_EAGER = not CELERY_BROKER_URL
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ROUTES = {
+    "authentication.tasks.run_insurance_verification_job": {"queue": "pverify"},
+    "booking.tasks.capture_booking_payment": {"queue": "payments"},
+    "booking.tasks.process_stripe_webhook_events": {"queue": "payments"},
+    "booking.tasks.requeue_stale_booking_payments": {"queue": "payments"},
+    "booking.tasks.run_provider_payouts_task": {"queue": "payments"},
+    "booking.tasks.recover_stale_payouts_task": {"queue": "payments"},
+}
+CELERY_TASK_ANNOTATIONS = {
+    "authentication.tasks.run_insurance_verification_job": {
+        "rate_limit": os.getenv("PVERIFY_JOB_RATE_LIMIT", "30/m"),
+    },
+}
+# run with celery -A config beat
+CELERY_BEAT_SCHEDULE = {
+    "provider-payouts": {
+        "task": "booking.tasks.run_provider_payouts_task",
+        # every monday at 06:00 UTC by default
+        "schedule": crontab(
+            minute=0,
+            hour=os.getenv("PAYOUT_HOUR", "6"),
+            day_of_week=os.getenv("PAYOUT_DAY_OF_WEEK", "mon"),
+        ),
+    },
+    "recover-stale-payouts": {
+        "task": "booking.tasks.recover_stale_payouts_task",
+        "schedule": crontab(minute="*/15"),
+    },
+    "requeue-stale-booking-payments": {
+        "task": "booking.tasks.requeue_stale_booking_payments",
+        "schedule": crontab(minute="*/5"),
+    },
+    "requeue-stale-insurance-verification-jobs": {
+        "task": "authentication.tasks.requeue_stale_insurance_verification_jobs",
+        "schedule": crontab(minute="*/5"),
+    },
+    "api-log-rollup": {
+        "task": "authentication.tasks.rollup_api_logs_task",
+        "schedule": crontab(minute=30, hour=os.getenv("API_LOG_ROLLUP_HOUR", "3")),
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -135,11 +231,25 @@ AUTH_PASSWORD_VALIDATORS = [
 # password Hashers
 PASSWORD_HASHERS = [
     # https://docs.djangoproject.com/en/dev/topics/auth/passwords/#using-argon2-with-django
-    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "authentication.hashers.CalibratedArgon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
 ]
+# pick these with `manage.py calibrate_argon2` on production hardware, hashes
+# made with other values are upgraded on the next login
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 2))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 102400))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 8))
+# password checks run at once per process, and how many more may wait
+PASSWORD_HASHING_MAX_WORKERS = int(
+    os.getenv("PASSWORD_HASHING_MAX_WORKERS", os.cpu_count() or 2)
+)
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv("PASSWORD_HASHING_MAX_PENDING", 32))
+PASSWORD_HASHING_WAIT_TIMEOUT = float(os.getenv("PASSWORD_HASHING_WAIT_TIMEOUT", 2))
+# last_login is written in batches instead of on every login
+LAST_LOGIN_BUFFER_SIZE = int(os.getenv("LAST_LOGIN_BUFFER_SIZE", 100))
+LAST_LOGIN_FLUSH_INTERVAL = int(os.getenv("LAST_LOGIN_FLUSH_INTERVAL", 30))
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
@@ -170,17 +280,32 @@ AUTH_USER_MODEL = "authentication.User"
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": datetime.timedelta(days=2),
     "REFRESH_TOKEN_LIFETIME": datetime.timedelta(days=2),
-    "UPDATE_LAST_LOGIN": True,
+    "UPDATE_LAST_LOGIN": False,
     "AUTH_HEADER_TYPES": ("JWT"),
     "AUTH_HEADER_NAME": "HTTP_AUTHORIZATION",
     "SIGNING_KEY": SECRET_KEY,
+    "TOKEN_USER_CLASS": "authentication.tokens.RequestUser",
 }
 
 # DRF-API-LOGGER
+# stays True only because drf_api_logger defines APILogsModel and registers
+# its admin behind this flag. BufferedAPILoggerMiddleware turns the database
+# sink off, so the library's own insert_log_into_database thread, still
+# started in every process, just idles
 DRF_API_LOGGER_DATABASE = True
 DRF_API_LOGGER_SIGNAL = True
 DRF_API_LOGGER_EXCLUDE_KEYS = ["password", "token", "access", "refresh"]
 DRF_API_LOGGER_STATUS_CODES = [400, 403, 404, 429, 500]
+# entries are written in batches by authentication.api_logging.api_log_buffer,
+# past API_LOG_SAMPLE_ABOVE queued entries only API_LOG_SAMPLE_RATE of the
+# non 5xx ones are kept and at API_LOG_BUFFER_SIZE new ones are dropped
+API_LOG_BUFFER_SIZE = int(os.getenv("API_LOG_BUFFER_SIZE", 5000))
+API_LOG_BATCH_SIZE = int(os.getenv("API_LOG_BATCH_SIZE", 500))
+API_LOG_FLUSH_INTERVAL = float(os.getenv("API_LOG_FLUSH_INTERVAL", 5))
+API_LOG_SAMPLE_ABOVE = int(os.getenv("API_LOG_SAMPLE_ABOVE", 2500))
+API_LOG_SAMPLE_RATE = float(os.getenv("API_LOG_SAMPLE_RATE", 0.1))
+# raw logs older than this are folded into APILogRollup and deleted
+API_LOG_RETENTION_DAYS = int(os.getenv("API_LOG_RETENTION_DAYS", 30))
 
 # Django spectacular setup
 SPECTACULAR_SETTINGS = {
@@ -205,7 +330,7 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = str(f"{APPS_DIR}/ media")
 
 # SENGRID SETUP
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = "utility.services.email.SMTPEmailBackend"
 EMAIL_HOST = "smtp.sendgrid.net"
 EMAIL_HOST_USER = "apikey"  # this is exactly the value 'apikey'
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
@@ -223,6 +348,23 @@ TWILIO_NUMBER = os.getenv("MY_TWILIO_NUMBER")
 STRIPE_TEST_SECRET_KEY = os.getenv("STRIPE_TEST_SECRET_KEY")
 STRIPE_TEST_PUBLIC_KEY = os.getenv("STRIPE_TEST_PUBLIC_KEY")
 STRIPE_TEST_API_KEY = os.getenv("STRIPE_TEST_API_KEY")
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+# stored webhook events applied per database transaction
+STRIPE_WEBHOOK_BATCH_SIZE = int(os.getenv("STRIPE_WEBHOOK_BATCH_SIZE", 100))
+# events are sharded by object so partitions can be processed in parallel
+STRIPE_WEBHOOK_PARTITIONS = int(os.getenv("STRIPE_WEBHOOK_PARTITIONS", 4))
+# a burst of events within this window is drained by a single task
+STRIPE_WEBHOOK_DEBOUNCE_SECONDS = int(os.getenv("STRIPE_WEBHOOK_DEBOUNCE_SECONDS", 1))
+# failed applications of an event before it is skipped for good
+STRIPE_WEBHOOK_MAX_ATTEMPTS = int(os.getenv("STRIPE_WEBHOOK_MAX_ATTEMPTS", 5))
+# a capture queued or processing this long without an intent is assumed lost
+# with its worker and queued again, longer than any retry countdown
+BOOKING_PAYMENT_STALE_SECONDS = int(os.getenv("BOOKING_PAYMENT_STALE_SECONDS", 900))
+# provider payouts run transfers in parallel, below stripe's API rate limit
+PAYOUT_MAX_WORKERS = int(os.getenv("PAYOUT_MAX_WORKERS", 8))
+PAYOUT_TRANSFERS_PER_SECOND = float(os.getenv("PAYOUT_TRANSFERS_PER_SECOND", 20))
+# a payout processing this long is assumed lost with its run and recovered
+PAYOUT_STALE_SECONDS = int(os.getenv("PAYOUT_STALE_SECONDS", 3600))
 
 # ZIP CODE API SETUP
 ZIP_CODE_API_BASE_URL = os.getenv("ZIP_CODE_API_BASE_URL")
@@ -232,6 +374,78 @@ ZIP_CODE_API_TEST_API_KEY = os.getenv("ZIP_CODE_API_TEST_API_KEY")
 PVERIFY_API_BASE_URL = os.getenv("PVERIFY_BASE_URL")
 PVERIFY_API_CLIENT_SECRET = os.getenv("PVERIFY_CLIENT_SECRET")
 PVERIFY_API_CLIENT_ID = os.getenv("PVERIFY_CLIENT_ID")
+# seconds before expiry a cached token is treated as expired
+PVERIFY_TOKEN_REFRESH_MARGIN = int(os.getenv("PVERIFY_TOKEN_REFRESH_MARGIN", 60))
+# seconds before expiry a cached token is refreshed in the background
+PVERIFY_TOKEN_REFRESH_AHEAD = int(os.getenv("PVERIFY_TOKEN_REFRESH_AHEAD", 300))
+# an insurance verification job running this long is assumed lost with its
+# worker and queued again, well past the pVerify timeouts and retries
+INSURANCE_VERIFICATION_STALE_SECONDS = int(
+    os.getenv("INSURANCE_VERIFICATION_STALE_SECONDS", 600)
+)
+
+# THIRD PARTY API RESILIENCE SETUP
+# what happens when an external call is made inside an open transaction,
+# "raise" fails the tests, "warn" or "ignore" elsewhere
+EXTERNAL_CALL_IN_TRANSACTION = os.getenv(
+    "EXTERNAL_CALL_IN_TRANSACTION",
+    "raise" if "pytest" in sys.modules or sys.argv[1:2] == ["test"] else "warn",
+)
+# timeouts are in seconds, no outbound call should wait on an upstream forever
+EXTERNAL_API_TIMEOUT = int(os.getenv("EXTERNAL_API_TIMEOUT", 10))
+PVERIFY_API_TIMEOUT = int(os.getenv("PVERIFY_API_TIMEOUT", 20))
+STRIPE_API_TIMEOUT = int(os.getenv("STRIPE_API_TIMEOUT", 20))
+# per-dependency overrides of utility.services.circuit_breaker defaults
+CIRCUIT_BREAKERS = {
+    "default": {
+        "failure_rate_threshold": 50,
+        "minimum_calls": 10,
+        "window_seconds": 60,
+        "open_seconds": 30,
+        "max_concurrent_calls": 10,
+    },
+    "pverify": {"max_concurrent_calls": 5},
+    "stripe": {"max_concurrent_calls": 20},
+}
+
+# DATABASE CONNECTION POOL SETUP
+# per-process pool of the utility.db.postgresql_pool backend, sizes are per
+# gunicorn/celery worker process and times are in seconds
+DATABASE_POOL = {
+    "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", 1)),
+    "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", 10)),
+    # how long a request waits for a free connection before failing
+    "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", 5)),
+    "max_lifetime": int(os.getenv("DATABASE_POOL_MAX_LIFETIME", 1800)),
+    "max_idle": int(os.getenv("DATABASE_POOL_MAX_IDLE", 300)),
+    # connections idle longer than this are checked before being handed out
+    "health_check_after": int(os.getenv("DATABASE_POOL_HEALTH_CHECK_AFTER", 30)),
+}
+# seconds between the per-process pool and circuit breaker stats printed to
+# the logs, 0 turns them off
+STATS_REPORT_INTERVAL = int(os.getenv("STATS_REPORT_INTERVAL", 60))
+# views marked read_from_replica read from the "replica" database when set
+DATABASE_ROUTERS = ["utility.db.replicas.ReplicaRouter"]
+# seconds a user's reads stay on the primary after one of their writes
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+# seconds a rendered page of the public provider directory is kept, pages are
+# dropped sooner by any provider profile, qualification or availability change
+PROVIDER_DIRECTORY_CACHE_TIMEOUT = int(
+    os.getenv("PROVIDER_DIRECTORY_CACHE_TIMEOUT", 3600)
+)
+
+# BOOKING EVENTS SETUP
+# "postgres" sends booking events through LISTEN/NOTIFY to the streams of every
+# ASGI process, "local" only reaches streams of the process making the change.
+# Unset, it is "postgres" on a PostgreSQL database and "local" otherwise
+BOOKING_EVENTS_BACKEND = os.getenv("BOOKING_EVENTS_BACKEND")
+# events held for a slow stream before it is told to resync
+BOOKING_EVENTS_QUEUE_SIZE = int(os.getenv("BOOKING_EVENTS_QUEUE_SIZE", 100))
+# seconds between keepalive comments on an idle stream
+BOOKING_EVENTS_KEEPALIVE = int(os.getenv("BOOKING_EVENTS_KEEPALIVE", 15))
+# streams are closed after this many seconds and the client reconnects
+BOOKING_EVENTS_STREAM_SECONDS = int(os.getenv("BOOKING_EVENTS_STREAM_SECONDS", 300))
 
 # S3 BUCKET SETUP
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
@@ -3,8 +3,33 @@ import dj_database_url
 
 from .base import *
 
-DATABASES = {
-    "default": dj_database_url.parse(os.getenv("DATABASE_URL"), conn_max_age=600)
-}
-DATABASES["default"]["ATOMIC_REQUESTS"] = True
+
+def database_from_url(url: str) -> dict:
+    # postgres connections come from a bounded per-process pool and go back to
+    # it at the end of every request (CONN_MAX_AGE 0) instead of staying open
+    # per thread
+    database = dj_database_url.parse(url, conn_max_age=0)
+    if database["ENGINE"] == "django.db.backends.postgresql":
+        database.update(ENGINE="utility.db.postgresql_pool", POOL=DATABASE_POOL)
+    return database
+
+
+# no ATOMIC_REQUESTS, views open short transaction.atomic() blocks around their
+# writes so stripe, pVerify and email calls never hold a transaction open
+DATABASES = {"default": database_from_url(os.getenv("DATABASE_URL"))}
+# optional read replica, locally any second database migrated with
+# `migrate --database=replica` will do
+if os.getenv("DATABASE_REPLICA_URL"):
+    DATABASES["replica"] = {
+        **database_from_url(os.getenv("DATABASE_REPLICA_URL")),
+        "TEST": {"MIRROR": "default"},
+    }
 ENCRYPT_KEY = os.getenv("STAGING_ENCRYPT_KEY")
+# comma separated keys older data may still be encrypted with, they decrypt
+# but never encrypt. Drop them once `manage.py rotate_encryption_keys` is done
+ENCRYPT_OLD_KEYS = [
+    key for key in os.getenv("STAGING_ENCRYPT_OLD_KEYS", "").split(",") if key
+]
+# HMAC key of the blind indexes, required and separate from SECRET_KEY.
+# Changing it needs `manage.py rebuild_blind_indexes`
+BLIND_INDEX_KEY = os.getenv("STAGING_BLIND_INDEX_KEY")
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"no {name} database connection became free within {timeout}s")
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections for one process.
+
+    At most ``max_size`` connections are open at once, callers beyond that
+    wait up to ``timeout`` seconds for one to be returned. A connection idle
+    for ``health_check_after`` seconds is checked with ``SELECT 1`` before it
+    is handed out, and connections are replaced after ``max_lifetime``
+    seconds. Idle connections above ``min_size`` are closed after
+    ``max_idle`` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 5,
+        max_lifetime: float = 1800,
+        max_idle: float = 300,
+        health_check_after: float = 30,
+    ):
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self._cond = threading.Condition()
+        # (connection, returned_at), the most recently returned one is reused
+        # first so the extra connections can go idle and be closed
+        self._idle = deque()
+        self._opened_at = {}
+        self._size = 0
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "discarded": 0,
+        }
+
+    def getconn(self, connect):
+        """
+        Returns a pooled connection, or a new one from ``connect()`` while the
+        pool is below ``max_size``.
+        """
+        started_at = time.monotonic()
+        deadline = started_at + self.timeout
+        waited = False
+        while True:
+            with self._cond:
+                self._close_idle()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(self.name, self.timeout)
+                    waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                else:
+                    connection, returned_at = None, None
+                    self._size += 1
+
+            if connection is None:
+                try:
+                    connection = connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                self._opened_at[connection] = time.monotonic()
+            elif not self._is_healthy(connection, returned_at):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                self._discard(connection)
+                continue
+
+            self._record_checkout(started_at, waited)
+            return connection
+
+    def putconn(self, connection):
+        """Takes a connection back, rolling back whatever it left open."""
+        if connection not in self._opened_at:
+            # opened by another process or before a reset, not ours to keep
+            self._close_quietly(connection)
+            return
+        try:
+            healthy = not connection.closed and not self._is_expired(connection)
+            if healthy and connection.info.transaction_status != 0:
+                connection.rollback()
+        except Exception:
+            healthy = False
+
+        if not healthy:
+            self._discard(connection)
+            return
+        with self._cond:
+            self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+                **self._stats,
+                "wait_ms_total": round(self._stats["wait_ms_total"], 1),
+                "wait_ms_max": round(self._stats["wait_ms_max"], 1),
+            }
+
+    def _record_checkout(self, started_at: float, waited: bool):
+        wait_ms = (time.monotonic() - started_at) * 1000
+        with self._cond:
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["wait_ms_total"] += wait_ms
+            self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], wait_ms)
+
+    def _is_expired(self, connection) -> bool:
+        return time.monotonic() - self._opened_at[connection] > self.max_lifetime
+
+    def _is_healthy(self, connection, returned_at: float) -> bool:
+        if connection.closed or self._is_expired(connection):
+            return False
+        if time.monotonic() - returned_at < self.health_check_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not connection.autocommit:
+                connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close_idle(self):
+        # called with the lock held, the oldest idle connections are on the left
+        now = time.monotonic()
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] > self.max_idle
+        ):
+            connection, _ = self._idle.popleft()
+            self._forget(connection)
+            self._close_quietly(connection)
+
+    def _discard(self, connection):
+        with self._cond:
+            self._forget(connection)
+            self._cond.notify()
+        self._close_quietly(connection)
+
+    def _forget(self, connection):
+        self._opened_at.pop(connection, None)
+        self._size -= 1
+        self._stats["discarded"] += 1
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
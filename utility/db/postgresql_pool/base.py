@@ -0,0 +1,66 @@
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from utility.db.pool import ConnectionPool, PoolTimeout
+from utility.helpers.stats_reporter import stats_reporter
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, conn_params: dict, pool_settings: dict) -> ConnectionPool:
+    # one pool per process and connection target, the test runner points the
+    # same alias at another database
+    key = (os.getpid(), alias, repr(sorted(conn_params.items())))
+    with _pools_lock:
+        if key not in _pools:
+            name = f"{alias}:{conn_params.get('dbname', '')}"
+            _pools[key] = ConnectionPool(name, **pool_settings)
+            # checkout and wait-time counters, see ConnectionPool.stats
+            stats_reporter.register("database pool", get_pool_stats)
+        return _pools[key]
+
+
+def get_pool_stats() -> dict:
+    pid = os.getpid()
+    return {pool.name: pool.stats() for key, pool in _pools.items() if key[0] == pid}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The postgresql backend with connections taken from a ConnectionPool,
+    configured by the ``POOL`` entry of the database settings. Closing the
+    connection, as Django does at the end of each request when CONN_MAX_AGE
+    is 0, hands it back to the pool instead.
+    """
+
+    _pool = None
+
+    def get_new_connection(self, conn_params):
+        self._pool = get_pool(
+            self.alias, conn_params, self.settings_dict.get("POOL", {})
+        )
+        try:
+            connection = self._pool.getconn(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+            )
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+        # set by the parent only for connections it opens
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self._pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            self._pool.putconn(self.connection)
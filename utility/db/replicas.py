@@ -0,0 +1,84 @@
+import contextvars
+import functools
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = "replica"
+
+_read_from_replica = contextvars.ContextVar("read_from_replica", default=False)
+
+
+def _primary_pin_key(user_id) -> str:
+    return f"db:read-primary:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """
+    Sends the user's replica reads to the primary for REPLICA_STICKY_SECONDS,
+    so they see their own writes while the replica catches up.
+    """
+    cache.set(_primary_pin_key(user_id), True, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned_to_primary(user_id) -> bool:
+    return bool(cache.get(_primary_pin_key(user_id)))
+
+
+def read_from_replica(view):
+    """
+    Marks a read-only view action, its queries go to the replica unless the
+    user made a change within the last REPLICA_STICKY_SECONDS.
+    """
+
+    @functools.wraps(view)
+    def wrapper(viewset, request, *args, **kwargs):
+        user = request.user
+        if user.is_authenticated and is_pinned_to_primary(user.id):
+            return view(viewset, request, *args, **kwargs)
+        token = _read_from_replica.set(True)
+        try:
+            return view(viewset, request, *args, **kwargs)
+        finally:
+            _read_from_replica.reset(token)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Reads inside ``read_from_replica`` views go to the replica when one is
+    configured, everything else, and every write, goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and REPLICA_DB_ALIAS in settings.DATABASES:
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # rows read from the replica would otherwise be saved back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaStickinessMiddleware:
+    """Pins users to the primary after a successful write request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, "user", None)
+        if (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            and response.status_code < 400
+            and user is not None
+            and user.is_authenticated
+        ):
+            pin_to_primary(user.id)
+        return response
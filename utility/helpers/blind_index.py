@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.utils.crypto import salted_hmac
+
+# encrypted user fields that can be searched without decrypting
+BLIND_INDEXED_FIELDS = ("first_name", "last_name", "address", "city")
+
+# word prefixes shorter than this are only indexed when they are a whole
+# word, longer search words are matched on their first MAX characters
+MIN_PREFIX_LENGTH = 3
+MAX_PREFIX_LENGTH = 12
+
+BLIND_INDEX_LENGTH = 32
+
+
+def normalize(value: str) -> str:
+    return " ".join(value.split()).lower()
+
+
+def blind_index(field: str, value: str, kind: str = "exact") -> str:
+    """
+    Keyed HMAC of a plaintext value. The field and kind are part of the key,
+    so equal values in different fields or index kinds give unrelated tokens.
+    """
+    # no fallback to SECRET_KEY, rotating it would silently break every index
+    if not settings.BLIND_INDEX_KEY:
+        raise ImproperlyConfigured("BLIND_INDEX_KEY is not set")
+    return salted_hmac(
+        f"blind-index:{field}:{kind}",
+        value,
+        secret=settings.BLIND_INDEX_KEY,
+        algorithm="sha256",
+    ).hexdigest()[:BLIND_INDEX_LENGTH]
+
+
+def _word_prefixes(word: str) -> range:
+    return range(
+        min(MIN_PREFIX_LENGTH, len(word)), min(len(word), MAX_PREFIX_LENGTH) + 1
+    )
+
+
+def prefix_indexes(field: str, value: str) -> set:
+    """Tokens of every indexed prefix of every word of ``value``."""
+    return {
+        blind_index(field, word[:length], kind="prefix")
+        for word in normalize(value).split()
+        for length in _word_prefixes(word)
+    }
+
+
+def blind_index_values(plaintexts: dict) -> dict:
+    """
+    Model field values for ``{field: plaintext}``, an exact index column per
+    field plus the shared ``pii_prefix_bidx`` array of word prefix tokens.
+    """
+    values = {"pii_prefix_bidx": set()}
+    for field, plaintext in plaintexts.items():
+        if plaintext:
+            values[f"{field}_bidx"] = blind_index(field, normalize(plaintext))
+            values["pii_prefix_bidx"] |= prefix_indexes(field, plaintext)
+        else:
+            values[f"{field}_bidx"] = None
+    values["pii_prefix_bidx"] = sorted(values["pii_prefix_bidx"])
+    return values
+
+
+def exact_match(field: str, value: str) -> Q:
+    """Users whose ``field`` equals ``value``, ignoring case and spacing."""
+    return Q(**{f"{field}_bidx": blind_index(field, normalize(value))})
+
+
+def prefix_match(search_term: str, fields=BLIND_INDEXED_FIELDS) -> Q:
+    """
+    Users with a word starting with each word of ``search_term`` in any of
+    ``fields``, e.g. "joh smi" finds John Smith. Search words shorter than
+    MIN_PREFIX_LENGTH only match whole words, "li" finds Li but not Lisa and
+    "jo smi" does not find John Smith. Words longer than MAX_PREFIX_LENGTH
+    may also match names that only share that prefix.
+    """
+    query = Q()
+    for word in normalize(search_term).split():
+        tokens = [
+            blind_index(field, word[:MAX_PREFIX_LENGTH], kind="prefix")
+            for field in fields
+        ]
+        query &= Q(pii_prefix_bidx__overlap=tokens)
+    return query
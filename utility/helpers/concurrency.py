@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+from django.db import connections
+
+
+class Call:
+    """A function call for ``run_concurrently``, with its own optional timeout."""
+
+    def __init__(self, func, *args, timeout: float = None, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.name = getattr(func, "__qualname__", repr(func))
+
+    def __call__(self):
+        try:
+            return self.func(*self.args, **self.kwargs)
+        finally:
+            # worker threads would otherwise each keep a database connection
+            connections.close_all()
+
+
+def run_concurrently(*calls, timeout: float = None) -> list:
+    """
+    Runs independent calls at the same time on short-lived threads and returns
+    their results in order, so the caller waits for the slowest call instead
+    of the sum of all of them.
+
+    ``calls`` are ``Call`` objects or plain callables taking no arguments.
+    The first exception is raised as soon as it happens. A call still running
+    past its own timeout or past ``timeout`` raises TimeoutError. Either way
+    calls not started yet are cancelled. Calls already running are abandoned
+    and their results dropped, since threads cannot be interrupted.
+
+    Database queries in a call run on another connection and do not see
+    uncommitted writes of the caller's transaction.
+    """
+    calls = [call if isinstance(call, Call) else Call(call) for call in calls]
+    started_at = time.monotonic()
+    executor = ThreadPoolExecutor(
+        max_workers=max(len(calls), 1), thread_name_prefix="run-concurrently"
+    )
+    futures = [executor.submit(call) for call in calls]
+    deadlines = {}
+    for call, future in zip(calls, futures):
+        call_timeouts = [t for t in (call.timeout, timeout) if t is not None]
+        deadlines[future] = (
+            started_at + min(call_timeouts) if call_timeouts else None,
+            call,
+        )
+
+    try:
+        pending = set(futures)
+        while pending:
+            pending_deadlines = [
+                deadlines[future][0]
+                for future in pending
+                if deadlines[future][0] is not None
+            ]
+            wait_for = (
+                max(min(pending_deadlines) - time.monotonic(), 0)
+                if pending_deadlines
+                else None
+            )
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_EXCEPTION)
+            for future in done:
+                if future.exception() is not None:
+                    raise future.exception()
+
+            now = time.monotonic()
+            for future in pending:
+                deadline, call = deadlines[future]
+                if deadline is not None and deadline <= now:
+                    raise TimeoutError(
+                        f"{call.name} did not finish within {deadline - started_at:.1f}s"
+                    )
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
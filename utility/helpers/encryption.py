@@ -0,0 +1,56 @@
+import base64
+import functools
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from django.conf import settings
+
+
+@functools.lru_cache(maxsize=4)
+def _fernet(keys: tuple) -> MultiFernet:
+    return MultiFernet([Fernet(key.encode()) for key in keys])
+
+
+def get_fernet() -> MultiFernet:
+    # ENCRYPT_KEY encrypts, it and the old keys decrypt
+    return _fernet((settings.ENCRYPT_KEY, *settings.ENCRYPT_OLD_KEYS))
+
+
+def encrypt(txt):
+    try:
+        # convert integer etc to string first
+        txt = str(txt)
+        # #input should be byte, so convert the text to byte
+        encrypted_text = get_fernet().encrypt(txt.encode("ascii"))
+        # encode to urlsafe base64 format
+        encrypted_text = base64.urlsafe_b64encode(encrypted_text).decode("ascii")
+        return encrypted_text
+    except Exception as e:
+        # log the error if any
+        print("encrypt error", e)
+        return None
+
+
+def decrypt(txt):
+    try:
+        # base64 decode
+        txt = base64.urlsafe_b64decode(txt)
+        decoded_text = get_fernet().decrypt(txt).decode("ascii")
+        return decoded_text
+    except Exception as e:
+        # log the error
+        print("decrypt error", e)
+        return None
+
+
+def rotate(txt: str) -> str:
+    """
+    Returns ``txt`` re-encrypted with ENCRYPT_KEY, or ``txt`` itself when it
+    already is. Raises InvalidToken when no configured key decrypts it.
+    """
+    token = base64.urlsafe_b64decode(txt)
+    try:
+        _fernet((settings.ENCRYPT_KEY,)).decrypt(token)
+        return txt
+    except InvalidToken:
+        pass
+    return base64.urlsafe_b64encode(get_fernet().rotate(token)).decode("ascii")
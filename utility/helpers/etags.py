@@ -0,0 +1,133 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+# profiles and availability of providers, shown in the provider directory,
+# bumped by provider changes only. Booking lists show profiles too, a user's
+# profile change bumps the bookings scopes of the users they have bookings with
+DIRECTORY_SCOPE = "directory"
+
+
+def bookings_scope(role: str, user_id) -> str:
+    return f"bookings:{role}:{user_id}"
+
+
+def availability_scope(provider_id) -> str:
+    return f"availability:{provider_id}"
+
+
+def _version_key(scope: str) -> str:
+    return f"etag-version:{scope}"
+
+
+def bump_versions(*scopes):
+    """
+    Marks data in ``scopes`` as changed. A version is the time of the last
+    change, so an evicted one comes back as a new version, never an old one.
+    """
+    now = time.time_ns()
+    cache.set_many({_version_key(scope): now for scope in scopes}, timeout=None)
+
+
+def get_versions(scopes: list) -> list:
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = time.time_ns()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 0) for key in keys]
+
+
+def _settled(versions: list) -> bool:
+    # right after a change the replica may still serve the old rows, tagging
+    # or caching them under the new version would keep them for good
+    return all(
+        time.time_ns() - version > settings.REPLICA_STICKY_SECONDS * 10**9
+        for version in versions
+    )
+
+
+def _settles_in(versions: list) -> int:
+    """Whole seconds until ``_settled(versions)``, 0 once it is."""
+    age = (time.time_ns() - max(versions, default=0)) / 10**9
+    return max(0, math.ceil(settings.REPLICA_STICKY_SECONDS - age))
+
+
+def conditional_get(get_scopes, vary_every: int = None):
+    """
+    ETag support for a list view action. ``get_scopes(request)`` returns the
+    version scopes the response depends on, writers call ``bump_versions``.
+
+    A matching If-None-Match is answered with 304 before the view runs.
+    ``vary_every`` adds a time bucket of that many seconds, for responses
+    that also change as time passes.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(viewset, request, *args, **kwargs):
+            versions = get_versions(get_scopes(request))
+            parts = [*versions, request.get_full_path(), request.user.id]
+            if vary_every:
+                parts.append(int(time.time()) // vary_every)
+            etag = f'"{hashlib.sha1(repr(parts).encode()).hexdigest()}"'
+
+            if etag in request.headers.get("If-None-Match", ""):
+                return Response(
+                    status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+                )
+
+            response = view(viewset, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and _settled(versions):
+                response["ETag"] = etag
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def cached_response(get_scopes, timeout: int, query_params=(), vary_every: int = None):
+    """
+    Shared cache of the rendered JSON of a view action that returns the same
+    data to every caller. Entries are keyed by the versions of
+    ``get_scopes(request)`` and the given query parameters, so a bump makes
+    the old entries unreachable and they expire after ``timeout``.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(viewset, request, *args, **kwargs):
+            versions = get_versions(get_scopes(request))
+            parts = [*versions, request.path]
+            parts += [request.query_params.get(param) for param in query_params]
+            if vary_every:
+                parts.append(int(time.time()) // vary_every)
+            key = f"response:{hashlib.sha1(repr(parts).encode()).hexdigest()}"
+
+            content = cache.get(key)
+            if content is None:
+                response = view(viewset, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                content = JSONRenderer().render(response.data)
+                # within the replica window the page may predate the change,
+                # it is kept only until the window has passed and then rebuilt
+                settles_in = _settles_in(versions)
+                cache.set(key, content, timeout=min(timeout, settles_in or timeout))
+            return HttpResponse(content, content_type="application/json")
+
+        return wrapper
+
+    return decorator
@@ -1,11 +1,8 @@
 import base64
 import json
-import uuid
 from decimal import Decimal
 from re import sub
 
-from cryptography.fernet import Fernet
-from django.conf import settings
 from django.core.files.base import ContentFile
 from django.core.paginator import Paginator
 from django.http import JsonResponse
@@ -13,35 +10,7 @@ from django.utils import timezone
 
 from authentication.models import User, UserCard
 
-
-def encrypt(txt):
-    try:
-        # convert integer etc to string first
-        txt = str(txt)
-        # get the key from settings
-        cipher_suite = Fernet(settings.ENCRYPT_KEY.encode())  # key should be byte
-        # #input should be byte, so convert the text to byte
-        encrypted_text = cipher_suite.encrypt(txt.encode("ascii"))
-        # encode to urlsafe base64 format
-        encrypted_text = base64.urlsafe_b64encode(encrypted_text).decode("ascii")
-        return encrypted_text
-    except Exception as e:
-        # log the error if any
-        print("encrypt error", e)
-        return None
-
-
-def decrypt(txt):
-    try:
-        # base64 decode
-        txt = base64.urlsafe_b64decode(txt)
-        cipher_suite = Fernet(settings.ENCRYPT_KEY.encode())
-        decoded_text = cipher_suite.decrypt(txt).decode("ascii")
-        return decoded_text
-    except Exception as e:
-        # log the error
-        print("decrypt error", e)
-        return None
+from .encryption import decrypt, encrypt  # noqa: F401
 
 
 def convert_serializer_errors_from_dict_to_list(input_dict: dict) -> list:
@@ -168,15 +137,6 @@ def base64_to_data(base64_data):
     return data
 
 
-def generate_unique_id(model):
-    generate_id = uuid.uuid4()
-    exists = model.objects.filter(token=generate_id).exists()
-    while exists:
-        generate_id = uuid.uuid4()
-        exists = model.objects.filter(token=generate_id).exists()
-    return generate_id
-
-
 def jsonify(data):
     return json.loads(JsonResponse(data, safe=False).content)
 
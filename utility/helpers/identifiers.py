@@ -0,0 +1,47 @@
+import secrets
+import uuid
+
+from django.db import IntegrityError, transaction
+
+
+def generate_id() -> uuid.UUID:
+    # 122 random bits, a collision is not worth a query to rule out
+    return uuid.uuid4()
+
+
+def generate_numeric_code(length: int = 6) -> str:
+    return "".join(secrets.choice("0123456789") for _ in range(length))
+
+
+def save_with_unique_value(
+    instance, field: str, generate, attempts: int = 5, save=None
+):
+    """
+    Sets ``field`` from ``generate()`` and saves, letting the database unique
+    constraint catch the rare collision instead of probing with ``exists()``.
+
+    ``generate`` receives the attempt number, starting at 0. ``save`` defaults
+    to ``instance.save`` and lets a model call this from its own ``save()``.
+    The common case costs the INSERT alone.
+    """
+    save = save or instance.save
+    model = type(instance)
+    for attempt in range(attempts):
+        value = generate(attempt)
+        setattr(instance, field, value)
+        try:
+            # savepoint, so a collision does not break an outer transaction
+            with transaction.atomic():
+                save()
+            return instance
+        except IntegrityError:
+            collided = (
+                model._default_manager.filter(**{field: value})
+                .exclude(pk=instance.pk)
+                .exists()
+            )
+            # some other constraint failed, retrying would not help
+            if not collided or attempt == attempts - 1:
+                raise
+            # a failed INSERT must be retried as an INSERT
+            instance._state.adding = True
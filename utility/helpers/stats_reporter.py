@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+
+class StatsReporter:
+    """
+    Prints the stats of every registered source every ``interval`` seconds
+    from a background thread. The sources keep their counters in process
+    memory, so each worker process reports its own.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def register(self, name: str, source):
+        """``source`` is called with no arguments and returns a dict."""
+        with self._lock:
+            self._sources[name] = source
+        self._ensure_reporter()
+
+    def _ensure_reporter(self):
+        if self.interval <= 0:
+            return
+        # threads do not survive a fork, each worker process starts its own
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="stats-reporter", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.report()
+
+    def report(self):
+        with self._lock:
+            sources = list(self._sources.items())
+        for name, source in sources:
+            try:
+                stats = source()
+            except Exception as e:
+                print(f"{name} stats error {e}")
+                continue
+            if stats:
+                print(f"{name} stats pid={os.getpid()} {json.dumps(stats)}")
+
+
+stats_reporter = StatsReporter(settings.STATS_REPORT_INTERVAL)
@@ -0,0 +1,40 @@
+import warnings
+
+from django.conf import settings
+from django.db import connections
+
+
+class ExternalCallInTransaction(Exception):
+    def __init__(self, name: str, alias: str):
+        super().__init__(
+            f"{name} was called inside an open transaction on the {alias} "
+            "database, move the call outside the atomic block"
+        )
+
+
+def in_transaction(connection) -> bool:
+    # the atomic blocks TestCase wraps every test in are not the code's own
+    return any(
+        not getattr(atomic, "_from_testcase", False)
+        for atomic in connection.atomic_blocks
+    )
+
+
+def check_no_open_transaction(name: str):
+    """
+    Flags an external call made while a transaction is open, since the
+    transaction and its connection and row locks are held for the whole
+    round-trip. EXTERNAL_CALL_IN_TRANSACTION picks what happens: "raise"
+    (the default under tests), "warn" or "ignore".
+    """
+    policy = getattr(settings, "EXTERNAL_CALL_IN_TRANSACTION", "warn")
+    if policy == "ignore":
+        return
+    for connection in connections.all(initialized_only=True):
+        if not in_transaction(connection):
+            continue
+        error = ExternalCallInTransaction(name, connection.alias)
+        if policy == "raise":
+            raise error
+        warnings.warn(f"{error}", RuntimeWarning, stacklevel=3)
+        return
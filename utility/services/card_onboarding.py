@@ -0,0 +1,111 @@
+from utility.helpers.concurrency import Call, run_concurrently
+from utility.helpers.functools import decrypt
+from utility.helpers.identifiers import generate_id
+
+from .stripe import StripeHelper
+
+
+def card_idempotency_key(user_id, purpose: str, client_key: str = None) -> str:
+    """
+    Key of one card submission. A client retrying a request sends the same
+    ``Idempotency-Key`` header and replays the stripe calls of the first
+    attempt, without one every submission is new. Never derived from the
+    card, stripe replays a cached decline for 24 hours to the same key.
+    """
+    # stripe keys are shared by the whole account, keep clients apart
+    return f"card-{purpose}-{user_id}-{client_key or generate_id()}"
+
+
+class CardOnboarding:
+    """
+    Registers a card for a patient with stripe in at most three calls:
+    payment method, customer (only when not cached on the user) and a
+    setup intent that is confirmed on create, which also attaches the card.
+    The payment method and customer calls do not depend on each other and
+    run at the same time.
+    """
+
+    def __init__(self, user, idempotency_key: str = None):
+        self.user = user
+        self.idempotency_key = idempotency_key
+        self.stripe = StripeHelper()
+
+    def _key(self, step: str):
+        if not self.idempotency_key:
+            return None
+        return f"{self.idempotency_key}:{step}"
+
+    def ensure_customer(self, pm_id: str = None) -> dict:
+        if self.user.stripe_customer_id:
+            return {"status": True, "data": {"id": self.user.stripe_customer_id}}
+
+        first_name = decrypt(self.user.first_name)
+        last_name = decrypt(self.user.last_name)
+        details = {"name": f"{first_name} {last_name}", "email": self.user.email}
+        if pm_id:
+            details["payment_method"] = pm_id
+        customer = self.stripe.create_customer(
+            customer_id=self.user.id,
+            idempotency_key=self._key("customer"),
+            **details,
+        )
+        if not customer["status"]:
+            # users onboarded before the id was cached already have a customer
+            existing = self.stripe.retrieve_customer(self.user.id)
+            if not existing["status"]:
+                return customer
+            customer = existing
+
+        self.user.stripe_customer_id = customer["data"]["id"]
+        self.user.save(update_fields=["stripe_customer_id"])
+        return customer
+
+    def register_card(
+        self,
+        card_number: str,
+        exp_month: int,
+        exp_year: int,
+        cvc: str,
+        line1: str,
+        city: str,
+        state: str,
+        zip_code: str,
+    ) -> dict:
+        payment_method, customer = run_concurrently(
+            Call(
+                self.stripe.create_payment_method,
+                card_number=card_number,
+                exp_month=exp_month,
+                exp_year=exp_year,
+                cvc=cvc,
+                line1=line1,
+                city=city,
+                state=state,
+                zip_code=zip_code,
+                idempotency_key=self._key("payment_method"),
+            ),
+            # the confirmed setup intent attaches the card to the customer
+            Call(self.ensure_customer),
+        )
+        if not payment_method["status"]:
+            return payment_method
+        if not customer["status"]:
+            return customer
+        pm_id = payment_method["data"]["id"]
+
+        setup_intent = self.stripe.setup_intent(
+            customer_id=customer["data"]["id"],
+            pm_id=pm_id,
+            confirm=True,
+            idempotency_key=self._key("setup_intent"),
+        )
+        if not setup_intent["status"]:
+            return setup_intent
+
+        return {
+            "status": True,
+            "data": {
+                "payment_method": payment_method["data"],
+                "setup_intent": setup_intent["data"],
+            },
+        }
@@ -0,0 +1,245 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from django.conf import settings
+
+from utility.helpers.stats_reporter import stats_reporter
+from utility.helpers.transactions import check_no_open_transaction
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_BREAKER_SETTINGS = {
+    # percentage of failed calls in the window that opens the breaker
+    "failure_rate_threshold": 50,
+    # calls needed in the window before the failure rate is considered
+    "minimum_calls": 10,
+    "window_seconds": 60,
+    # how long the breaker stays open before letting a probe through
+    "open_seconds": 30,
+    "half_open_max_calls": 1,
+    # per-dependency concurrency limit, extra callers are shed
+    "max_concurrent_calls": 10,
+    "acquire_timeout": 0.5,
+}
+
+
+class CircuitBreakerError(Exception):
+    def __init__(self, name: str, message: str):
+        self.name = name
+        super().__init__(message)
+
+
+class CircuitOpenError(CircuitBreakerError):
+    def __init__(self, name: str):
+        super().__init__(
+            name, f"{name} is temporarily unavailable, please try again shortly"
+        )
+
+
+class ConcurrencyLimitError(CircuitBreakerError):
+    def __init__(self, name: str):
+        super().__init__(
+            name, f"{name} is handling too many requests, please try again shortly"
+        )
+
+
+class _Call:
+    def __init__(self):
+        self.failed = False
+
+    def mark_failure(self):
+        self.failed = True
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker with a concurrency limit for one upstream.
+
+    State is kept per process, so every gunicorn/celery worker trips on its own.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: int = 50,
+        minimum_calls: int = 10,
+        window_seconds: int = 60,
+        open_seconds: int = 30,
+        half_open_max_calls: int = 1,
+        max_concurrent_calls: int = 10,
+        acquire_timeout: float = 0.5,
+        ignore_exceptions: tuple = (),
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.acquire_timeout = acquire_timeout
+        self.ignore_exceptions = ignore_exceptions
+
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_concurrent_calls)
+        self._outcomes = deque()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= (
+            self.open_seconds
+        ):
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+
+    def _trim_window(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        print(f"circuit breaker {self.name} opened")
+
+    def _close(self):
+        self._state = CLOSED
+        self._outcomes.clear()
+        print(f"circuit breaker {self.name} closed")
+
+    def _allow_call(self):
+        with self._lock:
+            self._refresh_state()
+            if self._state == OPEN:
+                raise CircuitOpenError(self.name)
+            if self._state == HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    raise CircuitOpenError(self.name)
+                self._half_open_calls += 1
+
+    def record_success(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._close()
+                return
+            now = time.monotonic()
+            self._outcomes.append((now, True))
+            self._trim_window(now)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            now = time.monotonic()
+            self._outcomes.append((now, False))
+            self._trim_window(now)
+
+            total = len(self._outcomes)
+            if total < self.minimum_calls:
+                return
+            failures = sum(1 for _, success in self._outcomes if not success)
+            if failures * 100 / total >= self.failure_rate_threshold:
+                self._open()
+
+    def _release_probe(self):
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    @contextmanager
+    def guard(self, ignore: tuple = ()):
+        # exceptions in ``ignore`` are client errors, not upstream failures
+        ignore = tuple(self.ignore_exceptions) + tuple(ignore)
+        check_no_open_transaction(self.name)
+        self._allow_call()
+        if not self._semaphore.acquire(timeout=self.acquire_timeout):
+            self._release_probe()
+            raise ConcurrencyLimitError(self.name)
+
+        call = _Call()
+        try:
+            yield call
+        except ignore:
+            self.record_success()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        else:
+            self._record_call(call)
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def async_guard(self, ignore: tuple = ()):
+        """``guard`` for coroutines, waits for a slot without blocking the loop."""
+        ignore = tuple(self.ignore_exceptions) + tuple(ignore)
+        check_no_open_transaction(self.name)
+        self._allow_call()
+        deadline = time.monotonic() + self.acquire_timeout
+        while not self._semaphore.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                self._release_probe()
+                raise ConcurrencyLimitError(self.name)
+            await asyncio.sleep(0.01)
+
+        call = _Call()
+        try:
+            yield call
+        except ignore:
+            self.record_success()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        else:
+            self._record_call(call)
+        finally:
+            self._semaphore.release()
+
+    def _record_call(self, call: _Call):
+        if call.failed:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def call(self, func, *args, **kwargs):
+        with self.guard():
+            return func(*args, **kwargs)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    with _breakers_lock:
+        if name not in _breakers:
+            breaker_settings = dict(DEFAULT_BREAKER_SETTINGS)
+            configured = getattr(settings, "CIRCUIT_BREAKERS", {})
+            breaker_settings.update(configured.get("default", {}))
+            breaker_settings.update(configured.get(name, {}))
+            breaker_settings.update(kwargs)
+            _breakers[name] = CircuitBreaker(name, **breaker_settings)
+            stats_reporter.register("circuit breakers", get_breaker_states)
+        return _breakers[name]
+
+
+def get_breaker_states() -> dict:
+    # read from the stats reporter thread while requests may add breakers
+    with _breakers_lock:
+        breakers = list(_breakers.items())
+    return {name: breaker.state for name, breaker in breakers}
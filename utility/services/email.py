@@ -0,0 +1,9 @@
+from django.core.mail.backends.smtp import EmailBackend
+
+from utility.helpers.transactions import check_no_open_transaction
+
+
+class SMTPEmailBackend(EmailBackend):
+    def send_messages(self, email_messages):
+        check_no_open_transaction("smtp")
+        return super().send_messages(email_messages)
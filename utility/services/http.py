@@ -0,0 +1,20 @@
+import asyncio
+import weakref
+
+import aiohttp
+from django.conf import settings
+
+_sessions = weakref.WeakKeyDictionary()
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    # one pooled session per event loop, an aiohttp session is bound to the
+    # loop it was created on
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=settings.EXTERNAL_API_TIMEOUT)
+        )
+        _sessions[loop] = session
+    return session
@@ -1,10 +1,95 @@
 import datetime
+import hashlib
 import json
+import threading
+import time
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
 
 from ..helpers.functools import parse_dollar_string_to_number, remove_percentage
+from .circuit_breaker import get_breaker
+
+PVERIFY_TOKEN_CACHE_KEY = "pverify:access_token"
+PVERIFY_TOKEN_LOCK_KEY = "pverify:access_token:lock"
+PVERIFY_ELIGIBILITY_CACHE_PREFIX = "pverify:eligibility"
+
+
+class PverifyTokenManager:
+    """
+    Caches the pVerify client-credentials token in the shared cache.
+
+    Tokens are refreshed in the background once they enter the refresh-ahead
+    window, and only one worker at a time (the holder of the cache lock) asks
+    pVerify for a new token.
+    """
+
+    def __init__(self, fetch_token):
+        self.fetch_token = fetch_token
+        self.refresh_margin = settings.PVERIFY_TOKEN_REFRESH_MARGIN
+        self.refresh_ahead = settings.PVERIFY_TOKEN_REFRESH_AHEAD
+        self.lock_timeout = settings.PVERIFY_API_TIMEOUT
+
+    def get_token(self, force_refresh: bool = False):
+        if not force_refresh:
+            cached = cache.get(PVERIFY_TOKEN_CACHE_KEY)
+            if cached:
+                if time.time() >= cached["refresh_at"]:
+                    self._refresh_in_background()
+                return cached["access_token"]
+        return self._refresh_and_wait()
+
+    def invalidate(self, access_token: str):
+        # only drop the token that failed, another worker may have replaced it
+        cached = cache.get(PVERIFY_TOKEN_CACHE_KEY)
+        if cached and cached["access_token"] == access_token:
+            cache.delete(PVERIFY_TOKEN_CACHE_KEY)
+
+    def _store(self, token_data: dict):
+        expires_in = int(token_data.get("expires_in") or 3600)
+        timeout = max(expires_in - self.refresh_margin, 1)
+        cache.set(
+            PVERIFY_TOKEN_CACHE_KEY,
+            {
+                "access_token": token_data["access_token"],
+                "refresh_at": time.time() + max(timeout - self.refresh_ahead, 0),
+            },
+            timeout=timeout,
+        )
+        return token_data["access_token"]
+
+    def _refresh(self):
+        try:
+            token_data = self.fetch_token()
+            if not token_data:
+                return None
+            return self._store(token_data)
+        finally:
+            cache.delete(PVERIFY_TOKEN_LOCK_KEY)
+
+    def _refresh_in_background(self):
+        if cache.add(PVERIFY_TOKEN_LOCK_KEY, True, timeout=self.lock_timeout):
+            thread = threading.Thread(target=self._refresh, daemon=True)
+            thread.start()
+
+    def _refresh_and_wait(self):
+        if cache.add(PVERIFY_TOKEN_LOCK_KEY, True, timeout=self.lock_timeout):
+            return self._refresh()
+
+        # another worker is fetching a token, wait for it to land in the cache
+        deadline = time.time() + self.lock_timeout
+        while time.time() < deadline:
+            time.sleep(0.1)
+            cached = cache.get(PVERIFY_TOKEN_CACHE_KEY)
+            if cached:
+                return cached["access_token"]
+            if not cache.get(PVERIFY_TOKEN_LOCK_KEY):
+                break
+        token_data = self.fetch_token()
+        if not token_data:
+            return None
+        return self._store(token_data)
 
 
 class Pverify:
@@ -12,8 +97,10 @@ class Pverify:
         self.base_url = settings.PVERIFY_API_BASE_URL
         self.secret_key = settings.PVERIFY_API_CLIENT_SECRET
         self.client_id = settings.PVERIFY_API_CLIENT_ID
+        self.timeout = settings.PVERIFY_API_TIMEOUT
+        self.breaker = get_breaker("pverify")
 
-    def generate_token(self):
+    def request_token(self):
         try:
             url = self.base_url + "Token"
             headers = {"Content-Type": "application/x-www-form-urlencoded"}
@@ -24,30 +111,39 @@ class Pverify:
                 "grant_type": "client_credentials",
             }
 
-            response = requests.post(url, headers=headers, data=payload)
-            print(response.status_code, response.json())
-            return response.json()["access_token"]
+            with self.breaker.guard() as call:
+                response = requests.post(
+                    url, headers=headers, data=payload, timeout=self.timeout
+                )
+                if response.status_code >= 500:
+                    call.mark_failure()
+                response_data = response.json()
+            print(response.status_code)
+            if "access_token" not in response_data:
+                print("pverify generate token Error", response_data)
+                return None
+            return response_data
         except Exception as e:
             print("pverify generate toke Error", e)
             return None
 
+    def generate_token(self, force_refresh: bool = False):
+        return token_manager.get_token(force_refresh=force_refresh)
+
     def verify_insurance(
         self,
         insurance_company_name: str,
         policy_number: str,
         dob: str,
         patient_relationship: str,
+        date_of_service: datetime.date = None,
     ):
         try:
-            today = datetime.datetime.now()
+            if date_of_service is None:
+                date_of_service = datetime.datetime.now().date()
             url = self.base_url + "api/EligibilitySummary"
 
-            headers = {
-                "Authorization": f"Bearer {self.generate_token()}",
-                "Client-API-Id": self.client_id,
-                "Content-Type": "application/json",
-            }
-            start_date = today.strftime("%m/%d/%Y")
+            start_date = date_of_service.strftime("%m/%d/%Y")
 
             if patient_relationship == "self":
                 isSubscriberPatient = "True"
@@ -82,15 +178,39 @@ class Pverify:
                 "CustomerID": "",
             }
 
-            response = requests.post(url, headers=headers, data=json.dumps(payload))
+            access_token = self.generate_token()
+            for attempt in range(2):
+                headers = {
+                    "Authorization": f"Bearer {access_token}",
+                    "Client-API-Id": self.client_id,
+                    "Content-Type": "application/json",
+                }
+                with self.breaker.guard() as call:
+                    response = requests.post(
+                        url,
+                        headers=headers,
+                        data=json.dumps(payload),
+                        timeout=self.timeout,
+                    )
+                    if response.status_code >= 500:
+                        call.mark_failure()
+
+                # the cached token was revoked or expired early, retry once
+                if response.status_code == 401 and attempt == 0:
+                    token_manager.invalidate(access_token)
+                    access_token = self.generate_token(force_refresh=True)
+                    continue
+                break
+
+            response_data = response.json()
 
-            if response.json()["APIResponseCode"] != "0":
+            if response_data["APIResponseCode"] != "0":
                 return {
                     "status": False,
-                    "response": f"{response.json()['ErrorDescription']}",
+                    "response": f"{response_data['ErrorDescription']}",
                 }
 
-            return {"status": True, "response": response.json()}
+            return {"status": True, "response": response_data}
 
         except Exception as e:
             print("pverify verify insurance error", e)
@@ -99,6 +219,81 @@ class Pverify:
                 "response": f"{e}",
             }
 
+    def check_eligibility(
+        self,
+        insurance_company_name: str,
+        policy_number: str,
+        dob: str,
+        patient_relationship: str,
+    ) -> dict:
+        """
+        Eligibility summary plus coverage computation, cached for the day.
+
+        Results are keyed by payer, member, date of birth, relationship and date
+        of service, so repeated checks for the same member on the same day do not
+        trigger another billable pVerify call.
+        """
+        now = datetime.datetime.now()
+        date_of_service = now.date()
+        cache_key = eligibility_cache_key(
+            insurance_company_name,
+            policy_number,
+            dob,
+            patient_relationship,
+            date_of_service,
+        )
+        lock_key = f"{cache_key}:lock"
+
+        cached = cache.get(cache_key)
+        if cached:
+            return {"status": True, "response": cached}
+
+        # only one worker calls pVerify for a member, the others wait for it
+        acquired = cache.add(lock_key, True, timeout=self.timeout * 2)
+        if not acquired:
+            deadline = time.time() + self.timeout * 2
+            while time.time() < deadline and cache.get(lock_key):
+                time.sleep(0.2)
+                cached = cache.get(cache_key)
+                if cached:
+                    return {"status": True, "response": cached}
+            cached = cache.get(cache_key)
+            if cached:
+                return {"status": True, "response": cached}
+            # the owner failed or gave up, take the lock over if it is free
+            acquired = cache.add(lock_key, True, timeout=self.timeout * 2)
+
+        try:
+            insurance_obj = self.verify_insurance(
+                insurance_company_name,
+                policy_number,
+                dob,
+                patient_relationship,
+                date_of_service=date_of_service,
+            )
+            if not insurance_obj["status"]:
+                return {"status": False, "response": insurance_obj["response"]}
+
+            insurance_total = self.complete_insurance_verification(
+                insurance_obj["response"], patient_relationship
+            )
+            if insurance_total["status"] == "failure":
+                return {"status": False, "response": insurance_total["response"]}
+
+            end_of_day = datetime.datetime.combine(
+                date_of_service + datetime.timedelta(days=1), datetime.time.min
+            )
+            cache.set(
+                cache_key,
+                insurance_total,
+                timeout=max(int((end_of_day - now).total_seconds()), 60),
+            )
+            return {"status": True, "response": insurance_total}
+        finally:
+            # a waiter that timed out must not release the owner's lock
+            if acquired:
+                cache.delete(lock_key)
+
     def complete_insurance_verification(
         self, obj: dict, patient_relationship: str
     ) -> dict:
@@ -265,3 +460,27 @@ class Pverify:
                 "status": "failure",
                 "response": f"{e}",
             }
+
+
+def eligibility_cache_key(
+    insurance_company_name: str,
+    policy_number: str,
+    dob: str,
+    patient_relationship: str,
+    date_of_service: datetime.date,
+) -> str:
+    # member details are hashed so no PHI ends up in cache keys
+    raw_key = "|".join(
+        [
+            insurance_company_name.strip().lower(),
+            policy_number.strip().upper(),
+            dob.strip(),
+            patient_relationship.strip().lower(),
+            date_of_service.isoformat(),
+        ]
+    )
+    digest = hashlib.sha256(raw_key.encode()).hexdigest()
+    return f"{PVERIFY_ELIGIBILITY_CACHE_PREFIX}:{digest}"
+
+
+token_manager = PverifyTokenManager(lambda: Pverify().request_token())
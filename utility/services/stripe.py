@@ -1,9 +1,34 @@
+from decimal import Decimal
+
 import stripe
 from django.conf import settings
 
+from .circuit_breaker import CircuitBreakerError, get_breaker
+
 stripe.api_key = settings.STRIPE_TEST_API_KEY
 
-client = stripe.http_client.RequestsClient()
+
+class GuardedRequestsClient(stripe.http_client.RequestsClient):
+    """Runs every Stripe API request through the "stripe" circuit breaker."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = get_breaker("stripe")
+
+    def request(self, method, url, headers, post_data=None):
+        try:
+            with self.breaker.guard() as call:
+                content, status_code, response_headers = super().request(
+                    method, url, headers, post_data
+                )
+                if status_code >= 500:
+                    call.mark_failure()
+        except CircuitBreakerError as e:
+            raise stripe.error.APIConnectionError(f"{e}", should_retry=False)
+        return content, status_code, response_headers
+
+
+client = GuardedRequestsClient(timeout=settings.STRIPE_API_TIMEOUT)
 stripe.default_http_client = client
 
 
@@ -86,9 +111,11 @@ class StripeHelper:
         city: str,
         state: str,
         zip_code: str,
+        idempotency_key: str = None,
     ) -> dict:
         try:
             payment_method = stripe.PaymentMethod.create(
+                idempotency_key=idempotency_key,
                 type="card",
                 card={
                     "number": f"{card_number}",
@@ -133,9 +160,11 @@ class StripeHelper:
                 "message": f"{e}",
             }
 
-    def create_customer(self, customer_id: str, **kwargs):
+    def create_customer(self, customer_id: str, idempotency_key: str = None, **kwargs):
         try:
-            customer = stripe.Customer.create(id=str(customer_id), **kwargs)
+            customer = stripe.Customer.create(
+                id=str(customer_id), idempotency_key=idempotency_key, **kwargs
+            )
 
             return {"status": True, "data": customer}
         except stripe.error.RateLimitError as e:
@@ -248,16 +277,27 @@ class StripeHelper:
                 "message": f"{e}",
             }
 
-    def setup_intent(self, customer_id: str, pm_id: str):
+    def setup_intent(
+        self,
+        customer_id: str,
+        pm_id: str,
+        confirm: bool = False,
+        idempotency_key: str = None,
+    ):
         try:
+            # confirming on create also attaches pm_id to the customer
             intent = stripe.SetupIntent.create(
                 customer=str(customer_id),
                 payment_method=pm_id,
+                confirm=confirm,
                 automatic_payment_methods={"enabled": True, "allow_redirects": "never"},
+                idempotency_key=idempotency_key,
             )
 
             return {"status": True, "data": intent}
 
+        except stripe.error.CardError as e:
+            return {"status": False, "exception": "CardError", "message": f"{e}"}
         except stripe.error.RateLimitError as e:
             return {"status": False, "exception": "RateLimitError", "message": f"{e}"}
         except stripe.error.InvalidRequestError as e:
@@ -555,10 +595,14 @@ class StripeHelper:
         amount: int,
         customer_email: str,
         currency: str = "usd",
+        idempotency_key: str = None,
+        metadata: dict = None,
     ):
         try:
             charge = stripe.PaymentIntent.create(
-                amount=int(amount) * 100,
+                idempotency_key=idempotency_key,
+                metadata=metadata or {},
+                amount=int(Decimal(str(amount)) * 100),
                 currency=currency,
                 payment_method_types=["card"],
                 customer=str(customer_id),
@@ -708,3 +752,72 @@ class StripeHelper:
                 "exception": "Out of Scope Exception",
                 "message": f"{e}",
             }
+
+    def create_transfer(
+        self,
+        amount,
+        destination: str,
+        currency: str = "usd",
+        idempotency_key: str = None,
+        metadata: dict = None,
+        transfer_group: str = None,
+    ):
+        try:
+            transfer = stripe.Transfer.create(
+                idempotency_key=idempotency_key,
+                amount=int(Decimal(str(amount)) * 100),
+                currency=currency,
+                destination=destination,
+                metadata=metadata or {},
+                transfer_group=transfer_group,
+            )
+            return {"status": True, "data": transfer}
+        except stripe.error.RateLimitError as e:
+            return {"status": False, "exception": "RateLimitError", "message": f"{e}"}
+        except stripe.error.InvalidRequestError as e:
+            return {
+                "status": False,
+                "exception": "InvalidRequestError",
+                "message": f"{e}",
+            }
+        except stripe.error.APIConnectionError as e:
+            return {
+                "status": False,
+                "exception": "APIConnectionError",
+                "message": f"{e}",
+            }
+        except stripe.error.StripeError as e:
+            return {"status": False, "exception": "StripeError", "message": f"{e}"}
+        except Exception as e:
+            return {
+                "status": False,
+                "exception": "Out of Scope Exception",
+                "message": f"{e}",
+            }
+
+    def list_transfers(self, transfer_group: str):
+        try:
+            transfers = stripe.Transfer.list(transfer_group=transfer_group, limit=10)
+            return {"status": True, "data": transfers["data"]}
+        except stripe.error.RateLimitError as e:
+            return {"status": False, "exception": "RateLimitError", "message": f"{e}"}
+        except stripe.error.InvalidRequestError as e:
+            return {
+                "status": False,
+                "exception": "InvalidRequestError",
+                "message": f"{e}",
+            }
+        except stripe.error.APIConnectionError as e:
+            return {
+                "status": False,
+                "exception": "APIConnectionError",
+                "message": f"{e}",
+            }
+        except stripe.error.StripeError as e:
+            return {"status": False, "exception": "StripeError", "message": f"{e}"}
+        except Exception as e:
+            return {
+                "status": False,
+                "exception": "Out of Scope Exception",
+                "message": f"{e}",
+            }
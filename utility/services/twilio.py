@@ -1,6 +1,10 @@
 from django.conf import settings
+from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 
+from .circuit_breaker import get_breaker
+
 
 class Twilio:
     def __init__(self):
@@ -8,12 +12,17 @@ class Twilio:
         self.accountSid = settings.TWILIO_ACCOUNT_SID
         self.authToken = settings.TWILIO_AUTH_TOKEN
         self.number = settings.TWILIO_NUMBER
+        self.http_client = TwilioHttpClient(timeout=settings.EXTERNAL_API_TIMEOUT)
+        self.breaker = get_breaker("twilio")
 
     def get_balance(self):
         try:
-            client = Client(self.accountSid, self.authToken)
+            client = Client(
+                self.accountSid, self.authToken, http_client=self.http_client
+            )
             print(client.api.v2010.balance)
-            balance_data = client.api.v2010.balance.fetch()
+            with self.breaker.guard():
+                balance_data = client.api.v2010.balance.fetch()
             balance = float(balance_data.balance)
             currency = balance_data.currency
             return {
@@ -28,8 +37,13 @@ class Twilio:
 
     def send_sms(self, to, body):
         try:
-            client = Client(self.accountSid, self.authToken)
-            new_message = client.messages.create(body=body, to=to, from_=self.number)
+            client = Client(
+                self.accountSid, self.authToken, http_client=self.http_client
+            )
+            with self.breaker.guard(ignore=(TwilioRestException,)):
+                new_message = client.messages.create(
+                    body=body, to=to, from_=self.number
+                )
             print(new_message.sid)
             return {"status": True}
         except Exception as e:
@@ -1,27 +1,52 @@
 import requests
 from django.conf import settings
 
+from .circuit_breaker import get_breaker
+from .http import get_async_session
+
 
 class ZipCodeApi:
     def __init__(self):
         self.base_url = settings.ZIP_CODE_API_BASE_URL
         self.test_api_key = settings.ZIP_CODE_API_TEST_API_KEY
+        self.timeout = settings.EXTERNAL_API_TIMEOUT
+        self.breaker = get_breaker("zipcodeapi")
 
     def get_close_zip_codes(self, zip_code) -> dict:
         try:
             url = f"{self.base_url}rest/{self.test_api_key}/radius.json/{zip_code}/15/mile"
-            response = requests.get(url)
-
-            if response.status_code != 200:
-                error_msg = response.json()["error_msg"]
-                return {
-                    "status": False,
-                    "response": f"{error_msg}",
-                }
-            all_zip_codes = response.json()["zip_codes"]
-            zip_code_list = [zip_code["zip_code"] for zip_code in all_zip_codes]
-            return {"status": True, "response": zip_code_list}
+            with self.breaker.guard() as call:
+                response = requests.get(url, timeout=self.timeout)
+                if response.status_code >= 500:
+                    call.mark_failure()
+                response_data = response.json()
+            return self._close_zip_codes_response(response.status_code, response_data)
 
         except Exception as e:
             print("Get close zip codes exception", e)
             return {"status": False, "response": f"{e}"}
+
+    async def aget_close_zip_codes(self, zip_code) -> dict:
+        try:
+            url = f"{self.base_url}rest/{self.test_api_key}/radius.json/{zip_code}/15/mile"
+            async with self.breaker.async_guard() as call:
+                async with get_async_session().get(url) as response:
+                    if response.status >= 500:
+                        call.mark_failure()
+                    response_data = await response.json(content_type=None)
+            return self._close_zip_codes_response(response.status, response_data)
+
+        except Exception as e:
+            print("Get close zip codes exception", e)
+            return {"status": False, "response": f"{e}"}
+
+    def _close_zip_codes_response(self, status_code: int, response_data: dict) -> dict:
+        if status_code != 200:
+            error_msg = response_data["error_msg"]
+            return {
+                "status": False,
+                "response": f"{error_msg}",
+            }
+        all_zip_codes = response_data["zip_codes"]
+        zip_code_list = [zip_code["zip_code"] for zip_code in all_zip_codes]
+        return {"status": True, "response": zip_code_list}